@@ -0,0 +1,86 @@
+"""
+Tool authorization for the agent: cached auth requirements and per-user
+authorization status, so routine turns skip the Arcade round trips, and an
+interrupt/resume flow instead of blocking a worker while the user authorizes.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from langchain_arcade import ToolManager
+
+# How long a completed authorization is trusted before Arcade is asked again
+auth_status_ttl = float(os.environ.get("AUTH_STATUS_TTL", 15 * 60))
+
+
+class AuthStatusCache:
+    """
+    Remembers which tools need authorization (fixed by their definitions) and
+    which users have completed it, with expiry. Only completed authorizations are
+    cached; a pending one is always checked again with Arcade.
+    """
+
+    def __init__(self, manager: ToolManager, ttl: float = auth_status_ttl):
+        self.manager = manager
+        self.ttl = ttl
+        self._requires: dict[str, bool] = {}
+        self._authorized: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def requires_auth(self, tool_name: str) -> bool:
+        required = self._requires.get(tool_name)
+        if required is None:
+            required = self._requires[tool_name] = self.manager.requires_auth(tool_name)
+        return required
+
+    def is_authorized(self, user_id: str, tool_name: str) -> bool:
+        """True if the user completed authorization for the tool within the last `ttl` seconds."""
+        with self._lock:
+            expires_at = self._authorized.get((user_id, tool_name))
+            if expires_at is not None and expires_at > time.time():
+                self.stats["hits"] += 1
+                return True
+            self._authorized.pop((user_id, tool_name), None)
+            self.stats["misses"] += 1
+            return False
+
+    def needs_authorization(self, user_id: str, tool_names: list[str]) -> list[str]:
+        """The tools that need auth and aren't known to be authorized for the user."""
+        return [
+            name
+            for name in dict.fromkeys(tool_names)
+            if self.requires_auth(name) and not self.is_authorized(user_id, name)
+        ]
+
+    def mark_authorized(self, user_id: str, tool_name: str) -> None:
+        with self._lock:
+            self._authorized[(user_id, tool_name)] = time.time() + self.ttl
+
+    def invalidate(self, user_id: str, tool_name: str | None = None) -> None:
+        """Forgets a user's authorizations (e.g. after a tool reports revoked access)."""
+        with self._lock:
+            for key in list(self._authorized):
+                if key[0] == user_id and tool_name in (None, key[1]):
+                    del self._authorized[key]
+
+    async def authorize(self, user_id: str, tool_name: str):
+        """
+        Starts (or confirms) authorization with Arcade off the event loop. Returns
+        None when the user is already authorized, otherwise the pending response
+        carrying the URL to show the user.
+        """
+        response = await asyncio.to_thread(self.manager.authorize, tool_name, user_id)
+        if response.status == "completed":
+            self.mark_authorized(user_id, tool_name)
+            return None
+        return response
+
+    async def check(self, user_id: str, tool_name: str, authorization_id: str) -> bool:
+        """Checks a pending authorization once, without waiting for it to complete."""
+        completed = await asyncio.to_thread(self.manager.is_authorized, authorization_id)
+        if completed:
+            self.mark_authorized(user_id, tool_name)
+        return completed
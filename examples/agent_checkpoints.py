@@ -0,0 +1,496 @@
+"""
+Checkpoint retention and compact checkpoint serialization for the Postgres saver.
+
+`AsyncPostgresSaver` writes a checkpoint for every graph step and re-writes the
+whole message list whenever it changes, so large tool outputs are stored once
+per step for the rest of the thread. Two independent pieces reduce that:
+
+- `CompactSerializer` zstd-compresses msgpack blobs and, under a saver that can
+  store payloads, moves long tool outputs out of line: the message keeps a
+  content-hash reference and the text is written once per thread.
+- `CompactPostgresSaver` stores those payloads, and prunes each thread after a
+  completed turn (keep the last K turn-end checkpoints, drop the intermediate
+  super-steps) and deletes threads nobody has touched for the TTL.
+"""
+
+import abc
+import asyncio
+import contextvars
+import hashlib
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Use `CompactSerializer` for new checkpoints (existing ones load either way)
+checkpoint_compact = os.environ.get("CHECKPOINT_COMPACT", "0") == "1"
+# Tool outputs at least this long (characters) are stored out of line
+checkpoint_offload_chars = int(os.environ.get("CHECKPOINT_OFFLOAD_CHARS", 2048))
+# Turn-end checkpoints kept per thread; 0 disables pruning
+checkpoint_keep_last = int(os.environ.get("CHECKPOINT_KEEP_LAST", 10))
+# Drop the intermediate super-steps of completed turns
+checkpoint_drop_intermediate = os.environ.get("CHECKPOINT_DROP_INTERMEDIATE", "1") == "1"
+# Threads without a new checkpoint for this long are deleted; 0 keeps them
+checkpoint_thread_ttl = float(os.environ.get("CHECKPOINT_THREAD_TTL", 30 * 24 * 3600))
+
+_CODEC = "zstd" if ZSTD_AVAILABLE else "zlib"
+_REF_PREFIX = "\x00payload:"
+# Channel langgraph stores pending interrupts under (its constant is private)
+_INTERRUPT_CHANNEL = "__interrupt__"
+
+# Set by a payload-storing saver while it serializes; collects offloaded outputs
+_payload_sink: contextvars.ContextVar[dict[str, str] | None] = contextvars.ContextVar(
+    "checkpoint_payload_sink", default=None
+)
+
+
+def _compress(data: bytes, codec: str = _CODEC, level: int = 3) -> bytes:
+    if codec == "zstd":
+        return zstandard.compress(data, level)
+    return zlib.compress(data, level)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown checkpoint codec: {codec}")
+
+
+def _messages(value: Any) -> list:
+    """Tool messages in a channel value or task write (a message or a list of them)."""
+    if isinstance(value, ToolMessage):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if isinstance(v, ToolMessage)]
+    return []
+
+
+def _payload_ref(message: ToolMessage) -> str | None:
+    content = message.content
+    if isinstance(content, str) and content.startswith(_REF_PREFIX):
+        return content[len(_REF_PREFIX) :]
+    return None
+
+
+class CompactSerializer(JsonPlusSerializer):
+    """
+    `JsonPlusSerializer` (msgpack) with compression for blobs over
+    `compress_bytes`, tagged in the type column (e.g. "msgpack+zstd") so plain
+    blobs written before still load.
+
+    Tool outputs of at least `offload_chars` are only offloaded while a
+    payload-storing saver is serializing; under any other saver they stay inline.
+    """
+
+    def __init__(
+        self,
+        *,
+        offload_chars: int = checkpoint_offload_chars,
+        compress_bytes: int = 256,
+        level: int = 3,
+    ):
+        super().__init__()
+        self.offload_chars = offload_chars
+        self.compress_bytes = compress_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        sink = _payload_sink.get()
+        if sink is not None and self.offload_chars:
+            obj = self._offload(obj, sink)
+        type_, data = super().dumps_typed(obj)
+        if type_ in ("msgpack", "json") and len(data) >= self.compress_bytes:
+            return f"{type_}+{_CODEC}", _compress(data, _CODEC, self.level)
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        base, _, codec = type_.partition("+")
+        if codec:
+            payload = _decompress(codec, payload)
+        return super().loads_typed((base, payload))
+
+    def _offload(self, value: Any, sink: dict[str, str]) -> Any:
+        if isinstance(value, list):
+            return [self._offload(v, sink) for v in value]
+        if (
+            isinstance(value, ToolMessage)
+            and isinstance(value.content, str)
+            and len(value.content) >= self.offload_chars
+        ):
+            digest = hashlib.sha256(value.content.encode()).hexdigest()
+            sink[digest] = value.content
+            return value.model_copy(update={"content": _REF_PREFIX + digest})
+        return value
+
+
+class PayloadStoreMixin(abc.ABC):
+    """
+    Saver mixin that persists the tool outputs `CompactSerializer` offloads while
+    the saver writes, and puts them back into loaded checkpoints. Subclasses
+    implement `_asave_payloads` and `_aload_payloads`; recently used payloads are
+    kept in memory so loading the latest checkpoint rarely needs a query. Payloads
+    are stored per thread, so the cache is keyed by (thread_id, digest) too.
+    """
+
+    payload_cache_entries = 512
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._payloads: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+    def _cache_payloads(self, thread_id: str, payloads: dict[str, str]) -> None:
+        for digest, text in payloads.items():
+            key = (thread_id, digest)
+            self._payloads[key] = text
+            self._payloads.move_to_end(key)
+        while len(self._payloads) > self.payload_cache_entries:
+            self._payloads.popitem(last=False)
+
+    @abc.abstractmethod
+    async def _asave_payloads(self, thread_id: str, payloads: dict[str, str]) -> None:
+        """Stores the thread's new payloads, keyed by digest."""
+
+    @abc.abstractmethod
+    async def _aload_payloads(self, thread_id: str, digests: set[str]) -> dict[str, str]:
+        """The thread's stored payloads for `digests`; unknown digests are left out."""
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        sink: dict[str, str] = {}
+        token = _payload_sink.set(sink)
+        try:
+            next_config = await super().aput(config, checkpoint, metadata, new_versions)
+        finally:
+            _payload_sink.reset(token)
+        await self._flush_payloads(config, sink)
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes,
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        sink: dict[str, str] = {}
+        token = _payload_sink.set(sink)
+        try:
+            await super().aput_writes(config, writes, task_id, task_path)
+        finally:
+            _payload_sink.reset(token)
+        await self._flush_payloads(config, sink)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        checkpoint_tuple = await super().aget_tuple(config)
+        if checkpoint_tuple is not None:
+            await self._resolve_payloads(checkpoint_tuple)
+        return checkpoint_tuple
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for checkpoint_tuple in super().alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            await self._resolve_payloads(checkpoint_tuple)
+            yield checkpoint_tuple
+
+    async def _flush_payloads(self, config: RunnableConfig, payloads: dict[str, str]) -> None:
+        if not payloads:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        new = {
+            digest: text
+            for digest, text in payloads.items()
+            if (thread_id, digest) not in self._payloads
+        }
+        if new:
+            await self._asave_payloads(thread_id, new)
+        self._cache_payloads(thread_id, payloads)
+
+    async def _resolve_payloads(self, checkpoint_tuple: CheckpointTuple) -> None:
+        values = list(checkpoint_tuple.checkpoint["channel_values"].values())
+        values += [write[2] for write in checkpoint_tuple.pending_writes or []]
+        refs = [
+            (msg, digest)
+            for value in values
+            for msg in _messages(value)
+            if (digest := _payload_ref(msg)) is not None
+        ]
+        if not refs:
+            return
+        thread_id = checkpoint_tuple.config["configurable"]["thread_id"]
+        found = {
+            digest: self._payloads[(thread_id, digest)]
+            for _, digest in refs
+            if (thread_id, digest) in self._payloads
+        }
+        missing = {digest for _, digest in refs} - found.keys()
+        if missing:
+            loaded = await self._aload_payloads(thread_id, missing)
+            self._cache_payloads(thread_id, loaded)
+            found.update(loaded)
+        for msg, digest in refs:
+            if digest in found:
+                msg.content = found[digest]
+            else:
+                logger.warning("checkpoint payload %s is missing", digest)
+
+
+@dataclass
+class CheckpointRetention:
+    """How much checkpoint history `CompactPostgresSaver` keeps."""
+
+    keep_last: int = checkpoint_keep_last
+    drop_intermediate: bool = checkpoint_drop_intermediate
+    thread_ttl: float = checkpoint_thread_ttl
+    # How often the runtime looks for abandoned threads, and how many it deletes at once
+    expire_interval: float = 3600.0
+    expire_batch: int = 500
+
+
+CREATE_PAYLOADS_SQL = """
+CREATE TABLE IF NOT EXISTS checkpoint_payloads (
+    thread_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    blob BYTEA NOT NULL,
+    PRIMARY KEY (thread_id, hash)
+);"""
+
+INSERT_PAYLOADS_SQL = """
+    INSERT INTO checkpoint_payloads (thread_id, hash, codec, blob)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (thread_id, hash) DO NOTHING
+"""
+
+SELECT_PAYLOADS_SQL = """
+    SELECT hash, codec, blob FROM checkpoint_payloads
+    WHERE thread_id = %s AND hash = ANY(%s)
+"""
+
+# Marks the latest checkpoint of a thread as the end of a turn, unless the turn
+# is paused on an interrupt (then it is still needed to resume)
+MARK_TURN_END_SQL = """
+    UPDATE checkpoints SET metadata = metadata || '{"turn_end": true}'
+    WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+        AND checkpoint_id = (
+            SELECT max(checkpoint_id) FROM checkpoints
+            WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoint_writes w
+            WHERE w.thread_id = checkpoints.thread_id
+                AND w.checkpoint_ns = checkpoints.checkpoint_ns
+                AND w.checkpoint_id = checkpoints.checkpoint_id
+                AND w.channel = %(interrupt)s
+        )
+    RETURNING checkpoint_id
+"""
+
+# Checkpoints up to the turn end that are not among the last K kept ones
+PRUNE_CHECKPOINTS_SQL = """
+    DELETE FROM checkpoints
+    WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+        AND checkpoint_id <= %(turn_end)s
+        AND checkpoint_id NOT IN (
+            SELECT checkpoint_id FROM checkpoints
+            WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+                AND checkpoint_id <= %(turn_end)s {kept_filter}
+            ORDER BY checkpoint_id DESC
+            LIMIT %(keep_last)s
+        )
+"""
+
+PRUNE_WRITES_SQL = """
+    DELETE FROM checkpoint_writes w
+    WHERE w.thread_id = %(thread_id)s AND w.checkpoint_id <= %(turn_end)s
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = w.thread_id
+                AND c.checkpoint_ns = w.checkpoint_ns
+                AND c.checkpoint_id = w.checkpoint_id
+        )
+"""
+
+# Channel values no remaining checkpoint points at, up to the turn end's versions:
+# a checkpoint written concurrently stores its newer blobs before its row exists
+PRUNE_BLOBS_SQL = """
+    DELETE FROM checkpoint_blobs b
+    USING checkpoints t
+    WHERE t.thread_id = %(thread_id)s AND t.checkpoint_ns = ''
+        AND t.checkpoint_id = %(turn_end)s
+        AND b.thread_id = t.thread_id AND b.checkpoint_ns = ''
+        AND b.version <= t.checkpoint -> 'channel_versions' ->> b.channel
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = b.thread_id
+                AND c.checkpoint_ns = b.checkpoint_ns
+                AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+        )
+"""
+
+_THREAD_TABLES = ("checkpoint_writes", "checkpoint_blobs", "checkpoints", "checkpoint_payloads")
+
+SELECT_EXPIRED_THREADS_SQL = """
+    SELECT thread_id FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint ->> 'ts')::timestamptz) < now() - make_interval(secs => %s)
+    LIMIT %s
+"""
+
+
+class CompactPostgresSaver(PayloadStoreMixin, AsyncPostgresSaver):
+    """
+    `AsyncPostgresSaver` with a `checkpoint_payloads` table for offloaded tool
+    outputs and a retention policy.
+
+    Pruning runs between turns of a thread (`note_turn_complete`); payloads are
+    only deleted with their thread, since a kept message may still point at them.
+    """
+
+    def __init__(self, conn, pipe=None, serde=None, retention: CheckpointRetention | None = None):
+        super().__init__(conn, pipe=pipe, serde=serde)
+        self.retention = retention or CheckpointRetention()
+        self._pruning: dict[str, asyncio.Task] = {}
+
+    async def setup(self) -> None:
+        await super().setup()
+        async with self._cursor() as cur:
+            await cur.execute(CREATE_PAYLOADS_SQL)
+
+    async def _asave_payloads(self, thread_id: str, payloads: dict[str, str]) -> None:
+        rows = await asyncio.to_thread(
+            lambda: [
+                (thread_id, digest, _CODEC, _compress(text.encode()))
+                for digest, text in payloads.items()
+            ]
+        )
+        async with self._cursor(pipeline=True) as cur:
+            await cur.executemany(INSERT_PAYLOADS_SQL, rows)
+
+    async def _aload_payloads(self, thread_id: str, digests: set[str]) -> dict[str, str]:
+        async with self._cursor() as cur:
+            await cur.execute(SELECT_PAYLOADS_SQL, (thread_id, list(digests)))
+            rows = await cur.fetchall()
+        return {
+            row["hash"]: _decompress(row["codec"], row["blob"]).decode() for row in rows
+        }
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await super().adelete_thread(thread_id)
+        async with self._cursor() as cur:
+            await cur.execute(
+                "DELETE FROM checkpoint_payloads WHERE thread_id = %s", (str(thread_id),)
+            )
+
+    def note_turn_complete(self, thread_id: str) -> None:
+        """Prunes the thread in the background (one prune per thread at a time)."""
+        if not self.retention.keep_last or thread_id in self._pruning:
+            return
+        task = asyncio.get_running_loop().create_task(self.aprune_thread(thread_id))
+        self._pruning[thread_id] = task
+        task.add_done_callback(lambda t: self._pruned(thread_id, t))
+
+    def _pruned(self, thread_id: str, task: asyncio.Task) -> None:
+        self._pruning.pop(thread_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "checkpoint pruning failed for %s", thread_id, exc_info=task.exception()
+            )
+
+    async def aprune_thread(self, thread_id: str) -> int:
+        """
+        Marks the thread's latest checkpoint as a turn end and deletes older
+        checkpoints beyond the retention policy, with their writes and unreferenced
+        blobs. Does nothing while the thread is paused on an interrupt. Returns the
+        number of checkpoints deleted.
+
+        Runs in one transaction under the saver's lock, like `aput`; only rows up to
+        the turn end are touched, so a checkpoint being written by another
+        process keeps its blobs and writes.
+        """
+        params = {
+            "thread_id": str(thread_id),
+            "interrupt": _INTERRUPT_CHANNEL,
+            "keep_last": self.retention.keep_last,
+        }
+        async with self._cursor() as cur, cur.connection.transaction():
+            await cur.execute(MARK_TURN_END_SQL, params)
+            row = await cur.fetchone()
+            if row is None or not self.retention.keep_last:
+                return 0
+            params["turn_end"] = row["checkpoint_id"]
+            kept_filter = "AND metadata ? 'turn_end'" if self.retention.drop_intermediate else ""
+            await cur.execute(PRUNE_CHECKPOINTS_SQL.format(kept_filter=kept_filter), params)
+            deleted = cur.rowcount
+            if deleted:
+                await cur.execute(PRUNE_WRITES_SQL, params)
+                await cur.execute(PRUNE_BLOBS_SQL, params)
+        return deleted
+
+    async def aexpire_threads(self) -> int:
+        """Deletes threads with no checkpoint newer than the TTL; returns how many."""
+        if not self.retention.thread_ttl:
+            return 0
+        async with self._cursor() as cur:
+            await cur.execute(
+                SELECT_EXPIRED_THREADS_SQL,
+                (self.retention.thread_ttl, self.retention.expire_batch),
+            )
+            threads = [row["thread_id"] for row in await cur.fetchall()]
+            if threads:
+                for table in _THREAD_TABLES:
+                    await cur.execute(f"DELETE FROM {table} WHERE thread_id = ANY(%s)", (threads,))
+        return len(threads)
+
+    async def run_expiry(self) -> None:
+        """Expires abandoned threads every `expire_interval` seconds, until cancelled."""
+        while True:
+            try:
+                expired = await self.aexpire_threads()
+                if expired:
+                    logger.info("expired %d checkpoint threads", expired)
+            except Exception:
+                logger.warning("checkpoint thread expiry failed", exc_info=True)
+            await asyncio.sleep(self.retention.expire_interval)
+
+
+def checkpoint_serde() -> CompactSerializer | None:
+    """The serializer configured by CHECKPOINT_COMPACT (None means the saver default)."""
+    return CompactSerializer() if checkpoint_compact else None
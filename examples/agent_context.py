@@ -0,0 +1,107 @@
+"""
+Token-budgeted context compaction for the agent.
+
+When the checkpointed conversation grows past the budget, older turns are
+folded into a running summary (kept in graph state) and removed from the
+message history, so each turn's prompt stays bounded and the summary is only
+recomputed when the budget is exceeded again.
+"""
+
+import os
+
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+
+context_token_budget = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 6000))
+# Most recent user turns (with their tool calls and replies) that are never summarized
+context_keep_turns = int(os.environ.get("CONTEXT_KEEP_TURNS", 3))
+
+# Long tool outputs are clipped in the transcript sent to the summarizer
+_TRANSCRIPT_CLIP = 800
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI "
+    "assistant. Extend the existing summary with the new messages. Keep facts the "
+    "assistant may need later (names, places, dates, preferences, decisions, open "
+    "requests) and drop small talk and raw tool output. Reply with the summary only."
+)
+
+
+def estimate_tokens(messages: list[AnyMessage], summary: str = "") -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)."""
+    chars = len(summary)
+    for msg in messages:
+        chars += len(str(msg.content)) + 16
+        for tool_call in getattr(msg, "tool_calls", None) or []:
+            chars += len(str(tool_call.get("args", ""))) + len(tool_call.get("name", ""))
+    return chars // 4
+
+
+def _turn_boundary(messages: list[AnyMessage], keep_turns: int, budget: int) -> int:
+    """
+    Index of the first message to keep. Cuts only at user messages so an AI tool
+    call is never separated from its tool results, keeping up to `keep_turns`
+    turns but fewer if needed to bring the kept part under half the budget (so
+    the next few turns don't immediately trigger another summary).
+    """
+    human_indexes = [i for i, msg in enumerate(messages) if msg.type == "human"]
+    if not human_indexes:
+        return 0
+    candidates = human_indexes[-max(keep_turns, 1) :]
+    for cut in candidates:
+        if estimate_tokens(messages[cut:]) <= budget // 2:
+            return cut
+    return candidates[-1]
+
+
+def _transcript(messages: list[AnyMessage]) -> str:
+    lines = []
+    for msg in messages:
+        content = str(msg.content)
+        if msg.type == "tool":
+            content = content[:_TRANSCRIPT_CLIP]
+            lines.append(f"Tool ({getattr(msg, 'name', '') or 'result'}): {content}")
+        elif msg.type == "human":
+            lines.append(f"User: {content}")
+        elif msg.type == "ai":
+            calls = ", ".join(tc["name"] for tc in getattr(msg, "tool_calls", []) or [])
+            if content:
+                lines.append(f"Assistant: {content}")
+            if calls:
+                lines.append(f"Assistant called tools: {calls}")
+    return "\n".join(lines)
+
+
+async def compact_history(
+    messages: list[AnyMessage],
+    summary: str,
+    model,
+    budget: int | None = None,
+    keep_turns: int | None = None,
+) -> tuple[list[AnyMessage], str, list[RemoveMessage]]:
+    """
+    Returns `(messages_to_send, summary, removals)`. When the history fits the
+    budget nothing changes; otherwise everything before the last `keep_turns`
+    user turns is summarized and returned as `RemoveMessage`s for the state.
+    """
+    budget = context_token_budget if budget is None else budget
+    keep_turns = context_keep_turns if keep_turns is None else keep_turns
+    if estimate_tokens(messages, summary) <= budget:
+        return messages, summary, []
+
+    cut = _turn_boundary(messages, keep_turns, budget)
+    # Leading system messages aren't part of the conversation
+    old = [msg for msg in messages[:cut] if msg.type != "system"]
+    if not old:
+        return messages, summary, []
+
+    request = f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{_transcript(old)}"
+    result = await model.ainvoke(
+        [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=request)]
+    )
+    removals = [RemoveMessage(id=msg.id) for msg in old if msg.id]
+    return messages[cut:], str(result.content), removals
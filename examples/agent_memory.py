@@ -0,0 +1,341 @@
+"""
+Long-term memory access for the agent: cached, bounded retrieval from the store.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+
+from langgraph.store.base import BaseStore, Item, SearchItem
+
+from agent_tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+memory_top_k = int(os.environ.get("MEMORY_TOP_K", 5))
+# Minimum similarity score for a memory to be included (only applies to indexed stores)
+memory_score_cutoff = float(os.environ.get("MEMORY_SCORE_CUTOFF", 0.0))
+# Similarity at or above which two memories are treated as the same fact
+memory_dedup_threshold = float(os.environ.get("MEMORY_DEDUP_THRESHOLD", 0.92))
+memory_max_per_user = int(os.environ.get("MEMORY_MAX_PER_USER", 500))
+# Writes to a namespace between background compactions
+memory_compact_every = int(os.environ.get("MEMORY_COMPACT_EVERY", 50))
+
+
+class MemoryRetriever:
+    """
+    Searches the store for memories relevant to the current user message.
+
+    Results are cached per (thread, namespace, turn, query) so the repeated
+    `call_agent` passes of a tool-heavy turn reuse the first search; concurrent
+    callers share one in-flight search, and any write to a namespace drops its
+    cached results.
+    """
+
+    def __init__(
+        self,
+        top_k: int = memory_top_k,
+        score_cutoff: float = memory_score_cutoff,
+        max_entries: int = 1024,
+    ):
+        self.top_k = top_k
+        self.score_cutoff = score_cutoff
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple, asyncio.Task] = OrderedDict()
+        # Retrieval counts per (namespace, key), folded into the items on compaction
+        self.usage: Counter = Counter()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def search(
+        self,
+        store: BaseStore,
+        namespace: tuple[str, ...],
+        query: str,
+        thread_id: str | None = None,
+        turn_id: str | None = None,
+    ) -> asyncio.Task:
+        """
+        Starts (or reuses) the search and returns a task, so callers can overlap it
+        with other pre-model work and await it when the results are needed.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), thread_id, namespace, turn_id, query)
+        task = self._cache.get(key)
+        if task is not None and not _failed(task):
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return task
+
+        self.stats["misses"] += 1
+        task = loop.create_task(self._search(store, namespace, query))
+        self._cache[key] = task
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return task
+
+    async def put(
+        self, store: BaseStore, namespace: tuple[str, ...], key: str, value: dict
+    ) -> None:
+        """Writes a memory and invalidates cached searches for its namespace."""
+        await store.aput(namespace, key, value)
+        self.invalidate(namespace)
+
+    def invalidate(self, namespace: tuple[str, ...]) -> None:
+        stale = [key for key in self._cache if key[2] == namespace]
+        for key in stale:
+            del self._cache[key]
+        self.stats["invalidations"] += len(stale)
+
+    async def _search(
+        self, store: BaseStore, namespace: tuple[str, ...], query: str
+    ) -> list[SearchItem]:
+        with tracer.span("memory.search") as span:
+            items = await store.asearch(namespace, query=query, limit=self.top_k)
+            span.attributes["results"] = len(items)
+        # Unindexed stores return no score; keep those items as-is
+        items = [
+            item
+            for item in items
+            if item.score is None or item.score >= self.score_cutoff
+        ]
+        for item in items:
+            self.usage[(namespace, item.key)] += 1
+        return items
+
+
+def content_hash(text: str) -> str:
+    """Hash of the memory text, insensitive to case and whitespace."""
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def _is_indexed(store: BaseStore) -> bool:
+    return getattr(store, "index_config", None) is not None
+
+
+async def remember(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    content: str,
+    retriever: MemoryRetriever | None = None,
+) -> str:
+    """
+    Stores a memory unless it is already known, and returns its key.
+
+    Exact repeats map to the same content-hash key; near-duplicates (embedding
+    similarity at or above `memory_dedup_threshold`) update the existing memory
+    instead of adding a new one.
+    """
+    retriever = retriever or memory_retriever
+    now = time.time()
+    key = content_hash(content)
+
+    existing = await store.aget(namespace, key)
+    if existing is None and _is_indexed(store):
+        similar = await store.asearch(namespace, query=content, limit=1)
+        if similar and similar[0].score is not None:
+            if similar[0].score >= memory_dedup_threshold:
+                existing = similar[0]
+
+    if existing is not None:
+        # Keep the newest wording, it may carry a correction
+        value = {
+            **existing.value,
+            "data": content,
+            "hash": key,
+            "mentions": existing.value.get("mentions", 1) + 1,
+            "last_used_at": now,
+        }
+        await retriever.put(store, namespace, existing.key, value)
+        return existing.key
+
+    value = {
+        "data": content,
+        "hash": key,
+        "created_at": now,
+        "last_used_at": now,
+        "mentions": 1,
+    }
+    await retriever.put(store, namespace, key, value)
+    memory_compactor.note_write(store, namespace)
+    return key
+
+
+_pending_writes: set[asyncio.Task] = set()
+
+
+def remember_later(store: BaseStore, namespace: tuple[str, ...], content: str) -> asyncio.Task:
+    """Runs `remember` in the background so the write doesn't add to the turn's latency."""
+    task = asyncio.get_running_loop().create_task(remember(store, namespace, content))
+    # The loop only keeps weak references to tasks
+    _pending_writes.add(task)
+    task.add_done_callback(_remembered)
+    return task
+
+
+def _remembered(task: asyncio.Task) -> None:
+    _pending_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("storing a memory failed", exc_info=task.exception())
+
+
+class MemoryCompactor:
+    """
+    Merges duplicate and near-duplicate memories and enforces a per-user cap,
+    evicting the least used, least recently used memories first.
+
+    `note_write` schedules a compaction in the background every
+    `compact_every` writes to a namespace; `compact` can also be run directly
+    (e.g. from a periodic job).
+    """
+
+    def __init__(
+        self,
+        retriever: MemoryRetriever | None = None,
+        threshold: float = memory_dedup_threshold,
+        max_items: int = memory_max_per_user,
+        compact_every: int = memory_compact_every,
+    ):
+        self.retriever = retriever
+        self.threshold = threshold
+        self.max_items = max_items
+        self.compact_every = compact_every
+        self._writes: Counter = Counter()
+        self._running: dict[tuple, asyncio.Task] = {}
+
+    def note_write(self, store: BaseStore, namespace: tuple[str, ...]) -> None:
+        self._writes[namespace] += 1
+        if self._writes[namespace] < self.compact_every or namespace in self._running:
+            return
+        self._writes[namespace] = 0
+        task = asyncio.get_running_loop().create_task(self.compact(store, namespace))
+        self._running[namespace] = task
+        task.add_done_callback(lambda t: self._finished(namespace, t))
+
+    def _finished(self, namespace: tuple[str, ...], task: asyncio.Task) -> None:
+        self._running.pop(namespace, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "memory compaction failed for %s", namespace, exc_info=task.exception()
+            )
+
+    async def compact(self, store: BaseStore, namespace: tuple[str, ...]) -> dict:
+        """Compacts one namespace and returns a small report."""
+        retriever = self.retriever or memory_retriever
+        items = await _list_namespace(store, namespace)
+        before = len(items)
+        # Newest first, so the survivor of each duplicate group is the latest wording
+        items.sort(key=lambda item: item.updated_at, reverse=True)
+
+        survivors: dict[str, Item] = {}
+        merged_uses: Counter = Counter()
+        removed: set[str] = set()
+
+        # 1. Exact duplicates (including older uuid-keyed memories) by content hash
+        by_hash: dict[str, str] = {}
+        for item in items:
+            digest = item.value.get("hash") or content_hash(str(item.value.get("data", "")))
+            if digest in by_hash:
+                merged_uses[by_hash[digest]] += self._uses(retriever, namespace, item)
+                removed.add(item.key)
+            else:
+                by_hash[digest] = item.key
+                survivors[item.key] = item
+
+        # 2. Near duplicates by embedding similarity. Items already kept are never
+        # removed: an older item close to one merges into it instead.
+        if _is_indexed(store):
+            kept: set[str] = set()
+            for key, item in list(survivors.items()):
+                if key in removed:
+                    continue
+                neighbours = await store.asearch(
+                    namespace, query=str(item.value.get("data", "")), limit=5
+                )
+                similar = [
+                    other.key
+                    for other in neighbours
+                    if other.key != key
+                    and other.key in survivors
+                    and other.key not in removed
+                    and other.score is not None
+                    and other.score >= self.threshold
+                ]
+                into = next((other for other in similar if other in kept), None)
+                if into is not None:
+                    merged_uses[into] += self._uses(retriever, namespace, item)
+                    removed.add(key)
+                    continue
+                kept.add(key)
+                for other in similar:
+                    merged_uses[key] += self._uses(retriever, namespace, survivors[other])
+                    removed.add(other)
+
+        # 3. Per-user cap: evict the least used, then least recently used
+        remaining = [item for key, item in survivors.items() if key not in removed]
+        overflow = len(remaining) - self.max_items
+        if overflow > 0:
+            remaining.sort(
+                key=lambda item: (
+                    self._uses(retriever, namespace, item) + merged_uses[item.key],
+                    item.value.get("last_used_at", item.updated_at.timestamp()),
+                )
+            )
+            for item in remaining[:overflow]:
+                removed.add(item.key)
+            remaining = remaining[overflow:]
+
+        for key in removed:
+            await store.adelete(namespace, key)
+
+        # Fold pending usage counts into the surviving items
+        for item in remaining:
+            pending = retriever.usage.pop((namespace, item.key), 0) + merged_uses[item.key]
+            if pending:
+                await store.aput(
+                    namespace,
+                    item.key,
+                    {
+                        **item.value,
+                        "uses": item.value.get("uses", 0) + pending,
+                        "last_used_at": time.time(),
+                    },
+                )
+        for key in removed:
+            retriever.usage.pop((namespace, key), None)
+        retriever.invalidate(namespace)
+
+        report = {"namespace": namespace, "before": before, "after": len(remaining)}
+        logger.info("memory compaction: %s", report)
+        return report
+
+    @staticmethod
+    def _uses(retriever: MemoryRetriever, namespace: tuple[str, ...], item: Item) -> int:
+        return item.value.get("uses", 0) + retriever.usage[(namespace, item.key)]
+
+
+async def _list_namespace(
+    store: BaseStore, namespace: tuple[str, ...], page_size: int = 500
+) -> list[Item]:
+    items: list[Item] = []
+    while True:
+        page = await store.asearch(namespace, limit=page_size, offset=len(items))
+        items.extend(page)
+        if len(page) < page_size:
+            return items
+
+
+def _failed(task: asyncio.Task) -> bool:
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+def format_memories(items: list[SearchItem]) -> str:
+    return "\n".join(f"- {item.value['data']}" for item in items)
+
+
+# Shared by every graph in the process
+memory_retriever = MemoryRetriever()
+memory_compactor = MemoryCompactor(memory_retriever)
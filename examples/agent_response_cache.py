@@ -0,0 +1,181 @@
+"""
+Response cache for the model's answer over weather tool results.
+
+When a turn's tool round was only read-only weather lookups, the answer is
+keyed on the normalized intent (tool name and arguments) and a hash of the tool
+results, so it is reused only while the forecast it was written from is
+unchanged. Within one such key, paraphrased questions match by embedding
+similarity, so "will it rain in London tomorrow?" doesn't get the answer to
+"what's the weather in London tomorrow?" unless they are close enough.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from langchain_core.messages import AnyMessage
+
+from agent_tool_cache import canonical_args
+
+# Tools whose results fully determine the answer (read-only, no side effects)
+response_cache_tools = tuple(
+    name.strip()
+    for name in os.environ.get(
+        "RESPONSE_CACHE_TOOLS", "get_weather_data,find_activity_window"
+    ).split(",")
+    if name.strip()
+)
+# Cosine similarity at or above which two questions count as paraphrases
+response_cache_threshold = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", 0.85))
+response_cache_ttl = float(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+# Share answers across users; off by default since memories can personalize them
+response_cache_shared = os.environ.get("RESPONSE_CACHE_SHARED", "0") == "1"
+
+_EMBEDDING_DIMS = 512
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """
+    Local, dependency-free embedding: hashed word unigrams and bigrams plus
+    character trigrams, L2-normalized. Good enough to match reworded questions.
+    """
+    words = _WORD.findall(text.casefold())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    joined = " ".join(words)
+    features += [joined[i : i + 3] for i in range(len(joined) - 2)]
+    vector = np.zeros(_EMBEDDING_DIMS, dtype=np.float32)
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        vector[int.from_bytes(digest, "little") % _EMBEDDING_DIMS] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CacheLookup:
+    key: tuple
+    # Normalized (case-folded, punctuation dropped), so trivial variants match exactly
+    question: str
+    vector: np.ndarray
+    answer: str | None = None
+    similarity: float = 0.0
+
+
+class ResponseCache:
+    """
+    Maps (scope, intent, data hash) to the answers given for it, each with the
+    embedding of its question. `lookup` returns None when the turn isn't
+    cacheable; otherwise a `CacheLookup` whose `answer` is set on a hit and which
+    `store` accepts after a miss.
+    """
+
+    def __init__(
+        self,
+        tools: tuple[str, ...] = response_cache_tools,
+        threshold: float = response_cache_threshold,
+        ttl: float = response_cache_ttl,
+        shared: bool = response_cache_shared,
+        max_entries: int = 2048,
+        embed: Callable[[str], np.ndarray] = hashed_embedding,
+    ):
+        self.tools = set(tools)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.shared = shared
+        self.max_entries = max_entries
+        self.embed = embed
+        self._entries: OrderedDict[tuple, list[tuple[np.ndarray, str, str, float]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "paraphrase_hits": 0, "misses": 0, "stores": 0}
+
+    def lookup(
+        self, user_id: str | None, messages: list[AnyMessage], question: str
+    ) -> CacheLookup | None:
+        key = self._key(user_id, messages)
+        if key is None:
+            return None
+        question = " ".join(_WORD.findall(question.casefold()))
+        vector = self.embed(question)
+        now = time.time()
+        with self._lock:
+            candidates = [
+                entry for entry in self._entries.get(key, []) if entry[3] > now
+            ]
+            best, best_score = None, -1.0
+            for entry_vector, entry_question, answer, _ in candidates:
+                score = 1.0 if entry_question == question else float(vector @ entry_vector)
+                if score > best_score:
+                    best, best_score = answer, score
+            if best is not None and best_score >= self.threshold:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits" if best_score >= 1.0 else "paraphrase_hits"] += 1
+                return CacheLookup(key, question, vector, best, best_score)
+            self.stats["misses"] += 1
+        return CacheLookup(key, question, vector)
+
+    def store(self, lookup: CacheLookup, answer: str) -> None:
+        if not answer:
+            return
+        with self._lock:
+            entries = [
+                entry for entry in self._entries.get(lookup.key, []) if entry[3] > time.time()
+            ]
+            entries.append((lookup.vector, lookup.question, answer, time.time() + self.ttl))
+            self._entries[lookup.key] = entries[-16:]
+            self._entries.move_to_end(lookup.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stores"] += 1
+
+    def hit_rate(self) -> float:
+        hits = self.stats["exact_hits"] + self.stats["paraphrase_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def _key(self, user_id: str | None, messages: list[AnyMessage]) -> tuple | None:
+        """
+        (scope, intent, data hash) when the conversation ends in exactly one round
+        of successful, cacheable tool calls answering the latest user message.
+        """
+        tail: list[AnyMessage] = []
+        for msg in reversed(messages):
+            if msg.type != "tool":
+                break
+            tail.append(msg)
+        request = messages[-len(tail) - 1] if tail and len(messages) > len(tail) else None
+        if request is None or request.type != "ai" or not request.tool_calls:
+            return None
+        # Only the first tool round of a turn; later rounds depend on earlier ones
+        if len(messages) < len(tail) + 2 or messages[-len(tail) - 2].type != "human":
+            return None
+        calls = request.tool_calls
+        if len(tail) != len(calls) or any(call["name"] not in self.tools for call in calls):
+            return None
+        if any(getattr(msg, "status", "success") == "error" for msg in tail):
+            return None
+
+        results = {msg.tool_call_id: str(msg.content) for msg in tail}
+        # Sorted, so the same lookups issued in a different order share a key
+        parts = sorted(
+            (
+                f"{call['name']}:{canonical_args(call['args']).casefold()}",
+                results.get(call["id"], ""),
+            )
+            for call in calls
+        )
+        intent = "|".join(part for part, _ in parts)
+        data = hashlib.sha256("\x1e".join(result for _, result in parts).encode()).hexdigest()
+        return (None if self.shared else user_id, intent, data)
+
+
+# Shared by every graph in the process
+response_cache = ResponseCache()
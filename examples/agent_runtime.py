@@ -0,0 +1,135 @@
+"""
+Long-lived runtime for the agent: one background event loop, one shared
+Postgres connection pool for the store and checkpointer, and one compiled
+graph reused across turns and users. Checkpoint history is pruned after each
+completed turn and abandoned threads expire (see `agent_checkpoints`).
+"""
+
+import asyncio
+import logging
+import queue
+import sys
+import threading
+from typing import Any, Iterator
+
+from langgraph.store.postgres import AsyncPostgresStore
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from agent_checkpoints import CompactPostgresSaver, checkpoint_serde
+from agent_tracing import instrument_http_transport, metrics_port, trace_http, tracer
+from agent_with_memory import build_graph
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a streamed run on the hand-off queue
+_DONE = object()
+
+
+class _StreamError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class AgentRuntime:
+    """
+    Owns an event loop running on a daemon thread. Callers on other threads (such
+    as Streamlit script runs) submit coroutines to it instead of calling
+    `asyncio.run`, so the connection pool and graph survive between turns.
+    """
+
+    def __init__(self, database_url: str, min_pool_size: int = 1, max_pool_size: int = 10):
+        self.database_url = database_url
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        # psycopg's async driver needs a selector loop on Windows
+        if sys.platform == "win32":
+            self.loop = asyncio.SelectorEventLoop()
+        else:
+            self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="agent-runtime", daemon=True
+        )
+        self._thread.start()
+        self.run(self._setup())
+        # Time the service clients' HTTP calls and expose metrics if configured
+        if trace_http and not instrument_http_transport():
+            logger.warning("TRACE_HTTP is set but src.services is not importable; skipped")
+        if metrics_port:
+            tracer.serve(metrics_port)
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _setup(self) -> None:
+        # Same connection settings the saver/store use in `from_conn_string`
+        self.pool = AsyncConnectionPool(
+            conninfo=self.database_url,
+            min_size=self.min_pool_size,
+            max_size=self.max_pool_size,
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        await self.pool.open()
+        self.store = AsyncPostgresStore(self.pool)
+        self.checkpointer = CompactPostgresSaver(self.pool, serde=checkpoint_serde())
+        self.graph = build_graph(self.checkpointer, self.store)
+        self._expiry = asyncio.create_task(self.checkpointer.run_expiry())
+
+    def run(self, coro, timeout: float | None = None) -> Any:
+        """Runs a coroutine on the runtime loop and blocks the calling thread for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stream(
+        self, inputs: Any, config: dict, stream_mode: Any = "custom"
+    ) -> Iterator[Any]:
+        """
+        Streams a graph run on the runtime loop, yielding chunks on the calling thread
+        as they arrive.
+        """
+        chunks: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                # Root span for the turn; node, tool, model and checkpoint spans nest under it
+                with tracer.span("turn"):
+                    async for chunk in self.graph.astream(
+                        inputs, config=config, stream_mode=stream_mode
+                    ):
+                        chunks.put(chunk)
+                # Drop the turn's intermediate checkpoints (skipped if it paused on an interrupt)
+                self.checkpointer.note_turn_complete(config["configurable"]["thread_id"])
+            except BaseException as e:
+                chunks.put(_StreamError(e))
+            finally:
+                chunks.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _DONE:
+                    break
+                if isinstance(chunk, _StreamError):
+                    raise chunk.error
+                yield chunk
+        finally:
+            # Stop the run if the consumer goes away early
+            if not future.done():
+                future.cancel()
+
+    def setup_database(self) -> None:
+        """Creates the checkpointer and store tables (run once per database)."""
+
+        async def setup():
+            await self.checkpointer.setup()
+            await self.store.setup()
+
+        self.run(setup())
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self._expiry.cancel)
+        self.run(self.pool.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,128 @@
+# File: src/services/calendar_index.py
+# Description: A local index of busy calendar intervals answering free/busy queries in O(log n).
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+def event_interval(event: dict, default_timezone: str | None = None) -> tuple[float, float] | None:
+    """
+    Returns the (start, end) UTC timestamps an event blocks, or None when it doesn't
+    block time (cancelled, marked "free", or missing times). All-day events and
+    times without an offset are read in the event's own time zone, else in
+    `default_timezone` (the calendar's), else UTC.
+    """
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return None
+    start, end = event.get("start", {}), event.get("end", {})
+    try:
+        return _timestamp(start, default_timezone), _timestamp(end, default_timezone)
+    except (KeyError, ValueError):
+        return None
+
+
+def _timestamp(value: dict, default_timezone: str | None) -> float:
+    if "dateTime" in value:
+        parsed = datetime.fromisoformat(value["dateTime"])
+    else:
+        # All-day events only carry a date: midnight where the calendar is.
+        parsed = datetime.fromisoformat(value["date"])
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=_zone(value.get("timeZone") or default_timezone))
+    return parsed.timestamp()
+
+
+def _zone(name: str | None) -> tzinfo:
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+
+class BusyIntervalIndex:
+    """
+    Mirrors a user's busy events and keeps their union as sorted, non-overlapping
+    intervals, so "is this slot free?" is a binary search and "free windows in a
+    range" is a binary search plus a walk over the gaps in that range.
+
+    `timezone` is the calendar's IANA time zone, which all-day events are read in.
+    """
+
+    def __init__(self, timezone: str | None = None):
+        self.timezone = timezone
+        self._events: dict[str, tuple[float, float]] = {}
+        self._starts: list[float] = []
+        self._ends: list[float] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def upsert(self, event: dict) -> None:
+        """Applies one event from a full or incremental sync (cancelled events are removed)."""
+        interval = event_interval(event, self.timezone)
+        with self._lock:
+            if interval is None:
+                self._dirty |= self._events.pop(event["id"], None) is not None
+            else:
+                self._events[event["id"]] = interval
+                self._dirty = True
+
+    def remove(self, event_id: str) -> None:
+        with self._lock:
+            self._dirty |= self._events.pop(event_id, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self._dirty = True
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        lo, hi = start.timestamp(), end.timestamp()
+        with self._lock:
+            self._rebuild()
+            # The last interval starting before `hi` is the only one that can overlap.
+            i = bisect_left(self._starts, hi) - 1
+            return i < 0 or self._ends[i] <= lo
+
+    def free_windows(
+        self, start: datetime, end: datetime, min_duration: timedelta = timedelta(0)
+    ) -> list[tuple[datetime, datetime]]:
+        """Returns the free gaps in [start, end) that are at least `min_duration` long."""
+        lo, hi = start.timestamp(), end.timestamp()
+        tz = start.tzinfo or timezone.utc
+        windows = []
+        with self._lock:
+            self._rebuild()
+            i = bisect_right(self._ends, lo)
+            cursor = lo
+            while cursor < hi:
+                gap_end = min(self._starts[i], hi) if i < len(self._starts) else hi
+                if gap_end - cursor >= min_duration.total_seconds() and gap_end > cursor:
+                    windows.append(
+                        (datetime.fromtimestamp(cursor, tz), datetime.fromtimestamp(gap_end, tz))
+                    )
+                if i >= len(self._starts):
+                    break
+                cursor = max(cursor, self._ends[i])
+                i += 1
+        return windows
+
+    def _rebuild(self) -> None:
+        # Called with the lock held; merging is O(n log n) but only after changes.
+        if not self._dirty:
+            return
+        starts, ends = [], []
+        for lo, hi in sorted(self._events.values()):
+            if starts and lo <= ends[-1]:
+                ends[-1] = max(ends[-1], hi)
+            else:
+                starts.append(lo)
+                ends.append(hi)
+        self._starts, self._ends = starts, ends
+        self._dirty = False
@@ -0,0 +1,227 @@
+# File: src/services/forecast_cache.py
+# Description: A grid-quantized forecast cache that expires on the provider's update cadence and
+#              coalesces concurrent fetches for the same key into a single upstream call.
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+ForecastKey = tuple[float, float, tuple[str, ...], str, tuple]
+
+
+class _Flight:
+    """An in-progress synchronous fetch that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: dict | None = None
+        self.error: BaseException | None = None
+
+
+class _LeaderCancelled(Exception):
+    """Tells async waiters that the fetch they were sharing was cancelled."""
+
+
+class ForecastCache:
+    """
+    Caches forecast payloads keyed on coordinates snapped to the model grid, the
+    requested variable set and the timezone.
+
+    Entries expire at the next provider update boundary (plus a publish delay)
+    rather than after a fixed TTL, so a cached payload is never served past the
+    point where the upstream would return newer data. Expired payloads are kept
+    for up to `max_stale` seconds, for `get_stale` to fall back on while the
+    upstream is failing.
+    """
+
+    def __init__(
+        self,
+        grid_degrees: float = 0.1,
+        update_interval: float = 3600,
+        publish_delay: float = 300,
+        max_entries: int = 512,
+        max_stale: float = 6 * 3600,
+    ):
+        # 0.1 degrees (~11 km) matches the coarsest grid Open-Meteo's best-match
+        # models serve, so two points in the same cell get identical data.
+        self.grid_degrees = grid_degrees
+        self.update_interval = update_interval
+        self.publish_delay = publish_delay
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._entries: OrderedDict[Hashable, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stale: OrderedDict[Hashable, tuple[dict, float]] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._async_flights: dict[tuple[int, Hashable], asyncio.Future] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stale_served": 0,
+        }
+
+    def snap(self, value: float) -> float:
+        return round(round(value / self.grid_degrees) * self.grid_degrees, 6)
+
+    def make_key(
+        self,
+        latitude: float,
+        longitude: float,
+        variables,
+        timezone: str,
+        window: tuple = (),
+    ) -> ForecastKey:
+        # `window` distinguishes trimmed requests (dates, horizon, resolution).
+        return (
+            self.snap(latitude),
+            self.snap(longitude),
+            tuple(sorted(variables)),
+            timezone,
+            window,
+        )
+
+    def expires_at(self, now: float) -> float:
+        """Returns the next update boundary after `now`."""
+        shifted = now - self.publish_delay
+        return (math.floor(shifted / self.update_interval) + 1) * self.update_interval + (
+            self.publish_delay
+        )
+
+    def get(self, key: Hashable) -> dict | None:
+        with self._lock:
+            return self._lookup(key, time.time())
+
+    def get_stale(self, key: Hashable) -> dict | None:
+        """
+        Returns the last payload cached for `key` even if it has expired, as long as
+        it expired less than `max_stale` seconds ago. Meant for when a fresh fetch failed.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key) or self._stale.get(key)
+            if entry is None or now - entry[1] > self.max_stale:
+                return None
+            self.stats["stale_served"] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: dict) -> None:
+        with self._lock:
+            self._store(key, value, time.time())
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], dict]) -> dict:
+        """
+        Returns the cached payload for `key`, or calls `fetch` exactly once even if
+        several threads ask for the same key concurrently.
+        """
+        with self._lock:
+            cached = self._lookup(key, time.time())
+            if cached is not None:
+                return cached
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            self.put(key, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Async variant of `get_or_fetch`; concurrent awaiters share one upstream call."""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        while True:
+            with self._lock:
+                cached = self._lookup(key, time.time())
+                if cached is not None:
+                    return cached
+                future = self._async_flights.get(flight_key)
+                leader = future is None
+                if leader:
+                    future = self._async_flights[flight_key] = loop.create_future()
+                else:
+                    self.stats["coalesced"] += 1
+
+            if leader:
+                return await self._alead(key, flight_key, future, fetch)
+            try:
+                # Shield so one cancelled waiter doesn't cancel the shared fetch.
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # The leader was cancelled, not us: start over, one waiter takes the lead
+                continue
+
+    async def _alead(
+        self,
+        key: Hashable,
+        flight_key: tuple,
+        future: asyncio.Future,
+        fetch: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        try:
+            result = await fetch()
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting.
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_flights.pop(flight_key, None)
+
+    def _lookup(self, key: Hashable, now: float) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            if self.max_stale > 0:
+                self._stale[key] = entry
+                self._stale.move_to_end(key)
+                while len(self._stale) > self.max_entries:
+                    self._stale.popitem(last=False)
+        self.stats["misses"] += 1
+        return None
+
+    def _store(self, key: Hashable, value: dict, now: float) -> None:
+        self._entries[key] = (value, self.expires_at(now))
+        self._stale.pop(key, None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
@@ -0,0 +1,187 @@
+# File: src/services/forecast_columns.py
+# Description: A compact columnar view of an Open-Meteo hourly payload, with a vectorized
+#              sliding-window search for activity windows.
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from src.models import ActivityWindow
+
+
+@dataclass
+class WindowConstraints:
+    """Hard limits every hour of a window must satisfy, plus the preferred temperature."""
+
+    min_apparent_temperature: float = 5.0
+    max_apparent_temperature: float = 30.0
+    ideal_apparent_temperature: float = 20.0
+    max_precipitation_probability: float = 30.0
+    max_windspeed: float = 30.0
+    max_uv_index: float = 8.0
+    max_relative_humidity: float = 90.0
+
+
+@dataclass
+class WindowCandidate:
+    """A ranked window, kept as indices into the columns until it is shown to the user."""
+
+    forecast: "ColumnarForecast"
+    start: int
+    # Length in time steps of the forecast (hours for hourly data)
+    steps: int
+    score: float
+
+    def to_activity_window(self) -> ActivityWindow:
+        f = self.forecast
+        window = slice(self.start, self.start + self.steps)
+        parts = []
+        # Only the variables the forecast was requested with are described.
+        if "apparent_temperature" in f.columns:
+            temp = np.nanmean(f.columns["apparent_temperature"][window])
+            parts.append(f"Feels like {temp:.1f}°C on average")
+        if "precipitation_probability" in f.columns:
+            rain = np.nanmax(f.columns["precipitation_probability"][window])
+            parts.append(f"rain chance up to {rain:.0f}%")
+        if "windspeed_10m" in f.columns:
+            parts.append(f"wind up to {np.nanmax(f.columns['windspeed_10m'][window]):.0f} km/h")
+        if "uv_index" in f.columns:
+            parts.append(f"UV up to {np.nanmax(f.columns['uv_index'][window]):.0f}")
+        return ActivityWindow(
+            start_time=f.timestamp(self.start),
+            end_time=f.timestamp(self.start + self.steps),
+            summary=", ".join(parts) + "." if parts else "",
+        )
+
+
+class ColumnarForecast:
+    """
+    Holds the hourly forecast as one float32 array per variable plus a
+    datetime64 time axis, instead of one model object per hour. The time step is
+    read from the time axis, so aggregated (e.g. 3-hourly) payloads work too.
+    """
+
+    def __init__(self, times: np.ndarray, columns: dict[str, np.ndarray], timezone: str):
+        self.times = times
+        self.columns = columns
+        self.timezone = timezone
+        self.step = (
+            times[1] - times[0] if len(times) > 1 else np.timedelta64(60, "m")
+        ).astype("timedelta64[m]")
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ColumnarForecast":
+        hourly = payload["hourly"]
+        times = np.array(hourly["time"], dtype="datetime64[m]")
+        columns = {
+            # `None` entries (missing model data) become NaN.
+            name: np.array(values, dtype=np.float32)
+            for name, values in hourly.items()
+            if name != "time"
+        }
+        return cls(times, columns, payload.get("timezone", "UTC"))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def timestamp(self, index: int) -> datetime:
+        if index < len(self.times):
+            value = self.times[index]
+        else:
+            # The end of the last window is one step past the final sample.
+            value = self.times[-1] + (index - len(self.times) + 1) * self.step
+        naive = value.astype("datetime64[m]").astype(datetime)
+        try:
+            return naive.replace(tzinfo=ZoneInfo(self.timezone))
+        except (KeyError, ValueError):
+            return naive
+
+    def find_activity_windows(
+        self,
+        duration_hours: int,
+        constraints: WindowConstraints | None = None,
+        top_k: int = 3,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        allow_overlap: bool = False,
+    ) -> list[WindowCandidate]:
+        """
+        Scores every `duration_hours` window in one vectorized pass and returns the
+        best `top_k` candidates that satisfy `constraints` in every time step.
+        Variables missing from the payload neither constrain nor score a window.
+        """
+        constraints = constraints or WindowConstraints()
+        step_minutes = max(int(self.step / np.timedelta64(1, "m")), 1)
+        steps = math.ceil(duration_hours * 60 / step_minutes)
+        n = len(self.times) - steps + 1
+        if duration_hours <= 0 or n <= 0:
+            return []
+
+        neutral = np.zeros(len(self.times), dtype=np.float32)
+        temp = self.columns.get("apparent_temperature")
+        precip = self.columns.get("precipitation_probability", neutral)
+        wind = self.columns.get("windspeed_10m", neutral)
+        uv = self.columns.get("uv_index", neutral)
+        humidity = self.columns.get("relativehumidity_2m", neutral)
+
+        # NaN comparisons are False, so hours with missing data are never feasible.
+        feasible = (
+            (precip <= constraints.max_precipitation_probability)
+            & (wind <= constraints.max_windspeed)
+            & (uv <= constraints.max_uv_index)
+            & (humidity <= constraints.max_relative_humidity)
+        )
+        temp_penalty = neutral
+        if temp is not None:
+            feasible &= (temp >= constraints.min_apparent_temperature) & (
+                temp <= constraints.max_apparent_temperature
+            )
+            temp_penalty = np.clip(
+                np.abs(temp - constraints.ideal_apparent_temperature) / 10.0, 0, 1
+            )
+        if start is not None or end is not None:
+            feasible &= self._time_mask(start, end)
+
+        # Per-step comfort in [0, 1]; higher is better.
+        comfort = 1.0 - (
+            0.4 * temp_penalty
+            + 0.3 * np.clip(precip / 100.0, 0, 1)
+            + 0.2 * np.clip(wind / max(constraints.max_windspeed, 1e-6), 0, 1)
+            + 0.1 * np.clip(uv / max(constraints.max_uv_index, 1e-6), 0, 1)
+        )
+        comfort = np.where(feasible, comfort, 0.0)
+
+        # Window sums via prefix sums: O(len(times)) regardless of the window length.
+        bad = np.concatenate(([0], np.cumsum(~feasible)))
+        total = np.concatenate(([0.0], np.cumsum(comfort, dtype=np.float64)))
+        bad_in_window = bad[steps:] - bad[:n]
+        scores = (total[steps:] - total[:n]) / steps
+        scores[bad_in_window > 0] = -np.inf
+
+        order = np.argsort(-scores, kind="stable")
+        order = order[np.isfinite(scores[order])]
+        picked: list[int] = []
+        taken = np.zeros(len(self.times), dtype=bool)
+        for index in order:
+            if len(picked) == top_k:
+                break
+            if not allow_overlap and taken[index : index + steps].any():
+                continue
+            picked.append(int(index))
+            taken[index : index + steps] = True
+
+        return [
+            WindowCandidate(self, index, steps, float(scores[index]))
+            for index in picked
+        ]
+
+    def _time_mask(self, start: datetime | None, end: datetime | None) -> np.ndarray:
+        mask = np.ones(len(self.times), dtype=bool)
+        if start is not None:
+            mask &= self.times >= np.datetime64(start.replace(tzinfo=None), "m")
+        if end is not None:
+            mask &= self.times < np.datetime64(end.replace(tzinfo=None), "m")
+        return mask
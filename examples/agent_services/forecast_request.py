@@ -0,0 +1,215 @@
+# File: src/services/forecast_request.py
+# Description: Shapes Open-Meteo requests to the variables and horizon the current intent needs,
+#              and renders the result as a compact table for the prompt.
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+ALL_VARIABLES = (
+    "apparent_temperature",
+    "relativehumidity_2m",
+    "precipitation_probability",
+    "windspeed_10m",
+    "uv_index",
+)
+
+# Open-Meteo serves at most 16 forecast days; longer ranges are rejected with a 400.
+MAX_FORECAST_DAYS = 16
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WEEKDAY = re.compile(rf"\b(next\s+)?({'|'.join(_WEEKDAYS)})\b")
+
+SUPPORTED_RANGES = (
+    '"now", "tonight", "today", "tomorrow", a weekday, "this weekend", "this week", '
+    f'"next week", "next 3 days" or "next 2 weeks" (up to {MAX_FORECAST_DAYS} days)'
+)
+
+# Short column headers keep the prompt table narrow.
+_COLUMN_LABELS = {
+    "apparent_temperature": "feels°C",
+    "relativehumidity_2m": "rh%",
+    "precipitation_probability": "rain%",
+    "windspeed_10m": "windkm/h",
+    "uv_index": "uv",
+}
+
+# Activities mapped to the variables that actually matter for them.
+_ACTIVITY_VARIABLES = {
+    "walk": ("apparent_temperature", "precipitation_probability", "windspeed_10m"),
+    "bike": ("apparent_temperature", "precipitation_probability", "windspeed_10m"),
+    "cycl": ("apparent_temperature", "precipitation_probability", "windspeed_10m"),
+    "run": (
+        "apparent_temperature",
+        "relativehumidity_2m",
+        "precipitation_probability",
+        "windspeed_10m",
+    ),
+    "hik": ALL_VARIABLES,
+    "beach": ("apparent_temperature", "precipitation_probability", "uv_index"),
+    "picnic": ("apparent_temperature", "precipitation_probability", "windspeed_10m", "uv_index"),
+}
+
+
+@dataclass(frozen=True)
+class ForecastRequest:
+    """The exact slice of forecast data one turn needs."""
+
+    variables: tuple[str, ...] = ALL_VARIABLES
+    start_date: date | None = None
+    end_date: date | None = None
+    forecast_hours: int | None = None
+    # Only rows within [start_hour, end_hour) of each day are kept in the summary.
+    start_hour: int = 0
+    end_hour: int = 24
+    # Open-Meteo `temporal_resolution`: native hourly data, or aggregated 3-hourly steps.
+    resolution: str = "hourly_1"
+
+    def to_params(self) -> dict[str, str | int]:
+        params: dict[str, str | int] = {"hourly": ",".join(self.variables)}
+        if self.forecast_hours is not None:
+            params["forecast_hours"] = self.forecast_hours
+        if self.start_date is not None:
+            params["start_date"] = self.start_date.isoformat()
+            params["end_date"] = (self.end_date or self.start_date).isoformat()
+        if self.resolution != "hourly_1":
+            params["temporal_resolution"] = self.resolution
+        return params
+
+    def cache_window(self) -> tuple:
+        return (self.start_date, self.end_date, self.forecast_hours, self.resolution)
+
+
+def local_now(timezone: str | None = None, now: datetime | None = None) -> datetime:
+    """
+    The wall-clock time at `timezone` (an IANA name such as "Asia/Shanghai"), as a
+    naive datetime. A naive `now` is taken as server-local time; without a usable
+    timezone ("auto" or unknown) it is returned unchanged.
+    """
+    now = now or datetime.now()
+    if not timezone or timezone == "auto":
+        return now
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return now
+    return now.astimezone(zone).replace(tzinfo=None)
+
+
+def shape_forecast_request(
+    time_range: str,
+    activity: str | None = None,
+    now: datetime | None = None,
+    timezone: str | None = None,
+) -> ForecastRequest:
+    """
+    Derives the variables, horizon and resolution for a natural-language time range
+    such as "tonight", "tomorrow", "this weekend" or "next 3 days". Dates and hours
+    are those of the location's `timezone`. Raises `ValueError` for a range it
+    doesn't understand rather than guessing one.
+    """
+    now = local_now(timezone, now)
+    today = now.date()
+    text = time_range.lower().strip()
+    variables = _variables_for(activity)
+
+    if text in ("now", "right now", "next few hours", "soon"):
+        return ForecastRequest(variables=variables, forecast_hours=6)
+    if "tonight" in text or "this evening" in text:
+        # UV is irrelevant after dark; only the evening hours are needed.
+        return ForecastRequest(
+            variables=tuple(v for v in variables if v != "uv_index") or variables,
+            start_date=today,
+            end_date=today,
+            start_hour=max(now.hour, 18),
+            end_hour=24,
+        )
+    if "today" in text:
+        return ForecastRequest(
+            variables=variables, start_date=today, end_date=today, start_hour=now.hour
+        )
+    if "tomorrow" in text:
+        day = today + timedelta(days=1)
+        return ForecastRequest(
+            variables=variables, start_date=day, end_date=day, start_hour=6, end_hour=24
+        )
+    if "weekend" in text:
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if today.weekday() == 6:
+            saturday = today - timedelta(days=1)
+        return ForecastRequest(
+            variables=variables,
+            start_date=max(saturday, today),
+            end_date=saturday + timedelta(days=1),
+            start_hour=6,
+            end_hour=22,
+        )
+    weekday = _WEEKDAY.search(text)
+    if weekday:
+        offset = (_WEEKDAYS.index(weekday.group(2)) - today.weekday()) % 7
+        if weekday.group(1) and offset == 0:
+            offset = 7
+        day = today + timedelta(days=offset)
+        return ForecastRequest(
+            variables=variables,
+            start_date=day,
+            end_date=day,
+            start_hour=now.hour if day == today else 6,
+            end_hour=24,
+        )
+    start = today
+    if match := re.search(r"(\d+)\s*days?\b", text):
+        days = int(match.group(1))
+    elif match := re.search(r"(\d+)\s*weeks?\b", text):
+        days = int(match.group(1)) * 7
+    elif "next week" in text:
+        start = today + timedelta(days=7 - today.weekday())
+        days = 7
+    elif "week" in text:
+        days = 7
+    else:
+        raise ValueError(f"Unsupported time range '{time_range}'. Use {SUPPORTED_RANGES}.")
+    # Clamp to what the API serves, counted from today
+    horizon = today + timedelta(days=MAX_FORECAST_DAYS - 1)
+    end = min(start + timedelta(days=max(days, 1) - 1), horizon)
+    days = (end - start).days + 1
+    return ForecastRequest(
+        variables=variables,
+        start_date=start,
+        end_date=end,
+        # Multi-day overviews don't need every hour.
+        resolution="hourly_3" if days > 3 else "hourly_1",
+    )
+
+
+def summarize_for_prompt(payload: dict, request: ForecastRequest) -> str:
+    """
+    Renders the requested slice of a forecast payload as a compact pipe-separated
+    table, one row per time step, instead of the raw JSON.
+    """
+    hourly = payload.get("hourly", {})
+    variables = [v for v in request.variables if v in hourly]
+    header = "time|" + "|".join(_COLUMN_LABELS.get(v, v) for v in variables)
+    rows = [header]
+    for i, stamp in enumerate(hourly.get("time", [])):
+        hour = int(stamp[11:13]) if len(stamp) >= 13 else 0
+        if not request.start_hour <= hour < request.end_hour:
+            continue
+        values = []
+        for v in variables:
+            value = hourly[v][i]
+            values.append("-" if value is None else f"{value:.0f}")
+        # "MM-DD HH" is enough context for the model and saves tokens.
+        rows.append(f"{stamp[5:10]} {stamp[11:13]}|" + "|".join(values))
+    return "\n".join(rows)
+
+
+def _variables_for(activity: str | None) -> tuple[str, ...]:
+    if not activity:
+        return ALL_VARIABLES
+    activity = activity.lower()
+    for stem, variables in _ACTIVITY_VARIABLES.items():
+        if stem in activity:
+            return variables
+    return ALL_VARIABLES
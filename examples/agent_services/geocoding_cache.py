@@ -0,0 +1,189 @@
+# File: src/services/geocoding_cache.py
+# Description: A two-tier (in-process LRU + SQLite) cache for geocoding results, with negative caching.
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+class GeocodingCache:
+    """
+    Caches geocoding results keyed on a normalized city name and language.
+
+    Lookups hit an in-process LRU first and fall back to an optional on-disk
+    SQLite store shared across processes. Unknown names are cached as negative
+    results with a shorter TTL, so repeated typos don't cost a round trip each.
+
+    Disk hits only note their access time in memory; the times are written in
+    batches (with the next `put`, every `touch_batch` hits, or on `close`). The
+    async methods run the SQLite work in a thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        ttl: float = 30 * 24 * 3600,
+        negative_ttl: float = 3600,
+        touch_batch: int = 64,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.touch_batch = touch_batch
+        # key -> last access time of disk hits not yet written back
+        self._touched: dict[str, float] = {}
+        self._memory: OrderedDict[str, tuple[dict | None, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)"
+            )
+            self._db.commit()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def normalize_key(name: str, language: str = "en") -> str:
+        """Case-folds, strips diacritics and collapses whitespace so 'São  Paulo' == 'sao paulo'."""
+        decomposed = unicodedata.normalize("NFKD", name)
+        stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+        return f"{language.lower()}:{' '.join(stripped.casefold().split())}"
+
+    def get(self, name: str, language: str = "en") -> tuple[bool, dict | None]:
+        """
+        Returns `(found, result)`. A found entry with a `None` result is a cached miss.
+        """
+        key = self.normalize_key(name, language)
+        now = time.time()
+        with self._lock:
+            return self._memory_lookup(key, now) or self._disk_lookup(key, now)
+
+    async def aget(self, name: str, language: str = "en") -> tuple[bool, dict | None]:
+        """Async variant of `get`; a memory hit returns without leaving the event loop."""
+        key = self.normalize_key(name, language)
+        now = time.time()
+        with self._lock:
+            hit = self._memory_lookup(key, now)
+            if hit is not None or self._db is None:
+                return hit or self._disk_lookup(key, now)
+        return await asyncio.to_thread(self._locked_disk_lookup, key, now)
+
+    def put(self, name: str, language: str, result: dict | None) -> None:
+        """Stores a result. Pass `None` to cache an unknown name."""
+        key = self.normalize_key(name, language)
+        now = time.time()
+        expires_at = now + (self.ttl if result is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(key, result, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocode (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result) if result is not None else None, expires_at, now),
+                )
+                self._touched.pop(key, None)
+                self._write_touched()
+                self._evict_disk(now)
+                self._db.commit()
+
+    async def aput(self, name: str, language: str, result: dict | None) -> None:
+        """Async variant of `put`."""
+        if self._db is None:
+            self.put(name, language, result)
+        else:
+            await asyncio.to_thread(self.put, name, language, result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM geocode")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._write_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def _memory_lookup(self, key: str, now: float) -> tuple[bool, dict | None] | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._record_hit("memory_hits", value)
+                return True, value
+            del self._memory[key]
+        return None
+
+    def _locked_disk_lookup(self, key: str, now: float) -> tuple[bool, dict | None]:
+        with self._lock:
+            return self._disk_lookup(key, now)
+
+    def _disk_lookup(self, key: str, now: float) -> tuple[bool, dict | None]:
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0]) if row[0] is not None else None
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._write_touched()
+                    self._db.commit()
+                self._remember(key, value, row[1])
+                self._record_hit("disk_hits", value)
+                return True, value
+        self.stats["misses"] += 1
+        return False, None
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE geocode SET accessed_at = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _record_hit(self, counter: str, value: dict | None) -> None:
+        self.stats[counter] += 1
+        if value is None:
+            self.stats["negative_hits"] += 1
+
+    def _remember(self, key: str, value: dict | None, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM geocode WHERE expires_at <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM geocode").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM geocode WHERE key IN "
+                "(SELECT key FROM geocode ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += overflow
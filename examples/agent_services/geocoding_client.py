@@ -3,28 +3,98 @@
 
 import httpx
 
+from src.services.geocoding_cache import GeocodingCache
+from src.services.http_transport import get_async_client, get_client
+from src.services.resilience import Resilience, get_resilience
+
 
 class GeocodingClient:
     """Client for the Open-Meteo Geocoding API."""
 
-    def __init__(self):
-        self.base_url = "https://geocoding-api.open-meteo.com/v1/search"
+    def __init__(
+        self,
+        base_url: str = "https://geocoding-api.open-meteo.com/v1/search",
+        client: httpx.Client | None = None,
+        async_client: httpx.AsyncClient | None = None,
+        cache: GeocodingCache | None = None,
+        resilience: Resilience | None = None,
+    ):
+        self.base_url = base_url
+        self.cache = cache
+        # Fall back to the shared pooled clients so connections are reused across calls.
+        self._client = client
+        self._async_client = async_client
+        self._resilience = resilience
+
+    @property
+    def resilience(self) -> Resilience:
+        # Shared per upstream host unless one was passed in, so all clients see one breaker.
+        return self._resilience or get_resilience(self.base_url)
 
-    def fetch_coordinates(self, city_name: str) -> dict:
+    def fetch_coordinates(self, city_name: str, language: str = "en") -> dict:
         """
         Fetches the coordinates for the first and most relevant result for a given city name.
         """
-        params = {"name": city_name, "count": 1, "language": "en", "format": "json"}
-        with httpx.Client() as client:
-            response = client.get(self.base_url, params=params)
-            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-            data = response.json()
-
-            # The API returns a list under the 'results' key. Handle case where it's empty.
-            if not data.get("results"):
-                raise ValueError(
-                    f"Could not find coordinates for city '{city_name}'. Please try a different name."
-                )
-
-            # Return the first result from the list
-            return data["results"][0]
+        cached = self._from_cache(city_name, language)
+        if cached is not None:
+            return cached
+        client = self._client or get_client()
+        params = self._build_params(city_name, language)
+        response = self.resilience.call(lambda: client.get(self.base_url, params=params))
+        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+        result = self._first_result(response.json())
+        if self.cache is not None:
+            self.cache.put(city_name, language, result)
+        return self._found(result, city_name)
+
+    async def afetch_coordinates(self, city_name: str, language: str = "en") -> dict:
+        """
+        Async variant of `fetch_coordinates` for use inside the event loop.
+        """
+        if self.cache is not None:
+            # The on-disk tier is read in a thread so a lookup doesn't block the loop
+            cached = self._from_cached(*await self.cache.aget(city_name, language), city_name)
+            if cached is not None:
+                return cached
+        client = self._async_client or get_async_client()
+        params = self._build_params(city_name, language)
+        response = await self.resilience.acall(
+            lambda: client.get(self.base_url, params=params)
+        )
+        response.raise_for_status()
+        result = self._first_result(response.json())
+        if self.cache is not None:
+            await self.cache.aput(city_name, language, result)
+        return self._found(result, city_name)
+
+    def _from_cache(self, city_name: str, language: str) -> dict | None:
+        if self.cache is None:
+            return None
+        return self._from_cached(*self.cache.get(city_name, language), city_name)
+
+    def _from_cached(self, found: bool, result: dict | None, city_name: str) -> dict | None:
+        if found and result is None:
+            # Negative hit: this name is known not to resolve.
+            raise self._not_found(city_name)
+        return result
+
+    @staticmethod
+    def _build_params(city_name: str, language: str) -> dict:
+        return {"name": city_name, "count": 1, "language": language, "format": "json"}
+
+    @staticmethod
+    def _first_result(data: dict) -> dict | None:
+        # The API returns a list under the 'results' key; None (cached as a miss) if it's empty.
+        results = data.get("results")
+        return results[0] if results else None
+
+    def _found(self, result: dict | None, city_name: str) -> dict:
+        if result is None:
+            raise self._not_found(city_name)
+        return result
+
+    @staticmethod
+    def _not_found(city_name: str) -> ValueError:
+        return ValueError(
+            f"Could not find coordinates for city '{city_name}'. Please try a different name."
+        )
@@ -1,34 +1,239 @@
+import asyncio
+import functools
+import json
+import threading
 import uuid
-from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 from src.models import ActivityWindow
+from src.services.calendar_index import BusyIntervalIndex
+
+# Calendar's batch endpoint accepts at most 50 calls per request.
+MAX_BATCH_SIZE = 50
+
+_discovery_lock = threading.Lock()
+_discovery_document: str | None = None
+
+# A small, process-wide pool for the blocking client so async callers can't
+# fan out into unbounded threads.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="calendar")
+
+
+def _get_discovery_document(credentials) -> str:
+    """Loads the Calendar v3 discovery document once and reuses it for every service."""
+    global _discovery_document
+    if _discovery_document is None:
+        with _discovery_lock:
+            if _discovery_document is None:
+                service = build("calendar", "v3", credentials=credentials)
+                _discovery_document = service._rootDesc
+                if not isinstance(_discovery_document, str):
+                    _discovery_document = json.dumps(_discovery_document)
+    return _discovery_document
 
 
 class GoogleCalendarService:
-    def __init__(self, credentials):
-        self.service = build("calendar", "v3", credentials=credentials)
+    def __init__(self, credentials, api_endpoint: str | None = None):
+        self.credentials = credentials
+        # Point at a local stand-in instead of googleapis.com, e.g. "http://127.0.0.1:8080/".
+        self.api_endpoint = api_endpoint
+        # httplib2 (used by the client) isn't thread-safe, so each thread gets its own
+        # service object, built from the shared discovery document.
+        self._local = threading.local()
+        # Local mirror of this user's calendar, kept current with sync tokens.
+        self.busy_index = BusyIntervalIndex()
+        self._sync_token: str | None = None
+        self._sync_lock = threading.Lock()
+
+    @property
+    def service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+            service = build_from_document(
+                _get_discovery_document(self.credentials),
+                credentials=self.credentials,
+                client_options=client_options,
+            )
+            self._local.service = service
+        return service
+
+    def create_event(self, window: ActivityWindow, activity: str, timezone: str = "auto") -> str:
+        event_id, event_body = self._event_body(window, activity, timezone)
+        event = self.service.events().insert(calendarId="primary", body=event_body).execute()
+        self.busy_index.upsert(event or event_body)
+        return event_id
+
+    def get_event(self, event_id: str):
+        return (
+            self.service.events().get(calendarId="primary", eventId=event_id).execute()
+        )
+
+    def delete_event(self, event_id: str):
+        self.service.events().delete(calendarId="primary", eventId=event_id).execute()
+        self.busy_index.remove(event_id)
+
+    def create_events(
+        self, items: list[tuple[ActivityWindow, str]], timezone: str = "auto"
+    ) -> list[str]:
+        """
+        Creates several events through Calendar's batch endpoint.
+        Returns the event ids in input order; raises the first failure after all batches ran.
+        """
+        event_ids, bodies, requests = [], [], []
+        for window, activity in items:
+            event_id, event_body = self._event_body(window, activity, timezone)
+            event_ids.append(event_id)
+            bodies.append(event_body)
+            requests.append(
+                self.service.events().insert(calendarId="primary", body=event_body)
+            )
+        # Only inserts that succeeded enter the index; a sync token never reports the
+        # others, so they would stay there as phantom busy slots until a full resync.
+        self._execute_batched(
+            requests, lambda i, event: self.busy_index.upsert(event or bodies[i])
+        )
+        return event_ids
+
+    def delete_events(self, event_ids: list[str]) -> None:
+        """
+        Deletes several events through Calendar's batch endpoint; raises the first
+        failure after all batches ran. Events that failed to delete stay busy.
+        """
+        self._execute_batched(
+            [
+                self.service.events().delete(calendarId="primary", eventId=event_id)
+                for event_id in event_ids
+            ],
+            lambda i, _: self.busy_index.remove(event_ids[i]),
+        )
+
+    def refresh(self) -> int:
+        """
+        Brings the local busy index up to date. The first call lists every event; later
+        calls send the stored sync token and only receive what changed since.
+        Returns the number of events applied.
+        """
+        with self._sync_lock:
+            try:
+                return self._sync_pages(self._sync_token)
+            except HttpError as e:
+                # 410 Gone: the sync token expired, so start over with a full sync.
+                if e.resp.status != 410:
+                    raise
+                self._sync_token = None
+                self.busy_index.clear()
+                return self._sync_pages(None)
+
+    def is_free(self, window: ActivityWindow) -> bool:
+        """Checks the window against the local mirror; no network call."""
+        return self.busy_index.is_free(window.start_time, window.end_time)
 
-    def create_event(self, window: ActivityWindow, activity: str) -> str:
+    def free_windows(
+        self, start: datetime, end: datetime, min_duration: timedelta = timedelta(0)
+    ) -> list[tuple[datetime, datetime]]:
+        """Free gaps in [start, end) from the local mirror; no network call."""
+        return self.busy_index.free_windows(start, end, min_duration)
+
+    async def arefresh(self) -> int:
+        return await self._run(self.refresh)
+
+    def _sync_pages(self, sync_token: str | None) -> int:
+        if sync_token is None:
+            self.busy_index.clear()
+        applied, page_token = 0, None
+        while True:
+            params = {"calendarId": "primary", "singleEvents": True, "maxResults": 250}
+            if sync_token:
+                params["syncToken"] = sync_token
+            if page_token:
+                params["pageToken"] = page_token
+            page = self.service.events().list(**params).execute()
+            # All-day events are days in the calendar's time zone.
+            if page.get("timeZone"):
+                self.busy_index.timezone = page["timeZone"]
+            for event in page.get("items", []):
+                self.busy_index.upsert(event)
+                applied += 1
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                self._sync_token = page.get("nextSyncToken")
+                return applied
+
+    async def acreate_event(
+        self, window: ActivityWindow, activity: str, timezone: str = "auto"
+    ) -> str:
+        return await self._run(self.create_event, window, activity, timezone)
+
+    async def aget_event(self, event_id: str):
+        return await self._run(self.get_event, event_id)
+
+    async def adelete_event(self, event_id: str):
+        return await self._run(self.delete_event, event_id)
+
+    async def acreate_events(
+        self, items: list[tuple[ActivityWindow, str]], timezone: str = "auto"
+    ) -> list[str]:
+        return await self._run(self.create_events, items, timezone)
+
+    async def adelete_events(self, event_ids: list[str]) -> None:
+        return await self._run(self.delete_events, event_ids)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(fn, *args))
+
+    def _new_batch(self, callback) -> BatchHttpRequest:
+        if self.api_endpoint:
+            return BatchHttpRequest(
+                callback=callback,
+                batch_uri=f"{self.api_endpoint.rstrip('/')}/batch/calendar/v3",
+            )
+        return self.service.new_batch_http_request(callback=callback)
+
+    def _execute_batched(self, requests: list, on_success=None) -> list:
+        """
+        Runs `requests` in batches of up to 50. `on_success(index, response)` is called
+        for each request that succeeded, as its response arrives.
+        """
+        responses: dict[str, object] = {}
+        errors: list[Exception] = []
+
+        def callback(request_id, response, exception):
+            responses[request_id] = response
+            if exception is not None:
+                errors.append(exception)
+            elif on_success is not None:
+                on_success(int(request_id), response)
+
+        for start in range(0, len(requests), MAX_BATCH_SIZE):
+            batch = self._new_batch(callback)
+            for offset, request in enumerate(requests[start : start + MAX_BATCH_SIZE]):
+                batch.add(request, request_id=str(start + offset))
+            batch.execute()
+
+        if errors:
+            raise errors[0]
+        return [responses.get(str(i)) for i in range(len(requests))]
+
+    @staticmethod
+    def _event_body(window: ActivityWindow, activity: str, timezone: str) -> tuple[str, dict]:
         event_id = f"activityadv{uuid.uuid4().hex}"
         event_body = {
             "summary": f"🗓️ Recommended time for {activity}",
             "description": window.summary,
             "start": {
                 "dateTime": window.start_time.isoformat(),
-                "timeZone": "auto",
+                "timeZone": timezone,
             },
             "end": {
                 "dateTime": window.end_time.isoformat(),
-                "timeZone": "auto",
+                "timeZone": timezone,
             },
             "id": event_id,
         }
-        self.service.events().insert(calendarId="primary", body=event_body).execute()
-        return event_id
-
-    def get_event(self, event_id: str):
-        return (
-            self.service.events().get(calendarId="primary", eventId=event_id).execute()
-        )
-
-    def delete_event(self, event_id: str):
-        self.service.events().delete(calendarId="primary", eventId=event_id).execute()
+        return event_id, event_body
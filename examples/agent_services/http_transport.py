@@ -0,0 +1,163 @@
+# File: src/services/http_transport.py
+# Description: A shared, pooled HTTP transport so every service client reuses keep-alive connections.
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass, field
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (only needed to enable HTTP/2 in httpx)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool, protocol and timeout settings shared by all service clients."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 3.0
+    read_timeout: float = 10.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 5.0
+    http2: bool = HTTP2_AVAILABLE
+    # Optional custom transports (e.g. httpx.MockTransport for local stand-ins).
+    transport: httpx.BaseTransport | None = None
+    async_transport: httpx.AsyncBaseTransport | None = None
+    headers: dict[str, str] = field(
+        default_factory=lambda: {"User-Agent": "kai-weather-advisor"}
+    )
+    # httpx event hooks (e.g. for request timing); async clients need coroutine hooks.
+    event_hooks: dict[str, list] | None = None
+    async_event_hooks: dict[str, list] | None = None
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+_lock = threading.Lock()
+_config = TransportConfig()
+_client: httpx.Client | None = None
+# httpx.AsyncClient connections are bound to the event loop that opened them,
+# so we keep one async client per running loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def configure_transport(config: TransportConfig) -> None:
+    """
+    Replaces the shared transport configuration.
+    Existing pooled clients are closed and lazily recreated with the new settings.
+    """
+    global _config
+    close_transport()
+    with _lock:
+        _config = config
+
+
+def get_transport_config() -> TransportConfig:
+    return _config
+
+
+def get_client() -> httpx.Client:
+    """Returns the process-wide pooled synchronous client."""
+    global _client
+    if _client is None or _client.is_closed:
+        with _lock:
+            if _client is None or _client.is_closed:
+                _client = httpx.Client(
+                    limits=_config.limits(),
+                    timeout=_config.timeout(),
+                    http2=_config.http2,
+                    transport=_config.transport,
+                    headers=_config.headers,
+                    event_hooks=_config.event_hooks,
+                )
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled asynchronous client for the currently running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    limits=_config.limits(),
+                    timeout=_config.timeout(),
+                    http2=_config.http2,
+                    transport=_config.async_transport,
+                    headers=_config.headers,
+                    event_hooks=_config.async_event_hooks,
+                )
+                _async_clients[loop] = client
+    return client
+
+
+def close_transport() -> None:
+    """
+    Closes the shared synchronous client and every pooled async client, each on
+    its own event loop. A client whose loop is already closed can't be closed
+    cleanly any more; call `aclose_transport` before shutting a loop down.
+    """
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        clients = list(_async_clients.items())
+        _async_clients.clear()
+    for loop, client in clients:
+        _aclose_on_loop(loop, client)
+
+
+# Keeps close tasks scheduled on the current loop alive until they finish.
+_closing: set[asyncio.Task] = set()
+
+
+def _aclose_on_loop(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    if loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        task = loop.create_task(client.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    elif running is None:
+        loop.run_until_complete(client.aclose())
+
+
+async def aclose_transport() -> None:
+    """Closes the async client bound to the current event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
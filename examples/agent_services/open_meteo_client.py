@@ -1,26 +1,281 @@
 # File: src/services/open_meteo_client.py
 # Description: Updated to accept a structured Location object, improving type safety and clarity.
 
+import asyncio
+from typing import Awaitable, Callable
+from urllib.parse import quote
+
 import httpx
+
 from src.models import Location  # Import the Location model
+from src.services.forecast_cache import ForecastCache
+from src.services.forecast_request import ForecastRequest
+from src.services.http_transport import get_async_client, get_client
+from src.services.resilience import CircuitOpenError, Resilience, get_resilience
+
+# CRITICAL: We request 'apparent_temperature' here to be used in our analysis.
+HOURLY_VARIABLES = (
+    "apparent_temperature",
+    "relativehumidity_2m",
+    "precipitation_probability",
+    "windspeed_10m",
+    "uv_index",
+)
+
+# Conservative limits for packing several locations into one request.
+MAX_URL_LENGTH = 8000
+MAX_LOCATIONS_PER_REQUEST = 100
+
+
+def _upstream_unhealthy(error: Exception) -> bool:
+    # A 4xx other than 429 means our request is wrong; stale data wouldn't fix that
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
 
 
 class OpenMeteoClient:
-    def __init__(self):
-        self.base_url = "https://api.open-meteo.com/v1/forecast"
+    def __init__(
+        self,
+        base_url: str = "https://api.open-meteo.com/v1/forecast",
+        client: httpx.Client | None = None,
+        async_client: httpx.AsyncClient | None = None,
+        cache: ForecastCache | None = None,
+        max_url_length: int = MAX_URL_LENGTH,
+        max_locations_per_request: int = MAX_LOCATIONS_PER_REQUEST,
+        resilience: Resilience | None = None,
+    ):
+        self.base_url = base_url
+        self.cache = cache
+        self.max_url_length = max_url_length
+        self.max_locations_per_request = max_locations_per_request
+        # Fall back to the shared pooled clients so connections are reused across calls.
+        self._client = client
+        self._async_client = async_client
+        self._resilience = resilience
+
+    @property
+    def resilience(self) -> Resilience:
+        # Shared per upstream host unless one was passed in, so all clients see one breaker.
+        return self._resilience or get_resilience(self.base_url)
 
     def fetch_hourly_forecast(self, location: Location) -> dict:
         """
         Fetches the hourly forecast for a given Location object.
         """
-        params: dict[str, str | float] = {
-            "latitude": location.latitude,
-            "longitude": location.longitude,
-            # CRITICAL: We request 'apparent_temperature' here to be used in our analysis.
-            "hourly": "apparent_temperature,relativehumidity_2m,precipitation_probability,windspeed_10m,uv_index",
+        if self.cache is None:
+            return self._get(self._build_params(location))
+        key = self._cache_key(location)
+        return self._or_stale(
+            key,
+            lambda: self.cache.get_or_fetch(
+                key, lambda: self._get(self._build_params(location, key))
+            ),
+        )
+
+    async def afetch_hourly_forecast(self, location: Location) -> dict:
+        """
+        Async variant of `fetch_hourly_forecast` for use inside the event loop.
+        """
+        if self.cache is None:
+            return await self._aget(self._build_params(location))
+        key = self._cache_key(location)
+        return await self._aor_stale(
+            key,
+            self.cache.aget_or_fetch(
+                key, lambda: self._aget(self._build_params(location, key))
+            ),
+        )
+
+    def fetch_forecast(self, location: Location, request: ForecastRequest) -> dict:
+        """
+        Fetches only the variables, dates and resolution described by `request`.
+        """
+        if self.cache is None:
+            return self._get(self.build_params(location, request))
+        key = self._cache_key(location, request)
+        return self._or_stale(
+            key,
+            lambda: self.cache.get_or_fetch(
+                key, lambda: self._get(self._build_params(location, key) | request.to_params())
+            ),
+        )
+
+    async def afetch_forecast(self, location: Location, request: ForecastRequest) -> dict:
+        """
+        Async variant of `fetch_forecast`.
+        """
+        if self.cache is None:
+            return await self._aget(self.build_params(location, request))
+        key = self._cache_key(location, request)
+        return await self._aor_stale(
+            key,
+            self.cache.aget_or_fetch(
+                key, lambda: self._aget(self._build_params(location, key) | request.to_params())
+            ),
+        )
+
+    def build_params(
+        self, location: Location, request: ForecastRequest | None = None
+    ) -> dict[str, str | float]:
+        """
+        The query parameters of an uncached request for `location`, trimmed to
+        `request` if given.
+        """
+        params = self._build_params(location)
+        return params | request.to_params() if request is not None else params
+
+    def fetch_hourly_forecast_many(self, locations: list[Location]) -> list[dict]:
+        """
+        Fetches hourly forecasts for several locations using as few upstream requests
+        as the URL limits allow. Results are returned in the same order as `locations`;
+        cached locations are served without a request.
+        """
+        results, missing = self._split_cached(locations)
+        for batch in self._pack(missing):
+            payloads = self._get(self._build_batch_params([loc for _, loc in batch]))
+            self._merge_batch(results, batch, payloads)
+        return [results[key] for key in self._keys(locations)]
+
+    async def afetch_hourly_forecast_many(self, locations: list[Location]) -> list[dict]:
+        """
+        Async variant of `fetch_hourly_forecast_many`; the packed requests run concurrently.
+        """
+        results, missing = self._split_cached(locations)
+        batches = self._pack(missing)
+        responses = await asyncio.gather(
+            *(self._aget(self._build_batch_params([loc for _, loc in b])) for b in batches)
+        )
+        for batch, payloads in zip(batches, responses):
+            self._merge_batch(results, batch, payloads)
+        return [results[key] for key in self._keys(locations)]
+
+    def _keys(self, locations: list[Location]) -> list:
+        if self.cache is not None:
+            return [self._cache_key(loc) for loc in locations]
+        return [(loc.latitude, loc.longitude, loc.timezone) for loc in locations]
+
+    def _split_cached(self, locations: list[Location]) -> tuple[dict, list]:
+        """Returns the payloads already cached and the (key, location) pairs still to fetch."""
+        results: dict = {}
+        missing: dict = {}
+        for key, location in zip(self._keys(locations), locations):
+            if key in results or key in missing:
+                continue
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[key] = cached
+            else:
+                missing[key] = location
+        return results, list(missing.items())
+
+    def _pack(self, missing: list) -> list[list]:
+        """Greedily packs locations into batches that respect the URL and count limits."""
+        batches: list[list] = []
+        batch: list = []
+        length = len(self.base_url) + len(",".join(HOURLY_VARIABLES)) + 64
+        budget = length
+        for key, location in missing:
+            latitude, longitude = key[:2] if self.cache is not None else (
+                location.latitude,
+                location.longitude,
+            )
+            # Each location adds its coordinates and timezone plus the encoded commas.
+            cost = len(f"{latitude}{longitude}") + len(quote(location.timezone, safe="")) + 9
+            if batch and (
+                budget + cost > self.max_url_length
+                or len(batch) >= self.max_locations_per_request
+            ):
+                batches.append(batch)
+                batch, budget = [], length
+            batch.append((key, location))
+            budget += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _build_batch_params(self, locations: list[Location]) -> dict[str, str | float]:
+        if len(locations) == 1:
+            key = self._cache_key(locations[0]) if self.cache is not None else None
+            return self._build_params(locations[0], key)
+        points = [
+            self._cache_key(loc)[:2] if self.cache is not None else (loc.latitude, loc.longitude)
+            for loc in locations
+        ]
+        return {
+            "latitude": ",".join(str(lat) for lat, _ in points),
+            "longitude": ",".join(str(lon) for _, lon in points),
+            "hourly": ",".join(HOURLY_VARIABLES),
+            "timezone": ",".join(loc.timezone for loc in locations),
+        }
+
+    def _merge_batch(self, results: dict, batch: list, payloads) -> None:
+        # Open-Meteo returns a bare object for one location and a list for several.
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        if len(payloads) != len(batch):
+            raise ValueError(
+                f"Expected {len(batch)} forecasts from Open-Meteo but received {len(payloads)}."
+            )
+        for (key, _), payload in zip(batch, payloads):
+            results[key] = payload
+            if self.cache is not None:
+                self.cache.put(key, payload)
+
+    def _or_stale(self, key, fetch: Callable[[], dict]) -> dict:
+        """Runs `fetch`, falling back to an expired cached payload if the upstream failed."""
+        try:
+            return fetch()
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            stale = self.cache.get_stale(key) if _upstream_unhealthy(e) else None
+            if stale is None:
+                raise
+            return stale
+
+    async def _aor_stale(self, key, fetch: Awaitable[dict]) -> dict:
+        try:
+            return await fetch
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            stale = self.cache.get_stale(key) if _upstream_unhealthy(e) else None
+            if stale is None:
+                raise
+            return stale
+
+    def _get(self, params: dict) -> dict:
+        client = self._client or get_client()
+        response = self.resilience.call(lambda: client.get(self.base_url, params=params))
+        response.raise_for_status()
+        return response.json()
+
+    async def _aget(self, params: dict) -> dict:
+        client = self._async_client or get_async_client()
+        response = await self.resilience.acall(
+            lambda: client.get(self.base_url, params=params)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _cache_key(self, location: Location, request: ForecastRequest | None = None):
+        if request is None:
+            return self.cache.make_key(
+                location.latitude, location.longitude, HOURLY_VARIABLES, location.timezone
+            )
+        return self.cache.make_key(
+            location.latitude,
+            location.longitude,
+            request.variables,
+            location.timezone,
+            request.cache_window(),
+        )
+
+    @staticmethod
+    def _build_params(location: Location, key=None) -> dict[str, str | float]:
+        # When caching, request the snapped grid point so the payload matches its key.
+        latitude, longitude = key[:2] if key else (location.latitude, location.longitude)
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": ",".join(HOURLY_VARIABLES),
             "timezone": location.timezone,
         }
-        with httpx.Client() as client:
-            response = client.get(self.base_url, params=params)
-            response.raise_for_status()
-            return response.json()
@@ -0,0 +1,393 @@
+# File: src/services/resilience.py
+# Description: Retries with backoff, hedged requests, a circuit breaker and 429-aware rate limiting
+#              for the service clients' upstream calls.
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable
+from urllib.parse import urlparse
+
+import httpx
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+@dataclass
+class ResiliencePolicy:
+    """How one upstream is retried, hedged, rate limited and cut off when unhealthy."""
+
+    # Attempts per call (1 disables retries) and their exponential, fully jittered backoff.
+    max_attempts: int = 3
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+    # No new attempt starts once a call has run this long.
+    deadline: float = 10.0
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+    # Send one duplicate request when the first is slower than this latency
+    # quantile of recent successful attempts (async calls only; None disables).
+    hedge_quantile: float | None = 0.95
+    hedge_min_samples: int = 20
+    hedge_min_delay: float = 0.05
+    # Consecutive failed attempts that open the breaker (0 disables it), and how
+    # long it stays open before a single probe request is let through.
+    breaker_failures: int = 5
+    breaker_cooldown: float = 30.0
+    # Client-side request rate (None means unlimited); a 429's Retry-After
+    # pauses all requests to the upstream regardless.
+    rate_limit: float | None = None
+    rate_burst: int = 10
+    # Longest Retry-After honoured, so a bogus header can't stall calls for hours.
+    max_retry_after: float = 30.0
+
+    @classmethod
+    def disabled(cls) -> "ResiliencePolicy":
+        """One attempt, no hedging, no breaker, no pausing on 429s: plain calls, as before."""
+        return cls(max_attempts=1, hedge_quantile=None, breaker_failures=0, max_retry_after=0)
+
+
+class CircuitBreaker:
+    """
+    Closed → open after `failures` consecutive failures → half-open after `cooldown`.
+
+    `allow` hands out a ticket per admitted request, which `record` takes back:
+    once open, only the probe's outcome changes the state, so replies to requests
+    sent before the breaker opened can neither close nor reopen it.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._tickets = 0
+        self._probe: int | None = None
+        self._probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> int | None:
+        """A ticket for `record` if the request may be sent, else None."""
+        if not self.failures:
+            return 0
+        with self._lock:
+            self._tickets += 1
+            if self.state == "closed":
+                return self._tickets
+            now = time.monotonic()
+            if self.state == "open" and now - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+            # One probe at a time; everyone else keeps failing fast until it reports.
+            # A probe that never reports (e.g. cancelled) is replaced after a cooldown.
+            if self.state == "half_open" and (
+                self._probe is None or now - self._probe_at >= self.cooldown
+            ):
+                self._probe, self._probe_at = self._tickets, now
+                return self._tickets
+            return None
+
+    def release(self, ticket: int) -> None:
+        """Takes back a ticket whose request has no outcome (e.g. it was cancelled)."""
+        with self._lock:
+            if ticket == self._probe:
+                # Let the next caller probe right away instead of after a cooldown
+                self._probe = None
+
+    def record(self, ok: bool, ticket: int) -> None:
+        if not self.failures:
+            return
+        with self._lock:
+            if self.state != "closed":
+                if self.state == "open" or ticket != self._probe:
+                    return
+                self._probe = None
+            if ok:
+                self.state = "closed"
+                self._consecutive = 0
+                return
+            self._consecutive += 1
+            if self.state == "half_open" or self._consecutive >= self.failures:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Optional token bucket, plus a pause shared by every caller that a 429 with
+    Retry-After sets, so one throttled response slows all requests down at once.
+    """
+
+    def __init__(self, rate: float | None = None, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def reserve(self) -> float:
+        """Takes a slot and returns how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.rate:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def release(self) -> None:
+        """Gives back a reserved slot that was never used."""
+        if self.rate:
+            with self._lock:
+                self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self.reserve()
+        used = False
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            used = True
+        finally:
+            # Cancelled while waiting: the callers queued behind get the slot
+            if not used:
+                self.release()
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Resilience:
+    """
+    Wraps one upstream's requests: `call` (sync) and `acall` (async) take a
+    function that sends the request and return its final `httpx.Response`, or
+    raise the last transport error. Retryable statuses are retried and, if they
+    persist, returned, so callers still decide via `raise_for_status`.
+    """
+
+    def __init__(self, policy: ResiliencePolicy | None = None):
+        self.policy = policy or ResiliencePolicy()
+        self.breaker = CircuitBreaker(self.policy.breaker_failures, self.policy.breaker_cooldown)
+        self.limiter = RateLimiter(self.policy.rate_limit, self.policy.rate_burst)
+        self._latencies: deque[float] = deque(maxlen=500)
+        self.stats = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "throttled": 0,
+            "short_circuited": 0,
+            "failures": 0,
+        }
+
+    def call(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        """Sync variant of `acall`; sync callers get retries but no hedging."""
+        self.stats["calls"] += 1
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            ticket = self._admit()
+            try:
+                self.limiter.acquire()
+                attempt += 1
+                try:
+                    response, error = self._timed(send), None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                delay = self._after_attempt(response, error, attempt, start, ticket)
+                ticket = None
+            finally:
+                # Any other error leaves the attempt without an outcome to record
+                if ticket is not None:
+                    self.breaker.release(ticket)
+            if delay is None:
+                return self._result(response, error)
+            time.sleep(delay)
+
+    async def acall(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Sends with retries, backoff and hedging; raises `CircuitOpenError` when open."""
+        self.stats["calls"] += 1
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            ticket = self._admit()
+            try:
+                await self.limiter.aacquire()
+                attempt += 1
+                try:
+                    response, error = await self._ahedged(send), None
+                except httpx.TransportError as e:
+                    response, error = None, e
+                delay = self._after_attempt(response, error, attempt, start, ticket)
+                ticket = None
+            finally:
+                # Cancelled or failed with any other error: the attempt has no outcome
+                # to record, so the breaker gets its ticket back
+                if ticket is not None:
+                    self.breaker.release(ticket)
+            if delay is None:
+                return self._result(response, error)
+            await asyncio.sleep(delay)
+
+    def hedge_delay(self) -> float | None:
+        """The latency quantile after which a duplicate request is sent, once warmed up."""
+        quantile = self.policy.hedge_quantile
+        if quantile is None or len(self._latencies) < self.policy.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(int(len(ordered) * quantile), len(ordered) - 1)
+        return max(ordered[index], self.policy.hedge_min_delay)
+
+    def _admit(self) -> int:
+        ticket = self.breaker.allow()
+        if ticket is None:
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError("Upstream is unavailable (circuit open); try again later.")
+        return ticket
+
+    def _timed(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        started = time.monotonic()
+        response = send()
+        self._observe(response, time.monotonic() - started)
+        return response
+
+    async def _atimed(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        started = time.monotonic()
+        response = await send()
+        self._observe(response, time.monotonic() - started)
+        return response
+
+    def _observe(self, response: httpx.Response, elapsed: float) -> None:
+        self.stats["attempts"] += 1
+        if not self._retryable(response):
+            self._latencies.append(elapsed)
+
+    async def _ahedged(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Sends once; if that is still running after `hedge_delay`, sends a duplicate
+        and takes whichever usable response arrives first (the requests are
+        idempotent GETs). The loser is cancelled. The duplicate waits for the rate
+        limiter like any other request.
+        """
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(self._atimed(send))
+        pending = {first}
+        last: asyncio.Future | None = None
+        try:
+            if delay is None:
+                return await first
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            self.stats["hedges"] += 1
+            hedge = asyncio.ensure_future(self._ahedge(send))
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task
+                    if task.exception() is None and not self._retryable(task.result()):
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: report the later one like a single failed attempt
+            return last.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _ahedge(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        await self.limiter.aacquire()
+        return await self._atimed(send)
+
+    def _retryable(self, response: httpx.Response) -> bool:
+        return response.status_code in self.policy.retry_statuses
+
+    def _after_attempt(
+        self,
+        response: httpx.Response | None,
+        error: Exception | None,
+        attempt: int,
+        start: float,
+        ticket: int,
+    ) -> float | None:
+        """Records the outcome and returns the delay before retrying, or None to stop."""
+        policy = self.policy
+        ok = error is None and not self._retryable(response)
+        # A 4xx is the caller's problem, not a sign of an unhealthy upstream; a 429
+        # means it is up but busy, which the limiter's pause below deals with.
+        self.breaker.record(ok or (response is not None and response.status_code < 500), ticket)
+        if ok:
+            return None
+        retry_after = None
+        if response is not None and response.status_code == 429:
+            self.stats["throttled"] += 1
+            retry_after = min(_retry_after(response) or 0.0, policy.max_retry_after)
+            if retry_after:
+                self.limiter.pause(retry_after)
+        backoff = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** (attempt - 1)))
+        delay = max(backoff, retry_after or 0.0)
+        if attempt >= policy.max_attempts or time.monotonic() - start + delay > policy.deadline:
+            self.stats["failures"] += 1
+            return None
+        self.stats["retries"] += 1
+        return delay
+
+    @staticmethod
+    def _result(response: httpx.Response | None, error: Exception | None) -> httpx.Response:
+        if error is not None:
+            raise error
+        return response
+
+
+_lock = threading.Lock()
+_policy = ResiliencePolicy()
+_upstreams: dict[str, Resilience] = {}
+
+
+def configure_resilience(policy: ResiliencePolicy) -> None:
+    """Replaces the default policy; per-upstream state (breakers, latencies) starts over."""
+    global _policy
+    with _lock:
+        _policy = policy
+        _upstreams.clear()
+
+
+def get_resilience(url: str) -> Resilience:
+    """The shared `Resilience` for the host serving `url`, so clients of one upstream share a breaker."""
+    host = urlparse(url).netloc
+    with _lock:
+        resilience = _upstreams.get(host)
+        if resilience is None:
+            resilience = _upstreams[host] = Resilience(_policy)
+        return resilience
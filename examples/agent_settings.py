@@ -0,0 +1,13 @@
+"""
+Helpers for reading the agent's tuning knobs from the environment.
+"""
+
+
+def parse_overrides(value: str | None, cast=float) -> dict:
+    """Parses "Gmail=2,Asana_CreateTask=1" into {"Gmail": 2, "Asana_CreateTask": 1}."""
+    overrides = {}
+    for part in (value or "").split(","):
+        name, sep, setting = part.partition("=")
+        if sep and name.strip():
+            overrides[name.strip()] = cast(setting)
+    return overrides
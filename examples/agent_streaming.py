@@ -0,0 +1,125 @@
+"""
+Aggregation of streamed model chunks into a single AIMessage, with generation
+timing (time-to-first-token, tokens/sec, total time) for each call.
+"""
+
+import json
+import logging
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.messages.ai import add_usage
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkAggregator:
+    """
+    Collects text in a list of parts and merges tool-call fragments by their
+    stream index, so long outputs stay linear and a tool call split across many
+    chunks (name in one, argument JSON spread over the rest) is rebuilt exactly once.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at: float | None = None
+        self.chunk_count = 0
+        self.usage_metadata = None
+        self.response_metadata: dict = {}
+        self._content: list[str] = []
+        self._tool_calls: dict = {}
+
+    def add(self, chunk: AIMessageChunk) -> str:
+        """Adds one chunk and returns its text content (empty if none) for streaming."""
+        self.chunk_count += 1
+        text = _text(chunk.content)
+        if self.first_token_at is None and (text or chunk.tool_call_chunks):
+            self.first_token_at = time.perf_counter()
+        if text:
+            self._content.append(text)
+
+        for fragment in chunk.tool_call_chunks:
+            # Providers that omit the index send each call in one piece; key by id instead.
+            key = fragment.get("index")
+            if key is None:
+                key = fragment.get("id") or len(self._tool_calls)
+            entry = self._tool_calls.setdefault(key, {"id": None, "name": [], "args": []})
+            if fragment.get("id") and not entry["id"]:
+                entry["id"] = fragment["id"]
+            if fragment.get("name"):
+                entry["name"].append(fragment["name"])
+            if fragment.get("args"):
+                entry["args"].append(fragment["args"])
+
+        if chunk.usage_metadata:
+            # Providers may split usage over several chunks (e.g. input, then output)
+            self.usage_metadata = add_usage(self.usage_metadata, chunk.usage_metadata)
+        if chunk.response_metadata:
+            self.response_metadata.update(chunk.response_metadata)
+        return text
+
+    def metrics(self) -> dict:
+        finished_at = time.perf_counter()
+        total = finished_at - self.started_at
+        ttft = (self.first_token_at or finished_at) - self.started_at
+        if self.usage_metadata and self.usage_metadata.get("output_tokens"):
+            output_tokens = self.usage_metadata["output_tokens"]
+        else:
+            # Without usage data, one streamed chunk is roughly one token
+            output_tokens = self.chunk_count
+        generation_time = total - ttft
+        return {
+            "time_to_first_token_s": round(ttft, 4),
+            "total_time_s": round(total, 4),
+            "output_tokens": output_tokens,
+            "tokens_per_second": round(output_tokens / generation_time, 1)
+            if generation_time > 0
+            else None,
+        }
+
+    def message(self) -> AIMessage:
+        """Builds the final AIMessage, with generation metrics in `response_metadata`."""
+        tool_calls, invalid_tool_calls = [], []
+        for entry in self._tool_calls.values():
+            name = "".join(entry["name"]).strip()
+            raw_args = "".join(entry["args"])
+            # Drop empty fragments that never received a tool name
+            if not name:
+                continue
+            try:
+                args = json.loads(raw_args) if raw_args else {}
+                if not isinstance(args, dict):
+                    raise ValueError("tool arguments must be a JSON object")
+                tool_calls.append(
+                    {"name": name, "args": args, "id": entry["id"], "type": "tool_call"}
+                )
+            except ValueError as e:
+                invalid_tool_calls.append(
+                    {
+                        "name": name,
+                        "args": raw_args,
+                        "id": entry["id"],
+                        "error": str(e),
+                        "type": "invalid_tool_call",
+                    }
+                )
+
+        metrics = self.metrics()
+        logger.info("model generation metrics: %s", metrics)
+        return AIMessage(
+            content="".join(self._content),
+            tool_calls=tool_calls,
+            invalid_tool_calls=invalid_tool_calls,
+            usage_metadata=self.usage_metadata,
+            response_metadata={**self.response_metadata, "generation_metrics": metrics},
+        )
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    # Content blocks (e.g. [{"type": "text", "text": ...}])
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content or []
+    )
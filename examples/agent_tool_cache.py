@@ -0,0 +1,129 @@
+"""
+Opt-in, per-user cache of read-only tool results, so a repeated or rephrased
+question ("what emails do I have today?") doesn't re-run the same Gmail/Asana
+call with the same arguments.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from langchain_core.messages import ToolMessage
+
+from agent_settings import parse_overrides
+
+# Side-effect-free tools that may be cached, with their TTL in seconds, e.g.
+# "Gmail_ListEmails=120,Asana_ListTasks=300". Empty disables the cache.
+tool_result_cache_ttls = parse_overrides(os.environ.get("TOOL_RESULT_CACHE"))
+tool_result_cache_max_entries = int(os.environ.get("TOOL_RESULT_CACHE_MAX_ENTRIES", 1000))
+
+
+def canonical_args(args: dict) -> str:
+    """
+    Key form of tool arguments: keys sorted, unset (None) values dropped and
+    surrounding whitespace stripped from strings, so equivalent calls match.
+    """
+
+    def normalize(value):
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, str):
+            return value.strip()
+        return value
+
+    return json.dumps(normalize(args), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _toolkit(tool_name: str) -> str:
+    return tool_name.split("_", 1)[0]
+
+
+class ToolResultCache:
+    """
+    Caches successful results of allow-listed tools per user, keyed on the tool
+    name and canonical arguments, each tool with its own TTL.
+
+    Any other tool is treated as mutating: when it runs, the user's cached
+    results for the same toolkit are dropped (sending an email invalidates cached
+    Gmail listings). A per-(user, toolkit) generation counter keeps a read that
+    raced with such a write from storing its now-stale result.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        max_entries: int = tool_result_cache_max_entries,
+    ):
+        self.ttls = tool_result_cache_ttls if ttls is None else ttls
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[ToolMessage, float]] = OrderedDict()
+        self._generations: Counter = Counter()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        # Upstream calls saved, per tool
+        self.hits_by_tool: Counter = Counter()
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.ttls
+
+    def generation(self, user_id: str | None, tool_name: str) -> int:
+        return self._generations[(user_id, _toolkit(tool_name))]
+
+    def get(self, user_id: str | None, tool_name: str, args: dict) -> ToolMessage | None:
+        if not self.cacheable(tool_name):
+            return None
+        key = (user_id, tool_name, canonical_args(args))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.hits_by_tool[tool_name] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def put(
+        self,
+        user_id: str | None,
+        tool_name: str,
+        args: dict,
+        message: ToolMessage,
+        generation: int,
+    ) -> None:
+        """Stores a result unless a mutating tool ran since `generation` was read."""
+        if not self.cacheable(tool_name) or message.status == "error":
+            return
+        key = (user_id, tool_name, canonical_args(args))
+        with self._lock:
+            if self._generations[(user_id, _toolkit(tool_name))] != generation:
+                return
+            self._entries[key] = (message, time.time() + self.ttls[tool_name])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def note_mutation(self, user_id: str | None, tool_name: str) -> None:
+        """Drops the user's cached results for the toolkit of a mutating tool."""
+        toolkit = _toolkit(tool_name)
+        with self._lock:
+            self._generations[(user_id, toolkit)] += 1
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == user_id and _toolkit(key[1]) == toolkit
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.stats["invalidations"] += len(stale)
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
@@ -0,0 +1,230 @@
+"""
+Tool execution node for the agent: runs the tool calls of one model turn
+concurrently, under a global and per-tool concurrency cap, with a deadline per
+tool so one slow call (e.g. a Gmail search) can't hold up the whole turn.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.errors import GraphBubbleUp
+
+from agent_settings import parse_overrides
+from agent_tracing import tracer
+
+if TYPE_CHECKING:
+    from agent_tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+tool_max_concurrency = int(os.environ.get("TOOL_MAX_CONCURRENCY", 8))
+# Default cap for concurrent calls of the same tool (or toolkit, see TOOL_CONCURRENCY)
+tool_max_per_tool = int(os.environ.get("TOOL_MAX_PER_TOOL", 4))
+tool_timeout = float(os.environ.get("TOOL_TIMEOUT", 30))
+# Per-tool or per-toolkit overrides, keyed by tool name ("Gmail_ListEmails") or toolkit ("Gmail")
+tool_concurrency = parse_overrides(os.environ.get("TOOL_CONCURRENCY"), int)
+tool_timeouts = parse_overrides(os.environ.get("TOOL_TIMEOUTS"))
+
+INVALID_TOOL_MESSAGE = "Error: {name} is not a valid tool, try one of [{available}]."
+TOOL_ERROR_MESSAGE = "Error: {error!r}\n Please fix your mistakes."
+INVALID_ARGS_MESSAGE = (
+    "Error: the arguments for {name} could not be parsed ({error}). "
+    "Call it again with the arguments as a JSON object."
+)
+TIMEOUT_MESSAGE = (
+    "Error: {name} did not finish within {timeout:g}s and was abandoned. "
+    "Other tool results from this step are still available; retry with a narrower "
+    "request or continue without this result."
+)
+
+
+class ToolLatency:
+    """Per-tool latency, error and timeout counters."""
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.timeouts = defaultdict(int)
+        self.total_s = defaultdict(float)
+        self.max_s = defaultdict(float)
+
+    def record(self, name: str, elapsed: float, status: str) -> None:
+        self.calls[name] += 1
+        self.total_s[name] += elapsed
+        self.max_s[name] = max(self.max_s[name], elapsed)
+        if status == "timeout":
+            self.timeouts[name] += 1
+        elif status == "error":
+            self.errors[name] += 1
+
+    def summary(self) -> dict:
+        return {
+            name: {
+                "calls": calls,
+                "errors": self.errors[name],
+                "timeouts": self.timeouts[name],
+                "mean_s": round(self.total_s[name] / calls, 4),
+                "max_s": round(self.max_s[name], 4),
+            }
+            for name, calls in self.calls.items()
+        }
+
+
+class ParallelToolNode:
+    """
+    Drop-in replacement for the prebuilt `ToolNode` for the agent's tools.
+
+    Every tool call of the last AI message starts at once; a global semaphore and
+    one per tool (or toolkit) bound how many actually run. A call that exceeds its
+    deadline is reported back to the model as an error `ToolMessage` while the
+    results of the other calls are kept. Sync tools run on the default executor,
+    so an abandoned call finishes in the background and its result is dropped.
+    Calls whose arguments didn't parse (`invalid_tool_calls`) get an error
+    `ToolMessage` as well, so every call id the model sent is answered.
+
+    Interrupts raised by a tool (e.g. Arcade's authorization `NodeInterrupt`) are
+    re-raised once every call has settled, as with `ToolNode`. With a `cache`,
+    allow-listed tools are answered from it per user, and other tools invalidate it.
+    """
+
+    def __init__(
+        self,
+        tools: list[BaseTool],
+        max_concurrency: int = tool_max_concurrency,
+        max_per_tool: int = tool_max_per_tool,
+        timeout: float = tool_timeout,
+        concurrency: dict | None = None,
+        timeouts: dict | None = None,
+        cache: "ToolResultCache | None" = None,
+    ):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_concurrency = max_concurrency
+        self.max_per_tool = max_per_tool
+        self.timeout = timeout
+        self.concurrency = tool_concurrency if concurrency is None else concurrency
+        self.timeouts = tool_timeouts if timeouts is None else timeouts
+        self.cache = cache
+        self.latency = ToolLatency()
+        # asyncio semaphores belong to one event loop; keep a set per loop
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _setting(self, overrides: dict, name: str, default):
+        # Exact tool name first, then its toolkit ("Gmail_ListEmails" -> "Gmail")
+        if name in overrides:
+            return overrides[name], name
+        toolkit = name.split("_", 1)[0]
+        if toolkit in overrides:
+            return overrides[toolkit], toolkit
+        return default, name
+
+    def _limits(self, name: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = {None: asyncio.Semaphore(self.max_concurrency)}
+            self._semaphores[loop] = semaphores
+        limit, key = self._setting(self.concurrency, name, self.max_per_tool)
+        if key not in semaphores:
+            semaphores[key] = asyncio.Semaphore(limit)
+        return semaphores[None], semaphores[key]
+
+    async def __call__(self, state: dict, config: RunnableConfig) -> dict:
+        message = next(
+            (m for m in reversed(state["messages"]) if isinstance(m, AIMessage)), None
+        )
+        if message is None:
+            raise ValueError("No AIMessage found in input")
+
+        results = await asyncio.gather(
+            *(self._run_one(call, config) for call in message.tool_calls),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        # Every call the model made needs an answer, or the next model request is rejected
+        for call in message.invalid_tool_calls:
+            results.append(
+                ToolMessage(
+                    INVALID_ARGS_MESSAGE.format(name=call["name"], error=call.get("error")),
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+            )
+        return {"messages": results}
+
+    async def _run_one(self, call: dict, config: RunnableConfig) -> ToolMessage:
+        name = call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            content = INVALID_TOOL_MESSAGE.format(
+                name=name, available=", ".join(self.tools_by_name)
+            )
+            return ToolMessage(content, name=name, tool_call_id=call["id"], status="error")
+
+        user_id = config.get("configurable", {}).get("user_id")
+        generation = None
+        if self.cache is not None:
+            cached = self.cache.get(user_id, name, call["args"])
+            if cached is not None:
+                return cached.model_copy(
+                    update={
+                        # A fresh id, or the graph would treat it as the earlier message
+                        "id": None,
+                        "tool_call_id": call["id"],
+                        "response_metadata": {"cached": True},
+                    }
+                )
+            generation = self.cache.generation(user_id, name)
+
+        timeout, _ = self._setting(self.timeouts, name, self.timeout)
+        global_limit, tool_limit = self._limits(name)
+        async with global_limit, tool_limit:
+            with tracer.span("tool", labels={"tool": name}) as span:
+                start = time.perf_counter()
+                status = "success"
+                try:
+                    response = await asyncio.wait_for(
+                        tool.ainvoke({**call, "type": "tool_call"}, config), timeout
+                    )
+                except GraphBubbleUp:
+                    status = "interrupted"
+                    raise
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    response = ToolMessage(
+                        TIMEOUT_MESSAGE.format(name=name, timeout=timeout),
+                        name=name,
+                        tool_call_id=call["id"],
+                        status="error",
+                    )
+                except Exception as e:
+                    status = "error"
+                    response = ToolMessage(
+                        TOOL_ERROR_MESSAGE.format(error=e),
+                        name=name,
+                        tool_call_id=call["id"],
+                        status="error",
+                    )
+                finally:
+                    elapsed = time.perf_counter() - start
+                    self.latency.record(name, elapsed, status)
+                    span.attributes["result"] = status
+                    logger.info("tool %s: %s in %.3fs", name, status, elapsed)
+
+        response.response_metadata["latency_s"] = round(elapsed, 4)
+        if self.cache is not None:
+            if self.cache.cacheable(name):
+                self.cache.put(user_id, name, call["args"], response, generation)
+            else:
+                self.cache.note_mutation(user_id, name)
+        return response
@@ -0,0 +1,72 @@
+# File: src/tools/calendar_tool.py
+# Description: A LangChain tool that schedules an activity in the user's Google Calendar.
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from langchain_core.tools import BaseTool, tool
+from langgraph.types import interrupt
+
+from src.models import ActivityWindow
+from src.services.google_calendar import GoogleCalendarService
+
+
+def busy_message(calendar: GoogleCalendarService, window: ActivityWindow) -> str:
+    day = window.start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    free = calendar.free_windows(
+        day, day + timedelta(days=1), min_duration=window.end_time - window.start_time
+    )
+    slots = ", ".join(f"{start:%H:%M}-{end:%H:%M}" for start, end in free) or "none"
+    return (
+        f"Not created: the calendar is already busy between {window.start_time:%H:%M} and "
+        f"{window.end_time:%H:%M} on {day:%a %d %b}. Free slots that day: {slots}."
+    )
+
+
+def parse_time(value: str, timezone: str) -> datetime:
+    """An ISO 8601 date-time; one without an offset is read in `timezone` (unless "auto")."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None and timezone != "auto":
+        moment = moment.replace(tzinfo=ZoneInfo(timezone))
+    return moment
+
+
+def build_calendar_tools(calendar: GoogleCalendarService) -> list[BaseTool]:
+    @tool
+    async def create_calendar_event(
+        summary: str, start_time: str, end_time: str, timezone: str = "auto"
+    ) -> str:
+        """
+        Creates a calendar event for an activity. `start_time` and `end_time` are ISO
+        8601 date-times (e.g. "2025-10-18T10:00:00+02:00"), and `timezone` is the IANA
+        zone of the activity's location (e.g. "Europe/Paris"). If the slot is already
+        taken, nothing is created and the free slots of that day are listed instead.
+        The user is asked to confirm before anything is booked.
+        """
+        window = ActivityWindow(
+            start_time=parse_time(start_time, timezone),
+            end_time=parse_time(end_time, timezone),
+            summary="Planned by Kai",
+        )
+        # Incremental sync of the local busy index, then the check costs no request
+        await calendar.arefresh()
+        if not calendar.is_free(window):
+            return busy_message(calendar, window)
+        # Pause the run until the user confirms; the caller resumes it with
+        # `Command(resume=True)` to book, anything else leaves the calendar untouched.
+        confirmed = interrupt(
+            {
+                "type": "confirmation",
+                "action": "create_calendar_event",
+                "summary": summary,
+                "start_time": window.start_time.isoformat(),
+                "end_time": window.end_time.isoformat(),
+                "timezone": timezone,
+            }
+        )
+        if confirmed is not True:
+            return "Not created: the user did not confirm the booking."
+        event_id = await calendar.acreate_event(window, summary, timezone)
+        return f"Created event {event_id}: {summary} from {start_time} to {end_time}."
+
+    return [create_calendar_event]
@@ -0,0 +1,289 @@
+# File: src/tools/weather_prefetch.py
+# Description: Speculatively geocodes and fetches forecasts for the cities a user message mentions,
+#              while the model is still deciding which tool to call.
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+
+from langchain_core.messages import AnyMessage
+
+from src.models import Location
+from src.services.forecast_request import ForecastRequest, shape_forecast_request
+from src.services.geocoding_cache import GeocodingCache
+from src.services.geocoding_client import GeocodingClient
+from src.services.open_meteo_client import OpenMeteoClient
+from src.tools.weather_report_tool import WEATHER_TOOLS, activity_window_request
+
+logger = logging.getLogger(__name__)
+
+_NAME = r"[A-Z][\w'.-]*(?:\s+[A-Z][\w'.-]*)*"
+# "in Paris", "for New York", "and Rome" (after a first city)
+_CITY_AFTER = re.compile(rf"\b(?:in|for|at|near|around|to|visiting)\s+({_NAME})")
+_MORE_CITIES = re.compile(rf"^\s*(?:,|and|or|vs\.?|versus)\s+({_NAME})")
+# A reply that is only a place name, as when the assistant asked "which city?"
+_ONLY_NAME = re.compile(rf"^\s*({_NAME})\s*[.!?]?\s*$")
+_TIME_RANGE = re.compile(
+    r"\b(tonight|this evening|today|tomorrow|(?:this |next )?weekend|next \d+ days?"
+    r"|\d+ days?|right now|now)\b"
+)
+_ACTIVITY = re.compile(r"\b((?:walk|bik|cycl|run|hik|beach|picnic)\w*(?:\s+ride)?)\b")
+_WINDOW_INTENT = re.compile(
+    r"\b(?:best|good|ideal|right) (?:time|slot|window)|\bwhen (?:should|can|could|is)\b"
+    r"|\bfind (?:a|the|me a) (?:time|slot|window)"
+)
+_NOT_CITIES = {
+    "I", "I'm", "I'd", "Hi", "Hey", "Hello", "Please", "Thanks", "Yes", "No", "What",
+    "What's", "How", "How's", "Will", "Is", "Should", "Can", "Could", "Find", "Compare",
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+}
+
+
+@dataclass
+class _Prefetch:
+    task: asyncio.Task
+    started_at: float = field(default_factory=time.monotonic)
+    claimed: bool = False
+    # What to fetch once a geocode is in (only used for location prefetches)
+    guesses: list["PrefetchGuess"] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class PrefetchGuess:
+    """A city and the forecast slice the weather tools will most likely ask for."""
+
+    city: str
+    time_range: str | None = None
+    activity: str | None = None
+    window: bool = False
+
+
+def guess_requests(messages: list[AnyMessage], max_cities: int = 3) -> list[PrefetchGuess]:
+    """
+    Reads candidate cities, a time range and an activity from the latest user
+    message. Anything it doesn't name is taken from the user's previous message
+    ("I want a walk tonight." / "Shanghai") or, for the city, the last weather
+    tool call in the conversation ("And tomorrow?").
+    """
+    humans = [str(m.content) for m in messages if m.type == "human"][-2:]
+    if not humans:
+        return []
+    latest = humans[-1]
+    named = _cities(latest)[:max_cities]
+    # A message naming neither a place nor a time ("Please schedule it") isn't a lookup
+    if not named and not _TIME_RANGE.search(latest.lower()):
+        return []
+    cities = named or _last_tool_city(messages)
+
+    def find(pattern: re.Pattern) -> str | None:
+        for text in reversed(humans):
+            match = pattern.search(text.lower())
+            if match:
+                return match.group(1)
+        return None
+
+    time_range, activity = find(_TIME_RANGE), find(_ACTIVITY)
+    window = any(_WINDOW_INTENT.search(text.lower()) for text in humans)
+    return [PrefetchGuess(city, time_range, activity, window) for city in cities]
+
+
+def _cities(text: str) -> list[str]:
+    found = []
+    only = _ONLY_NAME.match(text)
+    if only:
+        found.append(only.group(1))
+    for match in _CITY_AFTER.finditer(text):
+        found.append(match.group(1))
+        rest = text[match.end() :]
+        while more := _MORE_CITIES.match(rest):
+            found.append(more.group(1))
+            rest = rest[more.end() :]
+    cities = []
+    for city in found:
+        # Trailing day names ("Paris Saturday") aren't part of the place
+        words = [w for w in city.split() if w not in _NOT_CITIES]
+        city = " ".join(words).rstrip(".")
+        if city and city not in cities:
+            cities.append(city)
+    return cities
+
+
+def _forecast_key(location_key: str, request: ForecastRequest) -> tuple:
+    # The fetched payload depends only on these; the hours shown are trimmed per request
+    return (location_key, tuple(sorted(request.variables)), request.cache_window())
+
+
+def _last_tool_city(messages: list[AnyMessage]) -> list[str]:
+    for msg in reversed(messages):
+        for call in getattr(msg, "tool_calls", None) or []:
+            if call["name"] in WEATHER_TOOLS and call["args"].get("city"):
+                return [call["args"]["city"]]
+    return []
+
+
+class WeatherPrefetcher:
+    """
+    Starts geocoding and forecast fetches for the cities a turn is likely about
+    as soon as the user message arrives, so they overlap the first model call.
+    The weather tools `claim` a matching fetch instead of making their own.
+
+    A claimed fetch serves only the turn it was started for. Fetches nobody claims
+    within `ttl` seconds count as wasted; `stats` and `hit_rate` show how often
+    the guess matched, to tune the speculation.
+    """
+
+    def __init__(
+        self,
+        geocoding_client: GeocodingClient,
+        open_meteo_client: OpenMeteoClient,
+        now=None,
+        ttl: float = 60.0,
+        max_cities: int = 3,
+    ):
+        self.geocoding_client = geocoding_client
+        self.open_meteo_client = open_meteo_client
+        self.now = now or datetime.now
+        self.ttl = ttl
+        self.max_cities = max_cities
+        self._locations: dict[str, _Prefetch] = {}
+        self._forecasts: dict[tuple, _Prefetch] = {}
+        self.stats = {
+            "geocode_started": 0,
+            "forecast_started": 0,
+            "geocode_hits": 0,
+            "forecast_hits": 0,
+            "geocode_misses": 0,
+            "forecast_misses": 0,
+            # Hits whose fetch had already finished when the tool asked
+            "ready_hits": 0,
+            "wasted": 0,
+            "errors": 0,
+        }
+
+    def start(self, messages: list[AnyMessage]) -> int:
+        """
+        Starts geocoding for the latest user message; returns how many were started.
+        Each forecast fetch starts as soon as its geocode is in, since the request's
+        dates depend on the location's timezone.
+        """
+        self._expire()
+        started = 0
+        for guess in guess_requests(messages, self.max_cities):
+            key = GeocodingCache.normalize_key(guess.city)
+            if key not in self._locations:
+                self._locations[key] = self._spawn(self._locate(guess.city))
+                self.stats["geocode_started"] += 1
+                started += 1
+            if guess.time_range is not None:
+                prefetch = self._locations[key]
+                prefetch.guesses.append(guess)
+                prefetch.task.add_done_callback(partial(self._plan_forecast, key, guess))
+        return started
+
+    def request_for(
+        self,
+        time_range: str,
+        activity: str | None,
+        window: bool = False,
+        timezone: str | None = None,
+    ) -> ForecastRequest:
+        if window:
+            return activity_window_request(time_range, activity, self.now(), timezone)
+        return shape_forecast_request(time_range, activity, self.now(), timezone)
+
+    def claim_location(self, city: str) -> asyncio.Future | None:
+        """The prefetched geocoding result for `city`, or None if there is none."""
+        key = GeocodingCache.normalize_key(city)
+        prefetch = self._locations.get(key)
+        if prefetch is not None and prefetch.task.done():
+            # Awaiting a finished task doesn't yield, so the tool would ask for the
+            # forecast before the done callbacks started it; plan it now instead.
+            for guess in prefetch.guesses:
+                self._plan_forecast(key, guess, prefetch.task)
+        return self._claim(prefetch, "geocode")
+
+    def claim_forecast(self, city: str, request: ForecastRequest) -> asyncio.Future | None:
+        """The prefetched forecast for `city` with the variables and window of `request`, or None."""
+        key = _forecast_key(GeocodingCache.normalize_key(city), request)
+        return self._claim(self._forecasts.get(key), "forecast")
+
+    def hit_rate(self) -> float:
+        hits = self.stats["geocode_hits"] + self.stats["forecast_hits"]
+        lookups = hits + self.stats["geocode_misses"] + self.stats["forecast_misses"]
+        return hits / lookups if lookups else 0.0
+
+    def flush(self) -> None:
+        """Counts every outstanding unclaimed fetch as wasted (e.g. before reporting)."""
+        self._expire(max_age=0.0)
+
+    async def _locate(self, city: str) -> dict:
+        return await self.geocoding_client.afetch_coordinates(city)
+
+    def _plan_forecast(self, key: str, guess: PrefetchGuess, locate: asyncio.Task) -> None:
+        if locate.cancelled() or locate.exception() is not None:
+            return
+        result = locate.result()
+        location = Location(
+            name=result.get("name"),
+            latitude=result["latitude"],
+            longitude=result["longitude"],
+            timezone=result.get("timezone", "auto"),
+        )
+        try:
+            request = self.request_for(
+                guess.time_range, guess.activity, guess.window, location.timezone
+            )
+        except ValueError:
+            return
+        forecast_key = _forecast_key(key, request)
+        if forecast_key not in self._forecasts:
+            self._forecasts[forecast_key] = self._spawn(
+                self.open_meteo_client.afetch_forecast(location, request)
+            )
+            self.stats["forecast_started"] += 1
+
+    def _spawn(self, coro) -> _Prefetch:
+        task = asyncio.get_running_loop().create_task(coro)
+        task.add_done_callback(self._finished)
+        return _Prefetch(task)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        # Retrieve the error so unclaimed failures don't warn; a claimer re-raises it
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+            logger.debug("weather prefetch failed: %s", task.exception())
+
+    def _claim(self, prefetch: _Prefetch | None, kind: str) -> asyncio.Future | None:
+        if prefetch is None:
+            self.stats[f"{kind}_misses"] += 1
+            return None
+        prefetch.claimed = True
+        self.stats[f"{kind}_hits"] += 1
+        if prefetch.task.done():
+            self.stats["ready_hits"] += 1
+        # A tool timing out must not cancel the fetch for other claimers
+        return asyncio.shield(prefetch.task)
+
+    def _expire(self, max_age: float | None = None) -> None:
+        """
+        Drops fetches that have served their turn (claimed and finished), so the next
+        turn fetches fresh data, and unclaimed ones older than `max_age`.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        cutoff = time.monotonic() - max_age
+        for entries in (self._locations, self._forecasts):
+            stale = [
+                key
+                for key, p in entries.items()
+                if (p.claimed and p.task.done()) or (not p.claimed and p.started_at <= cutoff)
+            ]
+            for key in stale:
+                prefetch = entries.pop(key)
+                if not prefetch.claimed:
+                    self.stats["wasted"] += 1
+                    if not prefetch.task.done():
+                        prefetch.task.cancel()
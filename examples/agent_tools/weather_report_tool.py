@@ -0,0 +1,125 @@
+# File: src/tools/weather_report_tool.py
+# Description: LangChain tools that fetch a shaped forecast for a city and rank activity windows.
+
+from dataclasses import replace
+from datetime import datetime, time, timedelta
+from typing import TYPE_CHECKING
+
+from langchain_core.tools import BaseTool, tool
+
+from src.models import Location
+from src.services.forecast_columns import ColumnarForecast
+from src.services.forecast_request import (
+    ALL_VARIABLES,
+    ForecastRequest,
+    local_now,
+    shape_forecast_request,
+    summarize_for_prompt,
+)
+from src.services.geocoding_client import GeocodingClient
+from src.services.open_meteo_client import OpenMeteoClient
+
+if TYPE_CHECKING:
+    from src.tools.weather_prefetch import WeatherPrefetcher
+
+# Tools whose `city` argument names the place a conversation is about
+WEATHER_TOOLS = ("get_weather_data", "find_activity_window")
+
+
+def activity_window_request(
+    time_range: str, activity: str | None, now: datetime, timezone: str | None = None
+) -> ForecastRequest:
+    # Window scoring needs every variable at hourly resolution.
+    return replace(
+        shape_forecast_request(time_range, activity, now, timezone),
+        variables=ALL_VARIABLES,
+        resolution="hourly_1",
+    )
+
+
+def window_bounds(request: ForecastRequest, now: datetime) -> tuple[datetime, datetime]:
+    """
+    The span activity windows may fall in: the requested days and hours, but
+    never before `now` (the location's wall-clock time, naive like the forecast).
+    """
+    if request.start_date is None:
+        return now, now + timedelta(hours=request.forecast_hours or 24)
+    start = datetime.combine(request.start_date, time(request.start_hour))
+    end = datetime.combine(request.end_date or request.start_date, time()) + timedelta(
+        hours=request.end_hour
+    )
+    return max(start, now), end
+
+
+def build_weather_tools(
+    geocoding_client: GeocodingClient,
+    open_meteo_client: OpenMeteoClient,
+    now=None,
+    prefetcher: "WeatherPrefetcher | None" = None,
+) -> list[BaseTool]:
+    """
+    Builds the weather tools around the given clients. `now` (a callable returning
+    a datetime) pins "today" for reproducible runs; it defaults to the wall clock.
+    With a `prefetcher`, fetches it already started for the turn are reused.
+    """
+    now = now or datetime.now
+
+    async def locate(city: str) -> Location:
+        pending = prefetcher.claim_location(city) if prefetcher else None
+        if pending is not None:
+            result = await pending
+        else:
+            result = await geocoding_client.afetch_coordinates(city)
+        return Location(
+            name=result.get("name", city),
+            latitude=result["latitude"],
+            longitude=result["longitude"],
+            timezone=result.get("timezone", "auto"),
+        )
+
+    async def fetch(city: str, location: Location, request: ForecastRequest) -> dict:
+        pending = prefetcher.claim_forecast(city, request) if prefetcher else None
+        if pending is not None:
+            return await pending
+        return await open_meteo_client.afetch_forecast(location, request)
+
+    @tool
+    async def get_weather_data(city: str, time_range: str, activity: str | None = None) -> str:
+        """
+        Gets the forecast for a city over a time range such as "tonight", "tomorrow",
+        "this weekend" or "next 3 days", as a compact hourly table. Pass the planned
+        activity (e.g. "city walk", "bike ride") to get only the relevant variables.
+        """
+        location = await locate(city)
+        request = shape_forecast_request(time_range, activity, now(), location.timezone)
+        payload = await fetch(city, location, request)
+        return f"{location.name}:\n{summarize_for_prompt(payload, request)}"
+
+    @tool
+    async def find_activity_window(
+        city: str, time_range: str, activity: str, duration_hours: int = 2
+    ) -> str:
+        """
+        Finds the best times in a time range (e.g. "this weekend") for an outdoor
+        activity lasting `duration_hours`, ranked by weather comfort.
+        """
+        location = await locate(city)
+        current = local_now(location.timezone, now())
+        request = activity_window_request(time_range, activity, current)
+        payload = await fetch(city, location, request)
+        forecast = ColumnarForecast.from_payload(payload)
+        start, end = window_bounds(request, current)
+        candidates = forecast.find_activity_windows(duration_hours, start=start, end=end)
+        if not candidates:
+            return f"No {duration_hours}-hour window with suitable weather in {location.name}."
+        lines = [f"Best times for {activity} in {location.name}:"]
+        for candidate in candidates:
+            window = candidate.to_activity_window()
+            lines.append(
+                f"- {window.start_time:%a %d %b %H:%M}-{window.end_time:%H:%M} "
+                f"({window.start_time.isoformat()} to {window.end_time.isoformat()}): "
+                f"{window.summary}"
+            )
+        return "\n".join(lines)
+
+    return [get_weather_data, find_activity_window]
@@ -0,0 +1,410 @@
+"""
+Lightweight, offline instrumentation for the agent: nested spans for graph
+nodes and external calls, latency histograms and counters, a JSONL span
+exporter and a Prometheus-style text endpoint.
+
+Every span updates an in-process histogram (a bisect and a few additions);
+spans are only serialized when `TRACE_JSONL` is set, and then only the sampled
+fraction `TRACE_SAMPLE_RATE`, so it is cheap enough to leave on.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.errors import GraphBubbleUp
+
+trace_jsonl = os.environ.get("TRACE_JSONL")
+trace_sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+metrics_port = int(os.environ.get("METRICS_PORT", 0))
+# Time the weather service clients' HTTP calls; only for deployments that ship them
+trace_http = os.environ.get("TRACE_HTTP", "0") == "1"
+
+# Seconds; wide enough for both a cache hit and a slow tool call
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)  # fmt: skip
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "agent_span", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as in the Prometheus text format."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (an estimate)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Span:
+    def __init__(self, name: str, labels: dict, attributes: dict, parent: "Span | None"):
+        self.name = name
+        self.labels = labels
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        else:
+            # Sampling is decided once per trace, so exported traces are complete
+            self.trace_id = uuid.uuid4().hex
+            self.parent_id = None
+            self.sampled = random.random() < trace_sample_rate
+        self.start = time.time()
+        self.duration = 0.0
+        self.status = "ok"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_s": round(self.duration, 6),
+            "status": self.status,
+            **({"labels": self.labels} if self.labels else {}),
+            **({"attributes": self.attributes} if self.attributes else {}),
+        }
+
+
+class Tracer:
+    """Collects spans, histograms and counters; exports spans to JSONL and metrics as text."""
+
+    def __init__(self, jsonl_path: str | None = trace_jsonl, flush_every: int = 64):
+        self.jsonl_path = jsonl_path
+        self.flush_every = flush_every
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, float] = {}
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        # Called with every finished span (e.g. by benchmarks collecting exact samples)
+        self.listeners: list = []
+
+    @contextmanager
+    def span(self, name: str, labels: dict | None = None, **attributes) -> Iterator[Span]:
+        """
+        Times a block as a span nested under the current one. `labels` become
+        histogram labels (keep them low-cardinality); `attributes` are only exported.
+        """
+        span = Span(name, labels or {}, attributes, _current_span.get())
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except GraphBubbleUp:
+            # Interrupts are control flow (e.g. waiting for authorization), not failures
+            span.status = "interrupted"
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self._finish(span)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def histogram(self, name: str, **labels) -> Histogram | None:
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def _finish(self, span: Span) -> None:
+        self.observe(
+            "agent_span_duration_seconds",
+            span.duration,
+            span=span.name,
+            status=span.status,
+            **span.labels,
+        )
+        for listener in self.listeners:
+            listener(span)
+        if not (self.jsonl_path and span.sampled):
+            return
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every or span.parent_id is None:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._buffer and self.jsonl_path:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._buffer) + "\n")
+        self._buffer.clear()
+
+    def render_prometheus(self) -> str:
+        """Current metrics in the Prometheus text exposition format."""
+        lines, typed = [], set()
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+            snapshots = [
+                (key, list(h.counts), h.count, h.sum, h.buckets) for key, h in histograms
+            ]
+        for (name, labels), counts, count, total, buckets in sorted(snapshots, key=_sort_key):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {count}')
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters, key=_sort_key):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves `GET /metrics` on a daemon thread (idempotent)."""
+        if self._server is not None:
+            return self._server
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(
+            target=self._server.serve_forever, name="agent-metrics", daemon=True
+        ).start()
+        return self._server
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._buffer.clear()
+
+
+def _sort_key(entry) -> tuple:
+    name, labels = entry[0]
+    return name, str(labels)
+
+
+def _labels(labels: tuple, **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+tracer = Tracer()
+
+
+def traced_node(name: str, node):
+    """
+    Wraps a graph node (function or callable object) in a span. The wrapper keeps
+    the node's signature, so LangGraph still injects `config`, `writer` and `store`.
+    """
+    # Plain and partial coroutine functions, or objects with an async __call__
+    is_async = inspect.iscoroutinefunction(node) or inspect.iscoroutinefunction(
+        getattr(node, "__call__", None)
+    )
+    if is_async:
+
+        @functools.wraps(node)
+        async def wrapper(*args, **kwargs):
+            with tracer.span("node", labels={"node": name}):
+                return await node(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(node)
+        def wrapper(*args, **kwargs):
+            with tracer.span("node", labels={"node": name}):
+                return node(*args, **kwargs)
+
+    return wrapper
+
+
+class TracedCheckpointer(BaseCheckpointSaver):
+    """Checkpointer proxy that times every read and write of the wrapped saver."""
+
+    def __init__(self, saver: BaseCheckpointSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    def get_tuple(self, config):
+        with tracer.span("checkpoint", labels={"op": "get"}):
+            return self.saver.get_tuple(config)
+
+    def list(self, config, **kwargs):
+        return self.saver.list(config, **kwargs)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with tracer.span("checkpoint", labels={"op": "put"}):
+            return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with tracer.span("checkpoint", labels={"op": "put_writes"}):
+            return self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        return self.saver.delete_thread(thread_id)
+
+    async def aget_tuple(self, config):
+        with tracer.span("checkpoint", labels={"op": "get"}):
+            return await self.saver.aget_tuple(config)
+
+    async def alist(self, config, **kwargs):
+        async for item in self.saver.alist(config, **kwargs):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with tracer.span("checkpoint", labels={"op": "put"}):
+            return await self.saver.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with tracer.span("checkpoint", labels={"op": "put_writes"}):
+            return await self.saver.aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await self.saver.adelete_thread(thread_id)
+
+
+def record_generation(metrics: dict, usage: dict | None, model: str | None) -> None:
+    """Records a model call's timings and token counts from `ChunkAggregator.metrics()`."""
+    labels = {"model": model or "unknown"}
+    tracer.observe("agent_model_ttft_seconds", metrics["time_to_first_token_s"], **labels)
+    if usage:
+        tracer.count("agent_tokens_total", usage.get("input_tokens", 0), kind="input", **labels)
+        tracer.count("agent_tokens_total", usage.get("output_tokens", 0), kind="output", **labels)
+    else:
+        tracer.count("agent_tokens_total", metrics["output_tokens"], kind="output", **labels)
+
+
+def httpx_event_hooks() -> tuple[dict, dict]:
+    """
+    Event hooks for the shared httpx clients (sync, async) that record one
+    histogram sample per request, labelled by host, method and status. The
+    response hook runs once headers arrive, so this measures time to first byte.
+    """
+
+    def on_request(request):
+        request.extensions["trace_start"] = time.perf_counter()
+
+    def on_response(response):
+        request = response.request
+        started = request.extensions.get("trace_start")
+        if started is None:
+            return
+        tracer.observe(
+            "agent_http_client_seconds",
+            time.perf_counter() - started,
+            host=request.url.host,
+            method=request.method,
+            status=response.status_code,
+        )
+
+    async def aon_request(request):
+        on_request(request)
+
+    async def aon_response(response):
+        on_response(response)
+
+    return (
+        {"request": [on_request], "response": [on_response]},
+        {"request": [aon_request], "response": [aon_response]},
+    )
+
+
+def instrument_http_transport() -> bool:
+    """
+    Installs the httpx hooks on the shared service transport (src.services.http_transport).
+    Returns False, changing nothing, when the service package isn't importable here.
+    """
+    from dataclasses import replace
+
+    try:
+        from src.services.http_transport import configure_transport, get_transport_config
+    except ImportError:
+        return False
+
+    event_hooks, async_event_hooks = httpx_event_hooks()
+    configure_transport(
+        replace(
+            get_transport_config(),
+            event_hooks=event_hooks,
+            async_event_hooks=async_event_hooks,
+        )
+    )
+    return True
+
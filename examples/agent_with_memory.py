@@ -1,17 +1,30 @@
 from langchain_arcade import ToolManager
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.store.postgres import AsyncPostgresStore
 from langgraph.store.base import BaseStore
 from langgraph.graph import END, START, MessagesState, StateGraph
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
+from langgraph.types import Command, interrupt
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 
+from arcadepy.types import ToolDefinition
 from dotenv import load_dotenv
+
+from agent_auth import AuthStatusCache
+from agent_checkpoints import CompactPostgresSaver, checkpoint_serde
+from agent_context import compact_history
+from agent_memory import format_memories, memory_retriever, remember_later
+from agent_response_cache import response_cache
+from agent_streaming import ChunkAggregator
+from agent_tool_cache import ToolResultCache
+from agent_tool_executor import ParallelToolNode
+from agent_tracing import TracedCheckpointer, record_generation, traced_node, tracer
+import asyncio
+import functools
+import json
 import sys
 import os
-import uuid
+import time
 
 # Load in the environment variables
 load_dotenv()
@@ -20,159 +33,389 @@ openai_api_key = os.environ.get("OPENAI_API_KEY")
 model_choice = os.environ.get("MODEL_CHOICE")
 email = os.environ.get("EMAIL")
 database_url = os.environ.get("DATABASE_URL")
-
-# Initialize the tool manager and fetch tools
-manager = ToolManager(api_key=arcade_api_key)
-manager.init_tools(toolkits=["Gmail", "Asana"])
-
-# convert to langchain tools and use interrupts for auth
-tools = manager.to_langchain(use_interrupts=True)
-
-# Initialize the prebuilt tool node
-tool_node = ToolNode(tools)
-
-# Create a language model instance and bind it with the tools
-model = ChatOpenAI(model=model_choice, api_key=openai_api_key)
-model_with_tools = model.bind_tools(tools)
+# Optional on-disk cache of Arcade tool schemas so startup needs no network round trip
+tool_schema_cache = os.environ.get("TOOL_SCHEMA_CACHE")
+tool_schema_cache_ttl = float(os.environ.get("TOOL_SCHEMA_CACHE_TTL", 24 * 3600))
+
+TOOLKITS = ["Gmail", "Asana"]
+
+
+class AgentState(MessagesState):
+    # Running summary of turns compacted out of `messages`
+    summary: str
+    # Authorization requests whose links were sent and that haven't completed yet
+    pending_auth: list[dict]
+
+
+# Everything below is created on first use and memoized, so importing this
+# module (e.g. from the Streamlit app) doesn't pay for network calls or compilation.
+@functools.cache
+def get_manager() -> ToolManager:
+    # Initialize the tool manager and fetch tools
+    manager = ToolManager(api_key=arcade_api_key)
+    if not _load_tool_schemas(manager):
+        manager.init_tools(toolkits=TOOLKITS)
+        _save_tool_schemas(manager)
+    return manager
+
+
+@functools.cache
+def get_auth_cache() -> AuthStatusCache:
+    # Auth requirements and per-user authorization status, shared across turns
+    return AuthStatusCache(get_manager())
+
+
+@functools.cache
+def get_tools():
+    # convert to langchain tools and use interrupts for auth
+    return get_manager().to_langchain(use_interrupts=True)
+
+
+@functools.cache
+def get_tool_node() -> ParallelToolNode:
+    # Runs the tool calls of a turn concurrently, with concurrency caps and deadlines;
+    # read-only tools listed in TOOL_RESULT_CACHE are answered from a per-user cache
+    cache = ToolResultCache()
+    return ParallelToolNode(get_tools(), cache=cache if cache.ttls else None)
+
+
+@functools.cache
+def get_model() -> ChatOpenAI:
+    # stream_usage makes the final chunk carry token counts for the generation metrics
+    return ChatOpenAI(model=model_choice, api_key=openai_api_key, stream_usage=True)
+
+
+@functools.cache
+def get_model_with_tools():
+    # Bind the language model with the tools
+    return get_model().bind_tools(get_tools())
+
+
+def _load_tool_schemas(manager: ToolManager) -> bool:
+    """Fills the manager from the schema cache file if it is fresh and matches TOOLKITS."""
+    if not tool_schema_cache or not os.path.exists(tool_schema_cache):
+        return False
+    try:
+        with open(tool_schema_cache) as f:
+            cached = json.load(f)
+        if cached["toolkits"] != TOOLKITS:
+            return False
+        if time.time() - cached["saved_at"] > tool_schema_cache_ttl:
+            return False
+        # ToolManager has no public loader for definitions, so set its map directly
+        manager._tools = {
+            name: ToolDefinition.model_validate(definition)
+            for name, definition in cached["definitions"].items()
+        }
+        return len(manager._tools) > 0
+    except (OSError, KeyError, ValueError):
+        return False
+
+
+def _save_tool_schemas(manager: ToolManager) -> None:
+    if not tool_schema_cache:
+        return
+    cached = {
+        "toolkits": TOOLKITS,
+        "saved_at": time.time(),
+        "definitions": {
+            name: definition.model_dump(mode="json")
+            for name, definition in manager._tools.items()
+        },
+    }
+    tmp_path = f"{tool_schema_cache}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cached, f)
+    os.replace(tmp_path, tool_schema_cache)
 
 
 # Function to invoke the model and get a response
 async def call_agent(
-    state: MessagesState, writer, config: RunnableConfig, *, store: BaseStore
+    state: AgentState,
+    writer,
+    config: RunnableConfig,
+    *,
+    store: BaseStore,
+    model=None,
+    model_with_tools=None,
+    prefetcher=None,
 ):
-    messages = state["messages"]
+    # Injected by build_graph for tests and benchmarks; default to the configured model
+    model = model or get_model()
+    model_with_tools = model_with_tools or get_model_with_tools()
 
     # Get user_id from config
     user_id = config["configurable"].get("user_id").replace(".", "")
+    thread_id = config["configurable"].get("thread_id")
     namespace = ("memories", user_id)
 
     # Search for relevant memories based on the last user message
     last_user_message = None
-    for msg in reversed(messages):
+    for msg in reversed(state["messages"]):
         if isinstance(msg, HumanMessage) or (
             hasattr(msg, "type") and msg.type == "human"
         ):
             last_user_message = msg
             break
 
+    # On a new user message, start the lookups its tool calls will likely need so
+    # they run while the model is still deciding (see `WeatherPrefetcher`)
+    if prefetcher is not None and last_user_message is state["messages"][-1]:
+        prefetcher.start(state["messages"])
+
+    # Start memory retrieval now so it overlaps with context compaction; the result
+    # is cached for the rest of this turn (tool loops call this node repeatedly)
+    retrieval = None
+    if last_user_message:
+        retrieval = memory_retriever.search(
+            store,
+            namespace,
+            str(last_user_message.content),
+            thread_id=thread_id,
+            turn_id=last_user_message.id,
+        )
+
+    # Keep the prompt within the token budget; older turns are folded into the summary
+    with tracer.span("context.compact") as span:
+        messages, summary, removals = await compact_history(
+            state["messages"], state.get("summary", ""), model
+        )
+        span.attributes["compacted"] = len(removals)
+
     # Retrieve memories if there's a user message
     memories_str = ""
-    if last_user_message:
-        memories = await store.asearch(namespace, query=str(last_user_message.content))
+    if retrieval is not None:
+        # Only the time not already overlapped with compaction
+        with tracer.span("memory.wait"):
+            memories = await retrieval
         if memories:
-            memories_str = "\n".join([f"- {d.value['data']}" for d in memories])
+            memories_str = format_memories(memories)
 
-    # Build system message with memories
-    system_msg = (
-        f"You are a helpful AI assistant. User memories:\n{memories_str}"
-        if memories_str
-        else "You are a helpful AI assistant."
-    )
+    # Build system message with memories and the conversation summary
+    system_msg = "You are a helpful AI assistant."
+    if memories_str:
+        system_msg += f" User memories:\n{memories_str}"
+    if summary:
+        system_msg += f"\n\nSummary of the earlier conversation:\n{summary}"
 
     # Insert system message at the beginning if not already present
     messages_with_system = messages[:]
     if not messages or not isinstance(messages[0], SystemMessage):
         messages_with_system = [SystemMessage(content=system_msg)] + messages
 
-    # Check if user wants to remember something
-    if last_user_message and "remember" in str(last_user_message.content).lower():
+    # Check if user wants to remember something (only on the first pass of a turn)
+    if (
+        last_user_message
+        and state["messages"][-1] is last_user_message
+        and "remember" in str(last_user_message.content).lower()
+    ):
         # Extract what to remember (simple heuristic - you can make this more sophisticated)
         content = str(last_user_message.content)
-        # Store the entire message as a memory
-        await store.aput(namespace, str(uuid.uuid4()), {"data": content})
-
-    # Stream tokens using astream
-    full_content = ""
-    tool_calls = []
-
-    async for chunk in model_with_tools.astream(messages_with_system):
-        # Stream content tokens
-        if chunk.content:
-            writer(chunk.content)
-            full_content += chunk.content
-
-        # Accumulate tool calls
-        if hasattr(chunk, "tool_calls") and chunk.tool_calls:
-            # Filter out tool calls with empty name attribute
-            valid_tool_calls = [
-                tc for tc in chunk.tool_calls if tc.get("name", "").strip()
-            ]
-            tool_calls.extend(valid_tool_calls)
-
-    # Create the full response message with accumulated content and tool calls
-    response = AIMessage(content=full_content, tool_calls=tool_calls)
+        # Store the entire message as a memory, skipping (near-)duplicates; the
+        # write runs alongside the model call instead of ahead of it
+        remember_later(store, namespace, content)
 
-    # Return the updated message history
+    # Answers written from unchanged weather data are reused for the same (or a
+    # paraphrased) question instead of running the model over it again
+    cached = None
+    if last_user_message:
+        cached = response_cache.lookup(
+            user_id, state["messages"], str(last_user_message.content)
+        )
+    if cached is not None and cached.answer is not None:
+        tracer.count("agent_response_cache_total", result="hit")
+        writer(cached.answer)
+        response = AIMessage(
+            content=cached.answer,
+            response_metadata={"response_cache": round(cached.similarity, 3)},
+        )
+        if removals:
+            return {"messages": removals + [response], "summary": summary}
+        return {"messages": [response]}
+
+    # Stream tokens using astream, merging chunks and tool-call fragments as they arrive
+    aggregator = ChunkAggregator()
+    model_name = getattr(model, "model_name", None) or model_choice
+    with tracer.span("model.generate", model=model_name) as span:
+        async for chunk in model_with_tools.astream(messages_with_system):
+            text = aggregator.add(chunk)
+            # Stream content tokens
+            if text:
+                writer(text)
+
+        # Create the full response message with accumulated content, tool calls and metrics
+        response = aggregator.message()
+        metrics = response.response_metadata["generation_metrics"]
+        span.attributes.update(metrics)
+        record_generation(metrics, response.usage_metadata, model_name)
+
+    if cached is not None:
+        tracer.count("agent_response_cache_total", result="miss")
+        if not response.tool_calls and not response.invalid_tool_calls:
+            response_cache.store(cached, str(response.content))
+
+    # Return the updated message history (and the new summary if we compacted)
+    if removals:
+        return {"messages": removals + [response], "summary": summary}
     return {"messages": [response]}
 
 
 # Function to determine the next step in the workflow based on the last message
-def should_continue(state: MessagesState):
-    if state["messages"][-1].tool_calls:
-        for tool_call in state["messages"][-1].tool_calls:
-            if manager.requires_auth(tool_call["name"]):
-                return "authorization"
+def should_continue(state: AgentState, config: RunnableConfig, auth=None):
+    last_message = state["messages"][-1]
+    # Malformed calls go to the tools node too, which answers them with an error
+    if last_message.tool_calls or last_message.invalid_tool_calls:
+        user_id = config["configurable"].get("user_id")
+        tool_names = [tool_call["name"] for tool_call in last_message.tool_calls]
+        # Cached, so already-authorized users go straight to the tools
+        if (auth or get_auth_cache()).needs_authorization(user_id, tool_names):
+            return "authorization"
         return "tools"  # Proceed to tool execution if no authorization is needed
     return END  # End the workflow if no tool calls are present
 
 
 # Function to handle authorization for tools that require it
-def authorize(
-    state: MessagesState, config: RunnableConfig, writer, *, store: BaseStore
+async def authorize(
+    state: AgentState, config: RunnableConfig, writer, *, store: BaseStore, auth=None
 ):
     user_id = config["configurable"].get("user_id")
-    for tool_call in state["messages"][-1].tool_calls:
-        tool_name = tool_call["name"]
-        if not manager.requires_auth(tool_name):
-            continue
-        auth_response = manager.authorize(tool_name, user_id)
-        if auth_response.status != "completed":
+    auth = auth or get_auth_cache()
+    tool_names = [tool_call["name"] for tool_call in state["messages"][-1].tool_calls]
+
+    pending = []
+    for tool_name in auth.needs_authorization(user_id, tool_names):
+        auth_response = await auth.authorize(user_id, tool_name)
+        if auth_response is not None:
             # Stream the authorization URL to the user with proper formatting
             writer(f"\n🔐 Authorization required for {tool_name}\n\n")
             writer(f"Visit the following URL to authorize:\n{auth_response.url}\n\n")
-            writer("Waiting for authorization...\n\n")
+            pending.append(
+                {"tool": tool_name, "url": auth_response.url, "id": auth_response.id}
+            )
+
+    if pending:
+        writer("Waiting for authorization...\n\n")
+    # Waiting happens in the next node, so resuming doesn't request and stream the links again
+    return {"pending_auth": pending}
+
+
+AUTH_CANCELLED_MESSAGE = "Error: the user cancelled authorization for {name}; the tool did not run."
+
+
+async def await_authorization(state: AgentState, config: RunnableConfig, *, auth=None):
+    """
+    Pauses the run until every pending authorization has completed. The caller
+    resumes it with `Command(resume=True)` once the user is done, or cancels with
+    `Command(resume=False)`: the blocked tool calls are then answered with an error,
+    so the thread stays valid, and the agent replies.
+    """
+    user_id = config["configurable"].get("user_id")
+    auth = auth or get_auth_cache()
+    pending = state.get("pending_auth") or []
+    while pending:
+        # Pause the run here; the checkpoint holds it and no worker waits on the user.
+        resumed = interrupt({"type": "authorization", "requests": pending})
+        # The user finished (or abandoned) authorizing: whatever was cached for these
+        # tools is stale, so the check below asks Arcade again.
+        for request in pending:
+            auth.invalidate(user_id, request["tool"])
+        if resumed is False:
+            message = state["messages"][-1]
+            cancelled = [
+                ToolMessage(
+                    AUTH_CANCELLED_MESSAGE.format(name=call["name"]),
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+                for call in message.tool_calls + message.invalid_tool_calls
+            ]
+            return {"messages": cancelled, "pending_auth": []}
+        pending = [
+            request
+            for request in pending
+            if not await auth.check(user_id, request["tool"], request["id"])
+        ]
 
-            # wait for the user to complete the authorization
-            # and then check the authorization status again
-            manager.wait_for_auth(auth_response.id)
-            if not manager.is_authorized(auth_response.id):
-                # node interrupt?
-                raise ValueError("Authorization failed")
+    return {"pending_auth": []}
 
-    return {"messages": []}
+
+def after_authorization(state: AgentState):
+    # A cancelled authorization has already answered the tool calls
+    return "agent" if state["messages"][-1].type == "tool" else "tools"
 
 
 # Builds the LangGraph workflow with memory
-def build_graph(checkpointer=None, store=None):
+def build_graph(
+    checkpointer=None, store=None, *, model=None, tools=None, auth=None, prefetcher=None
+):
+    """
+    Compiles the agent graph. `model` (a chat model), `tools` and `auth` (an
+    `AuthStatusCache`-like object) replace the OpenAI model, Arcade tools and Arcade
+    authorization, e.g. to run offline with scripted models and local services.
+    `prefetcher` (e.g. a `WeatherPrefetcher` shared with the weather tools) is
+    started on each new user message.
+    """
+    agent_node, route = call_agent, should_continue
+    authorization_node, waiting_node = authorize, await_authorization
+    tool_node = get_tool_node() if tools is None else ParallelToolNode(tools)
+    agent_kwargs = {}
+    if model is not None:
+        bound = model.bind_tools(tools if tools is not None else get_tools())
+        agent_kwargs.update(model=model, model_with_tools=bound)
+    if prefetcher is not None:
+        agent_kwargs["prefetcher"] = prefetcher
+    if agent_kwargs:
+        agent_node = functools.partial(call_agent, **agent_kwargs)
+    if auth is not None:
+        route = functools.partial(should_continue, auth=auth)
+        authorization_node = functools.partial(authorize, auth=auth)
+        waiting_node = functools.partial(await_authorization, auth=auth)
+
     # Build the workflow graph using StateGraph
-    workflow = StateGraph(MessagesState)
+    workflow = StateGraph(AgentState)
 
     # Add nodes (steps) to the graph
-    workflow.add_node("agent", call_agent)
-    workflow.add_node("tools", tool_node)
-    workflow.add_node("authorization", authorize)
+    workflow.add_node("agent", traced_node("agent", agent_node))
+    workflow.add_node("tools", traced_node("tools", tool_node))
+    workflow.add_node("authorization", traced_node("authorization", authorization_node))
+    workflow.add_node("await_authorization", traced_node("await_authorization", waiting_node))
 
     # Define the edges and control flow between nodes
     workflow.add_edge(START, "agent")
     workflow.add_conditional_edges(
-        "agent", should_continue, ["authorization", "tools", END]
+        "agent", route, ["authorization", "tools", END]
     )
-    workflow.add_edge("authorization", "tools")
+    workflow.add_edge("authorization", "await_authorization")
+    workflow.add_conditional_edges("await_authorization", after_authorization, ["tools", "agent"])
     workflow.add_edge("tools", "agent")
 
-    # Compile the graph with the Postgres checkpointer and store
+    # Compile the graph with the Postgres checkpointer and store (checkpoint I/O is timed)
+    if checkpointer is not None:
+        checkpointer = TracedCheckpointer(checkpointer)
     graph = workflow.compile(checkpointer=checkpointer, store=store)
 
     return graph
 
 
-workflow = build_graph()
+@functools.cache
+def get_workflow():
+    return build_graph()
+
+
+def __getattr__(name):
+    # Keep `agent_with_memory.workflow` working without compiling it at import time
+    if name == "workflow":
+        return get_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def main():
     async with (
         AsyncPostgresStore.from_conn_string(database_url) as store,
-        AsyncPostgresSaver.from_conn_string(database_url) as checkpointer,
+        CompactPostgresSaver.from_conn_string(
+            database_url, serde=checkpoint_serde()
+        ) as checkpointer,
     ):
         # Run these lines the first time to set up everything in Postgres
         # await checkpointer.setup()
@@ -194,15 +437,26 @@ async def main():
         # Configuration with thread and user IDs for authorization purposes
         config = {"configurable": {"thread_id": "4", "user_id": email}}
 
-        # Run the graph and stream the outputs
-        async for chunk in graph.astream(inputs, config=config, stream_mode="values"):
-            # Pretty-print the last message in the chunk
-            chunk["messages"][-1].pretty_print()
+        # Run the graph and stream the outputs, resuming after each authorization pause
+        while inputs is not None:
+            async for chunk in graph.astream(inputs, config=config, stream_mode="values"):
+                # Pretty-print the last message in the chunk
+                chunk["messages"][-1].pretty_print()
 
+            inputs = None
+            snapshot = await graph.aget_state(config)
+            if snapshot.interrupts:
+                value = snapshot.interrupts[0].value
+                requests = value.get("requests", []) if isinstance(value, dict) else []
+                for request in requests:
+                    print(f"Authorize {request['tool']}: {request['url']}")
+                await asyncio.to_thread(input, "Press Enter once authorized...")
+                inputs = Command(resume=True)
 
-if __name__ == "__main__":
-    import asyncio
+        await checkpointer.aprune_thread(config["configurable"]["thread_id"])
 
+
+if __name__ == "__main__":
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
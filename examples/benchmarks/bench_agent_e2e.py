@@ -0,0 +1,319 @@
+"""
+Offline end-to-end benchmark: runs the real `build_graph` with a scripted chat
+model, in-memory checkpointer and store, and local stand-ins for Open-Meteo
+(geocoding + forecast) and Google Calendar, replaying the test scenarios from
+`PRPs/kai_weather_advisor.prp.md`. Reports p50/p95/p99 per turn and per node.
+
+    python -m benchmarks.bench_agent_e2e --iterations 30
+    python -m benchmarks.bench_agent_e2e --token-delay 0.01 --service-delay 0.02
+    python -m benchmarks.bench_agent_e2e --first-token-delay 0.3 --service-delay 0.1 --no-cache --prefetch
+    python -m benchmarks.bench_agent_e2e --save baseline.json
+    python -m benchmarks.bench_agent_e2e --check baseline.json --tolerance 0.25
+
+With `--check`, exits non-zero if any turn's or node's p95 regressed by more than
+the tolerance against the saved baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+# The agent module reads these at import; nothing here talks to OpenAI or Arcade.
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("ARCADE_API_KEY", "offline")
+
+from google.auth.credentials import AnonymousCredentials
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+from langgraph.types import Command
+
+from agent_response_cache import response_cache
+from agent_tracing import tracer
+from agent_with_memory import build_graph
+from benchmarks.calendar_stand_in import CalendarStandIn
+from benchmarks.fake_chat_model import ScriptedChatModel
+from benchmarks.stand_in_server import StandInServer
+from src.services.forecast_cache import ForecastCache
+from src.services.geocoding_cache import GeocodingCache
+from src.services.geocoding_client import GeocodingClient
+from src.services.google_calendar import GoogleCalendarService
+from src.services.open_meteo_client import OpenMeteoClient
+from src.tools.calendar_tool import build_calendar_tools
+from src.tools.weather_prefetch import WeatherPrefetcher
+from src.tools.weather_report_tool import build_weather_tools
+
+# A fixed "now" (a Thursday afternoon) keeps the requests reproducible.
+NOW = datetime(2025, 10, 16, 15, 0)
+
+# Each scenario is a list of (user message, model steps); a step is either a list
+# of (tool, args) calls made together or the final reply text. Scenarios run on
+# a fresh thread, so scenario 4 also checks that nothing leaks between sessions.
+SCENARIOS = {
+    "1 slot filling": [
+        ("I want to have a city walk tonight.", ["Sure! Which city will you be walking in?"]),
+        (
+            "Shanghai",
+            [
+                [("get_weather_data", {"city": "Shanghai", "time_range": "tonight", "activity": "city walk"})],
+                "Tonight in Shanghai looks mild with a low chance of rain after 19:00, so an "
+                "evening walk along the Bund between 19:00 and 21:00 would be pleasant. Bring "
+                "a light jacket as it feels a little cooler near the river.",
+            ],
+        ),
+    ],
+    "2 direct report": [
+        (
+            "What's the weather like in London tomorrow?",
+            [
+                [("get_weather_data", {"city": "London", "time_range": "tomorrow"})],
+                "Tomorrow in London starts cool and cloudy, warming up in the afternoon with "
+                "a moderate chance of showers around 16:00 and a light breeze all day.",
+            ],
+        ),
+    ],
+    "3 plan and schedule": [
+        (
+            "Find a good time for a 2-hour bike ride in Paris this weekend.",
+            [
+                [("find_activity_window", {"city": "Paris", "time_range": "this weekend", "activity": "bike ride", "duration_hours": 2})],
+                "The best slot is Saturday from 10:00 to 12:00: comfortable temperatures, "
+                "little wind and almost no chance of rain. Shall I put it in your calendar?",
+            ],
+        ),
+        (
+            "Yes, that sounds perfect. Please schedule it.",
+            [
+                [("create_calendar_event", {"summary": "Bike ride in Paris", "start_time": "2025-10-18T10:00:00+02:00", "end_time": "2025-10-18T12:00:00+02:00", "timezone": "Europe/Paris"})],
+                "Done! Your bike ride is in your calendar for Saturday 10:00-12:00.",
+            ],
+        ),
+    ],
+    "4 new session": [
+        ("How's the weather here?", ["Happy to check! Which city are you in?"]),
+    ],
+    "5 parallel tools": [
+        (
+            "Compare the weather in London and Paris tomorrow.",
+            [
+                [
+                    ("get_weather_data", {"city": "London", "time_range": "tomorrow"}),
+                    ("get_weather_data", {"city": "Paris", "time_range": "tomorrow"}),
+                ],
+                "Paris will be a few degrees warmer and drier than London tomorrow; London "
+                "has a higher chance of afternoon showers.",
+            ],
+        ),
+    ],
+}
+
+SCRIPT = {
+    message: steps for turns in SCENARIOS.values() for message, steps in turns
+}
+
+
+def respond(messages) -> AIMessage:
+    """Replays the scripted step for the current turn of the conversation."""
+    if messages and "running summary" in str(messages[0].content):
+        return AIMessage(content="The user asked about the weather and planned activities.")
+    last_human = max(i for i, m in enumerate(messages) if m.type == "human")
+    step = sum(1 for m in messages[last_human + 1 :] if m.type == "ai")
+    steps = SCRIPT[str(messages[last_human].content)]
+    action = steps[min(step, len(steps) - 1)]
+    if isinstance(action, str):
+        return AIMessage(content=action)
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}
+            for name, args in action
+        ],
+    )
+
+
+class NoAuthRequired:
+    """The local tools need no authorization."""
+
+    def needs_authorization(self, user_id, tool_names):
+        return []
+
+
+async def run_turn(graph, message: str, config: dict) -> float | None:
+    """
+    Streams one user turn and returns when its first custom chunk arrived. The
+    scripted user confirms every booking, so a confirmation pause is resumed
+    within the same turn.
+    """
+    first_chunk = None
+    inputs = {"messages": [HumanMessage(content=message)]}
+    while inputs is not None:
+        interrupted = False
+        async for mode, chunk in graph.astream(
+            inputs, config=config, stream_mode=["custom", "updates"]
+        ):
+            if mode == "custom":
+                first_chunk = first_chunk or time.perf_counter()
+            else:
+                interrupted = interrupted or "__interrupt__" in chunk
+        inputs = Command(resume=True) if interrupted else None
+    return first_chunk
+
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def span_key(span) -> str | None:
+    if span.name == "node":
+        return f"node:{span.labels['node']}"
+    if span.name == "tool":
+        return f"tool:{span.labels['tool']}"
+    if span.name in ("model.generate", "context.compact", "memory.search"):
+        return span.name
+    if span.name == "checkpoint":
+        return f"checkpoint:{span.labels['op']}"
+    return None
+
+
+async def run_benchmark(args) -> dict:
+    turn_samples: dict[str, list[float]] = defaultdict(list)
+    ttft_samples: dict[str, list[float]] = defaultdict(list)
+    span_samples: dict[str, list[float]] = defaultdict(list)
+
+    def collect(span):
+        key = span_key(span)
+        if key is not None:
+            span_samples[key].append(span.duration)
+
+    with StandInServer(delay=args.service_delay) as weather, CalendarStandIn() as calendar:
+        geocoding = GeocodingClient(
+            base_url=f"{weather.base_url}/v1/search",
+            cache=GeocodingCache() if args.cache else None,
+        )
+        forecasts = OpenMeteoClient(
+            base_url=f"{weather.base_url}/v1/forecast",
+            cache=ForecastCache() if args.cache else None,
+        )
+        calendar_service = GoogleCalendarService(
+            AnonymousCredentials(), api_endpoint=calendar.base_url
+        )
+        prefetcher = (
+            WeatherPrefetcher(geocoding, forecasts, now=lambda: NOW) if args.prefetch else None
+        )
+        tools = build_weather_tools(geocoding, forecasts, now=lambda: NOW, prefetcher=prefetcher)
+        tools += build_calendar_tools(calendar_service)
+        model = ScriptedChatModel(
+            respond=respond,
+            token_delay=args.token_delay,
+            first_token_delay=args.first_token_delay,
+        )
+        graph = build_graph(
+            InMemorySaver(),
+            InMemoryStore(),
+            model=model,
+            tools=tools,
+            auth=NoAuthRequired(),
+            prefetcher=prefetcher,
+        )
+
+        for iteration in range(args.warmup + args.iterations):
+            measured = iteration >= args.warmup
+            if measured and collect not in tracer.listeners:
+                tracer.listeners.append(collect)
+            # Every iteration books the same slot, so start from an empty calendar
+            calendar.cancel_all()
+            for scenario, turns in SCENARIOS.items():
+                config = {
+                    "configurable": {
+                        "thread_id": f"{scenario}-{iteration}",
+                        "user_id": "bench@example.com",
+                    }
+                }
+                for number, (message, _) in enumerate(turns, 1):
+                    start = time.perf_counter()
+                    first_chunk = await run_turn(graph, message, config)
+                    if measured:
+                        label = f"{scenario} / turn {number}"
+                        turn_samples[label].append(time.perf_counter() - start)
+                        ttft_samples[label].append((first_chunk or time.perf_counter()) - start)
+        tracer.listeners.remove(collect)
+        if prefetcher is not None:
+            prefetcher.flush()
+
+    return {
+        "turns": {k: percentiles(v) for k, v in turn_samples.items()},
+        "ttft": {k: percentiles(v) for k, v in ttft_samples.items()},
+        "spans": {k: percentiles(v) for k, v in sorted(span_samples.items())},
+        "requests": {"open_meteo": weather.requests, "calendar": calendar.requests},
+        "prefetch": prefetcher and {**prefetcher.stats, "hit_rate": prefetcher.hit_rate()},
+    }
+
+
+def print_table(title: str, rows: dict) -> None:
+    print(f"\n{title:<44}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, (p50, p95, p99) in rows.items():
+        print(f"{name:<44}{p50 * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{p99 * 1000:>8.1f}ms")
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for section in ("turns", "spans"):
+        for name, (_, p95, _) in results[section].items():
+            base = baseline.get(section, {}).get(name)
+            # Ignore sub-millisecond entries; their noise dwarfs any tolerance.
+            if base and base[1] > 0.001 and p95 > base[1] * (1 + tolerance):
+                found.append(f"{section} {name}: p95 {base[1] * 1000:.1f}ms -> {p95 * 1000:.1f}ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--service-delay", type=float, default=0.0, help="stand-in API latency")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable service caches")
+    parser.add_argument("--prefetch", action="store_true", help="prefetch weather during the first model call")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--check", help="compare p95s against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    print(f"{args.iterations} iterations of {len(SCENARIOS)} scenarios "
+          f"(token delay {args.token_delay * 1000:g}ms, service delay {args.service_delay * 1000:g}ms)")
+    print_table("Turn latency", results["turns"])
+    print_table("Time to first streamed chunk", results["ttft"])
+    print_table("Per node / span", results["spans"])
+    print(f"\nUpstream requests: {results['requests']}")
+    print(f"Response cache: {response_cache.stats}, hit rate {response_cache.hit_rate():.0%}")
+    if results["prefetch"]:
+        print(f"Prefetch: {results['prefetch']}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check:
+        with open(args.check) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"No p95 regressions beyond {args.tolerance:.0%} against {args.check}")
+
+
+if __name__ == "__main__":
+    main()
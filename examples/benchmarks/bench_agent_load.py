@@ -0,0 +1,263 @@
+"""
+Load driver: runs N concurrent synthetic users against `build_graph` (scripted
+model, in-memory checkpointer/store, local Open-Meteo and Calendar stand-ins),
+ramping N, and reports throughput, turn latency percentiles, event-loop lag and
+connection-pool / worker-pool saturation for each step.
+
+    python -m benchmarks.bench_agent_load --ramp 1,4,16,64 --duration 10
+    python -m benchmarks.bench_agent_load --blocking     # tools call the sync clients
+
+A watchdog thread samples the event loop thread's stack whenever the loop stops
+ticking for longer than `--stall-ms`, and the report lists the code it was
+stuck in, so blocking calls (sync HTTP, waits) show up by name.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("ARCADE_API_KEY", "offline")
+
+from google.auth.credentials import AnonymousCredentials
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from agent_with_memory import build_graph
+from benchmarks.bench_agent_e2e import (
+    NOW,
+    SCENARIOS,
+    NoAuthRequired,
+    percentiles,
+    respond,
+    run_turn,
+)
+from benchmarks.calendar_stand_in import CalendarStandIn
+from benchmarks.fake_chat_model import ScriptedChatModel
+from benchmarks.stand_in_server import StandInServer
+from src.models import Location
+from src.services import google_calendar
+from src.services.forecast_request import shape_forecast_request, summarize_for_prompt
+from src.services.geocoding_client import GeocodingClient
+from src.services.google_calendar import GoogleCalendarService
+from src.services.http_transport import get_async_client, get_transport_config
+from src.services.open_meteo_client import OpenMeteoClient
+from src.tools.calendar_tool import build_calendar_tools
+from src.tools.weather_report_tool import build_weather_tools
+
+
+def build_blocking_weather_tools(geocoding: GeocodingClient, forecasts: OpenMeteoClient):
+    """The weather tool as it would look calling the sync clients from the event loop."""
+
+    @tool
+    async def get_weather_data(city: str, time_range: str, activity: str | None = None) -> str:
+        """Gets the forecast for a city over a time range."""
+        result = geocoding.fetch_coordinates(city)
+        location = Location(
+            name=result.get("name", city),
+            latitude=result["latitude"],
+            longitude=result["longitude"],
+            timezone=result.get("timezone", "auto"),
+        )
+        request = shape_forecast_request(time_range, activity, NOW)
+        return summarize_for_prompt(forecasts.fetch_forecast(location, request), request)
+
+    return [get_weather_data]
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag with a ticking task, samples pool usage on each tick,
+    and runs a watchdog thread that records where the loop thread is stuck.
+    """
+
+    def __init__(self, interval: float = 0.01, stall_threshold: float = 0.05):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lags: list[float] = []
+        self.stalls: Counter = Counter()
+        self.max_connections = 0
+        self.max_queued_requests = 0
+        self.max_executor_queue = 0
+        self._heartbeat = time.perf_counter()
+        self._running = False
+
+    async def __aenter__(self):
+        self._running = True
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+        self._watchdog.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._running = False
+        self._task.cancel()
+        self._watchdog.join()
+
+    async def _tick(self):
+        while self._running:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = time.perf_counter()
+            self.lags.append(max(now - start - self.interval, 0.0))
+            self._sample_pools()
+
+    def _sample_pools(self):
+        # httpx keeps its pool on the transport; these are private but stable in httpcore 1.x
+        pool = getattr(getattr(get_async_client(), "_transport", None), "_pool", None)
+        if pool is not None:
+            self.max_connections = max(self.max_connections, len(pool.connections))
+            queued = sum(1 for request in pool._requests if request.is_queued())
+            self.max_queued_requests = max(self.max_queued_requests, queued)
+        self.max_executor_queue = max(
+            self.max_executor_queue, google_calendar._executor._work_queue.qsize()
+        )
+
+    def _watch(self):
+        reported = None
+        while self._running:
+            time.sleep(self.interval / 2)
+            heartbeat = self._heartbeat
+            if time.perf_counter() - heartbeat < self.stall_threshold or heartbeat == reported:
+                continue
+            # One sample per stall: where the loop thread is right now
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self.stalls[_describe(traceback.extract_stack(frame))] += 1
+
+
+def _describe(stack: traceback.StackSummary) -> str:
+    """The innermost frames of our own code, plus the library call it was blocked in."""
+    ours = [
+        f for f in stack if "site-packages" not in f.filename and "/lib/python" not in f.filename
+    ]
+    innermost = stack[-1]
+    frames = [f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})" for f in ours[-2:]]
+    frames.append(f"{innermost.name} ({os.path.basename(innermost.filename)}:{innermost.lineno})")
+    return " -> ".join(dict.fromkeys(frames))
+
+
+async def synthetic_user(graph, user: int, deadline: float, latencies: list, errors: Counter):
+    names = list(SCENARIOS)
+    conversation = 0
+    while time.perf_counter() < deadline:
+        scenario = names[(user + conversation) % len(names)]
+        config = {
+            "configurable": {
+                "thread_id": f"user{user}-{conversation}",
+                "user_id": f"user{user}@example.com",
+            }
+        }
+        for message, _ in SCENARIOS[scenario]:
+            start = time.perf_counter()
+            try:
+                await run_turn(graph, message, config)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+        conversation += 1
+
+
+async def run_step(graph, users: int, duration: float, args) -> dict:
+    latencies: list[float] = []
+    errors: Counter = Counter()
+    async with LoopMonitor(stall_threshold=args.stall_ms / 1000) as monitor:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(synthetic_user(graph, u, deadline, latencies, errors) for u in range(users))
+        )
+        elapsed = time.perf_counter() - start
+    p50, p95, p99 = percentiles(latencies)
+    lag_p99 = percentiles(monitor.lags)[2]
+    return {
+        "users": users,
+        "turns": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "lag_p99": lag_p99,
+        "lag_max": max(monitor.lags, default=0.0),
+        "connections": monitor.max_connections,
+        "queued": monitor.max_queued_requests,
+        "executor_queue": monitor.max_executor_queue,
+        "errors": sum(errors.values()),
+        "stalls": monitor.stalls,
+    }
+
+
+async def main_async(args) -> None:
+    with StandInServer(delay=args.service_delay) as weather, CalendarStandIn() as calendar:
+        # No service caches: every turn goes to the stand-ins, so pools are exercised
+        geocoding = GeocodingClient(base_url=f"{weather.base_url}/v1/search")
+        forecasts = OpenMeteoClient(base_url=f"{weather.base_url}/v1/forecast")
+        if args.blocking:
+            tools = build_blocking_weather_tools(geocoding, forecasts)
+            tools += build_weather_tools(geocoding, forecasts, now=lambda: NOW)[1:]
+        else:
+            tools = build_weather_tools(geocoding, forecasts, now=lambda: NOW)
+        tools += build_calendar_tools(
+            GoogleCalendarService(AnonymousCredentials(), api_endpoint=calendar.base_url)
+        )
+        model = ScriptedChatModel(
+            respond=respond,
+            token_delay=args.token_delay,
+            first_token_delay=args.first_token_delay,
+        )
+        graph = build_graph(
+            InMemorySaver(), InMemoryStore(), model=model, tools=tools, auth=NoAuthRequired()
+        )
+
+        pool_size = get_transport_config().max_connections
+        print(
+            f"{'users':>6}{'turns':>7}{'turns/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'lag p99':>9}{'lag max':>9}{'conns':>7}{'queued':>7}{'exec q':>7}{'errors':>7}"
+        )
+        stalls: Counter = Counter()
+        for users in args.ramp:
+            r = await run_step(graph, users, args.duration, args)
+            stalls.update(r["stalls"])
+            print(
+                f"{users:>6}{r['turns']:>7}{r['throughput']:>9.1f}"
+                f"{r['p50'] * 1000:>7.0f}ms{r['p95'] * 1000:>7.0f}ms{r['p99'] * 1000:>7.0f}ms"
+                f"{r['lag_p99'] * 1000:>7.1f}ms{r['lag_max'] * 1000:>7.0f}ms"
+                f"{r['connections']:>4}/{pool_size:<2}{r['queued']:>7}{r['executor_queue']:>7}"
+                f"{r['errors']:>7}"
+            )
+
+    print(f"\nUpstream requests: open-meteo={weather.requests} calendar={calendar.requests}")
+    if stalls:
+        print(f"\nEvent loop stalls over {args.stall_ms:g}ms (where the loop thread was):")
+        for site, count in stalls.most_common(args.top):
+            print(f"{count:>6}  {site}")
+    else:
+        print(f"\nNo event loop stalls over {args.stall_ms:g}ms.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--ramp", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16, 64]
+    )
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per ramp step")
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--service-delay", type=float, default=0.02, help="stand-in API latency")
+    parser.add_argument("--blocking", action="store_true", help="use sync HTTP in the weather tool")
+    parser.add_argument("--stall-ms", type=float, default=50.0)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Startup benchmark for the agent module: import time in a fresh interpreter,
+time to build the agent on first use (tools, model, compiled graph), the
+memoized second call, and optionally a real first turn.
+
+    python -m benchmarks.bench_agent_startup            # import + lazy build
+    TOOL_SCHEMA_CACHE=.tool_schemas.json python -m benchmarks.bench_agent_startup
+    python -m benchmarks.bench_agent_startup --live     # also runs one real turn
+
+Set TOOL_SCHEMA_CACHE to see the difference the on-disk tool schema cache makes
+(the first run fills it, later runs skip the Arcade round trip).
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure_import(module: str, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def first_turn(agent) -> float:
+    from langchain_core.messages import HumanMessage
+    from langgraph.checkpoint.memory import InMemorySaver
+    from langgraph.store.memory import InMemoryStore
+
+    graph = agent.build_graph(InMemorySaver(), InMemoryStore())
+    config = {"configurable": {"thread_id": "bench", "user_id": agent.email or "bench@example.com"}}
+    start = time.perf_counter()
+    async for _ in graph.astream(
+        {"messages": [HumanMessage(content="Say hello in five words.")]},
+        config=config,
+        stream_mode="custom",
+    ):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="run one real turn (needs API keys)")
+    args = parser.parse_args()
+
+    imports = measure_import("agent_with_memory", args.runs)
+    # Interpreter startup alone, so the module's own cost can be isolated.
+    baseline = measure_import("sys", args.runs)
+    print(f"import agent_with_memory: {statistics.median(imports) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"  of which interpreter:   {statistics.median(baseline) * 1000:8.1f} ms")
+
+    import agent_with_memory as agent
+
+    start = time.perf_counter()
+    agent.get_workflow()
+    print(f"first get_workflow():     {(time.perf_counter() - start) * 1000:8.1f} ms")
+    start = time.perf_counter()
+    agent.get_workflow()
+    print(f"memoized get_workflow():  {(time.perf_counter() - start) * 1000:8.3f} ms")
+
+    if args.live:
+        print(f"first turn (in-memory):   {asyncio.run(first_turn(agent)) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
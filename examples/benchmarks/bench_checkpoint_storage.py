@@ -0,0 +1,185 @@
+"""
+Benchmark: checkpoint bytes written per turn and checkpoint load time, with the
+default serializer and with `CompactSerializer` (compression plus out-of-line
+tool outputs), over one long conversation through the real `build_graph`.
+
+Runs offline: scripted chat model, Open-Meteo stand-in, and an in-memory saver
+that keeps blobs, writes and payloads the way the Postgres tables do, so the
+byte counts are what `CompactPostgresSaver` would write to `checkpoint_blobs`,
+`checkpoint_writes` and `checkpoint_payloads` (the jsonb checkpoint rows are
+the same either way and not counted).
+
+    python -m benchmarks.bench_checkpoint_storage --turns 30
+    python -m benchmarks.bench_checkpoint_storage --offload-chars 2048
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("ARCADE_API_KEY", "offline")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from agent_checkpoints import (
+    _CODEC,
+    CompactSerializer,
+    PayloadStoreMixin,
+    _compress,
+    _decompress,
+)
+from agent_with_memory import build_graph
+from benchmarks.bench_agent_e2e import NOW, NoAuthRequired
+from benchmarks.fake_chat_model import ScriptedChatModel
+from benchmarks.stand_in_server import StandInServer
+from src.services.geocoding_client import GeocodingClient
+from src.services.open_meteo_client import OpenMeteoClient
+from src.tools.weather_report_tool import build_weather_tools
+
+CITIES = ["London", "Paris", "Berlin", "Madrid", "Rome", "Vienna", "Prague", "Oslo"]
+RANGES = ["this week", "tomorrow", "this weekend", "tonight"]
+
+
+class MemoryPayloadSaver(PayloadStoreMixin, InMemorySaver):
+    """In-memory stand-in for `CompactPostgresSaver`'s payload table."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.payload_rows: dict[tuple[str, str], tuple[str, bytes]] = {}
+
+    async def _asave_payloads(self, thread_id, payloads):
+        for digest, text in payloads.items():
+            self.payload_rows.setdefault(
+                (thread_id, digest), (_CODEC, _compress(text.encode()))
+            )
+
+    async def _aload_payloads(self, thread_id, digests):
+        rows = {d: self.payload_rows[(thread_id, d)] for d in digests}
+        return {d: _decompress(codec, blob).decode() for d, (codec, blob) in rows.items()}
+
+    def stored_bytes(self) -> int:
+        blobs = sum(len(blob) for _, blob in self.blobs.values())
+        writes = sum(
+            len(write[2][1]) for task in self.writes.values() for write in task.values()
+        )
+        return blobs + writes + sum(len(blob) for _, blob in self.payload_rows.values())
+
+
+def question(turn: int) -> str:
+    return f"What's the weather in {CITIES[turn % len(CITIES)]} {RANGES[turn % len(RANGES)]}?"
+
+
+def respond(messages) -> AIMessage:
+    if messages and "running summary" in str(messages[0].content):
+        return AIMessage(content="The user asked about the weather in several cities.")
+    last_human = max(i for i, m in enumerate(messages) if m.type == "human")
+    if any(m.type == "tool" for m in messages[last_human + 1 :]):
+        return AIMessage(content="Mild and mostly dry, with a chance of showers later on.")
+    city, time_range = str(messages[last_human].content)[23:-1].split(" ", 1)
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "get_weather_data",
+                "args": {"city": city, "time_range": time_range},
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+            }
+        ],
+    )
+
+
+async def run(serde, tools, turns: int, loads: int) -> dict:
+    saver = MemoryPayloadSaver(serde=serde)
+    graph = build_graph(
+        saver,
+        InMemoryStore(),
+        model=ScriptedChatModel(respond=respond),
+        tools=tools,
+        auth=NoAuthRequired(),
+    )
+    config = {"configurable": {"thread_id": "bench", "user_id": "bench@example.com"}}
+    per_turn = []
+    for turn in range(turns):
+        before = saver.stored_bytes()
+        async for _ in graph.astream(
+            {"messages": [HumanMessage(content=question(turn))]},
+            config=config,
+            stream_mode="custom",
+        ):
+            pass
+        per_turn.append(saver.stored_bytes() - before)
+
+    warm, cold = [], []
+    for samples, clear in ((warm, False), (cold, True)):
+        for _ in range(loads):
+            if clear:
+                saver._payloads.clear()
+            start = time.perf_counter()
+            await saver.aget_tuple(config)
+            samples.append(time.perf_counter() - start)
+
+    latest = await saver.aget_tuple(config)
+    return {
+        "per_turn": per_turn,
+        "total": saver.stored_bytes(),
+        "payloads": len(saver.payload_rows),
+        "load_warm": statistics.median(warm),
+        "load_cold": statistics.median(cold),
+        "messages": len(latest.checkpoint["channel_values"]["messages"]),
+    }
+
+
+async def main_async(args) -> None:
+    with StandInServer() as weather:
+        tools = build_weather_tools(
+            GeocodingClient(base_url=f"{weather.base_url}/v1/search"),
+            OpenMeteoClient(base_url=f"{weather.base_url}/v1/forecast"),
+            now=lambda: NOW,
+        )
+        variants = {
+            "default (msgpack)": None,
+            f"compact (msgpack+{_CODEC})": CompactSerializer(offload_chars=0),
+            f"compact + offload >= {args.offload_chars}": CompactSerializer(
+                offload_chars=args.offload_chars
+            ),
+        }
+        results = {
+            name: await run(serde, tools, args.turns, args.loads)
+            for name, serde in variants.items()
+        }
+
+    print(f"{args.turns} turns on one thread, one weather lookup per turn\n")
+    print(
+        f"{'serializer':<36}{'bytes/turn':>12}{'last turn':>12}{'total':>12}"
+        f"{'load warm':>12}{'load cold':>12}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<36}{statistics.mean(r['per_turn']):>12,.0f}{r['per_turn'][-1]:>12,}"
+            f"{r['total']:>12,}{r['load_warm'] * 1000:>10.2f}ms{r['load_cold'] * 1000:>10.2f}ms"
+        )
+    compact = list(results.values())[-1]
+    print(
+        f"\n{compact['payloads']} out-of-line payloads; latest checkpoint holds "
+        f"{compact['messages']} messages"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--loads", type=int, default=50, help="timed loads of the latest checkpoint")
+    # The weather tool's shaped forecasts are small; Gmail/Asana listings often aren't
+    parser.add_argument("--offload-chars", type=int, default=512)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
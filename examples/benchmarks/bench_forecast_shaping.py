@@ -0,0 +1,97 @@
+"""
+Benchmark: bytes transferred and prompt tokens per weather scenario from
+`PRPs/kai_weather_advisor.prp.md`, comparing the fixed full-horizon request
+(raw JSON handed to the LLM) with a shaped request and compact table.
+
+    python -m benchmarks.bench_forecast_shaping
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from benchmarks.stand_in_server import StandInServer
+from src.models import Location
+from src.services.forecast_request import shape_forecast_request, summarize_for_prompt
+from src.services.http_transport import get_client
+from src.services.open_meteo_client import OpenMeteoClient
+
+# (scenario, city, time range, activity) taken from the PRP test scenarios.
+SCENARIOS = [
+    (
+        "City walk tonight (Shanghai)",
+        Location(name="Shanghai", latitude=31.23, longitude=121.47, timezone="Asia/Shanghai"),
+        "tonight",
+        "city walk",
+    ),
+    (
+        "Weather in London tomorrow",
+        Location(name="London", latitude=51.51, longitude=-0.13, timezone="Europe/London"),
+        "tomorrow",
+        None,
+    ),
+    (
+        "2h bike ride in Paris this weekend",
+        Location(name="Paris", latitude=48.85, longitude=2.35, timezone="Europe/Paris"),
+        "this weekend",
+        "bike ride",
+    ),
+    (
+        "Weekly outlook",
+        Location(name="London", latitude=51.51, longitude=-0.13, timezone="Europe/London"),
+        "next 7 days",
+        None,
+    ),
+]
+
+# A fixed "now" (a Thursday afternoon) keeps the numbers reproducible.
+NOW = datetime(2025, 10, 16, 15, 0)
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except (OSError, ValueError):
+        # The encoding is downloaded on first use, which fails offline.
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        # Rough heuristic when tiktoken or its encoding isn't available.
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+def main() -> None:
+    with StandInServer() as server:
+        client = OpenMeteoClient(f"{server.base_url}/v1/forecast")
+        http = get_client()
+        print(f"{'scenario':<36}{'bytes before':>14}{'bytes after':>13}{'tokens before':>15}{'tokens after':>14}")
+        for name, location, time_range, activity in SCENARIOS:
+            full = http.get(client.base_url, params=client.build_params(location))
+            full_tokens = count_tokens(json.dumps(full.json()))
+
+            request = shape_forecast_request(time_range, activity, now=NOW)
+            shaped = http.get(client.base_url, params=client.build_params(location, request))
+            table = summarize_for_prompt(shaped.json(), request)
+
+            print(
+                f"{name:<36}{len(full.content):>14,}{len(shaped.content):>13,}"
+                f"{full_tokens:>15,}{count_tokens(table):>14,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
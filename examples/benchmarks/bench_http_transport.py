@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: per-call latency of the weather service clients with a fresh
+`httpx.Client()` per call (the old behaviour) versus the shared pooled transport.
+
+Runs fully offline against the local stand-in server:
+
+    python -m benchmarks.bench_http_transport --calls 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.stand_in_server import StandInServer
+from src.models import Location
+from src.services.geocoding_client import GeocodingClient
+from src.services.http_transport import close_transport
+from src.services.open_meteo_client import OpenMeteoClient
+
+
+def _report(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<28} mean={statistics.mean(samples) * 1000:7.2f}ms "
+        f"p50={statistics.median(samples) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms"
+    )
+
+
+def _weather_turn(geo: GeocodingClient, meteo: OpenMeteoClient) -> None:
+    coords = geo.fetch_coordinates("London")
+    meteo.fetch_hourly_forecast(Location(**coords))
+
+
+def bench_fresh_client(base_url: str, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        # Reproduces the previous behaviour: one short-lived client per request.
+        with httpx.Client() as client:
+            geo = GeocodingClient(f"{base_url}/v1/search", client=client)
+            with httpx.Client() as client2:
+                meteo = OpenMeteoClient(f"{base_url}/v1/forecast", client=client2)
+                _weather_turn(geo, meteo)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_pooled(base_url: str, calls: int) -> list[float]:
+    geo = GeocodingClient(f"{base_url}/v1/search")
+    meteo = OpenMeteoClient(f"{base_url}/v1/forecast")
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        _weather_turn(geo, meteo)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_async_pooled(base_url: str, calls: int, concurrency: int) -> float:
+    geo = GeocodingClient(f"{base_url}/v1/search")
+    meteo = OpenMeteoClient(f"{base_url}/v1/forecast")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def turn():
+        async with semaphore:
+            coords = await geo.afetch_coordinates("London")
+            await meteo.afetch_hourly_forecast(Location(**coords))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(turn() for _ in range(calls)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with StandInServer() as server:
+        fresh = bench_fresh_client(server.base_url, args.calls)
+        connections_before = server.connections
+        pooled = bench_pooled(server.base_url, args.calls)
+        pooled_connections = server.connections - connections_before
+        elapsed = asyncio.run(bench_async_pooled(server.base_url, args.calls, args.concurrency))
+        close_transport()
+
+    print(f"{args.calls} weather turns (geocode + forecast) against {server.base_url}")
+    _report("fresh httpx.Client per call", fresh)
+    _report("shared pooled client", pooled)
+    print(f"TCP connections opened: fresh={connections_before} pooled={pooled_connections}")
+    print(f"async pooled, concurrency={args.concurrency}: {args.calls / elapsed:.1f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
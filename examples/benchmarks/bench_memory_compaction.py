@@ -0,0 +1,121 @@
+"""
+Benchmark: namespace size and memory-search latency for a synthetic user with
+thousands of "remember ..." messages, written the old way (one uuid-keyed item
+per message), then compacted, and written through the deduplicating `remember`.
+
+Uses an in-memory store with a deterministic hashing embedder, so it runs offline:
+
+    python -m benchmarks.bench_memory_compaction --memories 3000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import statistics
+import time
+import uuid
+
+from langgraph.store.memory import InMemoryStore
+
+from agent_memory import MemoryCompactor, MemoryRetriever, remember
+
+DIMS = 256
+FACTS = [
+    "my favourite {} is {}",
+    "I live in {} near the {}",
+    "my {} appointment is on {}",
+    "I prefer {} over {}",
+    "my sister {} likes {}",
+]
+WORDS = (
+    "tea coffee Paris London Berlin river park dentist Monday Friday cycling running "
+    "Anna Ben jazz rock hiking swimming station museum"
+).split()
+
+
+def embed(texts: list[str]) -> list[list[float]]:
+    """Bag-of-words hashing embedder: paraphrases that share words score close to 1."""
+    vectors = []
+    for text in texts:
+        vector = [0.0] * DIMS
+        for word in text.casefold().replace(",", " ").split():
+            bucket = int(hashlib.md5(word.encode()).hexdigest(), 16) % DIMS
+            vector[bucket] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        vectors.append([v / norm for v in vector])
+    return vectors
+
+
+def synthetic_messages(count: int, seed: int = 0) -> list[str]:
+    """A few hundred distinct facts, each repeated with small wording changes."""
+    rnd = random.Random(seed)
+    facts = [
+        rnd.choice(FACTS).format(rnd.choice(WORDS), rnd.choice(WORDS))
+        for _ in range(count // 10)
+    ]
+    prefixes = ["Remember that", "remember:", "Please remember", "Remember,  "]
+    return [f"{rnd.choice(prefixes)} {rnd.choice(facts)}" for _ in range(count)]
+
+
+async def search_latency(store, namespace, queries: list[str]) -> float:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        await store.asearch(namespace, query=query, limit=5)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def count(store, namespace) -> int:
+    return len(await store.asearch(namespace, limit=100_000))
+
+
+async def main_async(memories: int, max_items: int) -> None:
+    namespace = ("memories", "synthetic-user")
+    messages = synthetic_messages(memories)
+    queries = [m.split(" ", 2)[-1] for m in random.Random(1).sample(messages, 50)]
+
+    # Old behaviour: every matching message becomes a new item
+    raw = InMemoryStore(index={"dims": DIMS, "embed": embed})
+    for content in messages:
+        await raw.aput(namespace, str(uuid.uuid4()), {"data": content})
+    before_size = await count(raw, namespace)
+    before_latency = await search_latency(raw, namespace, queries)
+
+    retriever = MemoryRetriever()
+    compactor = MemoryCompactor(retriever, max_items=max_items)
+    start = time.perf_counter()
+    await compactor.compact(raw, namespace)
+    compaction_time = time.perf_counter() - start
+    compacted_size = await count(raw, namespace)
+    compacted_latency = await search_latency(raw, namespace, queries)
+
+    # New behaviour: deduplicate on write
+    deduped = InMemoryStore(index={"dims": DIMS, "embed": embed})
+    for content in messages:
+        await remember(deduped, namespace, content, retriever=retriever)
+    dedup_size = await count(deduped, namespace)
+    dedup_latency = await search_latency(deduped, namespace, queries)
+
+    print(f"{memories} remember-messages for one user")
+    print(f"{'':<28}{'items':>8}{'search p50':>14}")
+    print(f"{'raw writes':<28}{before_size:>8}{before_latency:>12.2f}ms")
+    print(
+        f"{'raw + compaction':<28}{compacted_size:>8}{compacted_latency:>12.2f}ms"
+        f"  (compaction {compaction_time:.1f}s)"
+    )
+    print(f"{'dedup on write':<28}{dedup_size:>8}{dedup_latency:>12.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--memories", type=int, default=3000)
+    parser.add_argument("--max-items", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.memories, args.max_items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: forecast calls against a misbehaving upstream with the service
+clients' resilience layer disabled (one plain attempt, as before) and enabled
+(retries with backoff, hedging, circuit breaker, 429 handling).
+
+Runs offline against the local stand-in server, one scenario at a time:
+
+    slow tail   a few responses take `--slow-delay` longer  -> p50/p99, hedges
+    errors      a share of responses are 503s               -> success rate
+    throttled   a share of responses are 429 + Retry-After  -> success rate
+    outage      every response is a slow 503 after the cache expired
+                -> stale forecasts served, time per call, upstream requests
+
+    python -m benchmarks.bench_resilience --calls 300
+    python -m benchmarks.bench_resilience --slow-rate 0.05 --error-rate 0.3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.stand_in_server import StandInServer
+from src.models import Location
+from src.services.forecast_cache import ForecastCache
+from src.services.http_transport import aclose_transport
+from src.services.open_meteo_client import OpenMeteoClient
+from src.services.resilience import Resilience, ResiliencePolicy
+
+LOCATIONS = [
+    Location(
+        name=f"Site {i}",
+        latitude=40 + i * 0.5,
+        longitude=-3 + i * 0.5,
+        timezone="Europe/Madrid",
+    )
+    for i in range(20)
+]
+
+
+def policies(args) -> dict[str, ResiliencePolicy]:
+    return {
+        "disabled": ResiliencePolicy.disabled(),
+        "resilient": ResiliencePolicy(breaker_cooldown=args.cooldown),
+    }
+
+
+async def run_calls(client: OpenMeteoClient, calls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, failures = [], 0
+
+    async def call(i: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.afetch_hourly_forecast(LOCATIONS[i % len(LOCATIONS)])
+            except Exception:
+                failures += 1
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(int(len(samples) * 0.99), len(samples) - 1)],
+        "ok": 1 - failures / calls,
+    }
+
+
+async def scenario(name: str, args, server_kwargs: dict) -> None:
+    print(f"\n{name}")
+    for label, policy in policies(args).items():
+        resilience = Resilience(policy)
+        with StandInServer(delay=args.delay, **server_kwargs) as server:
+            client = OpenMeteoClient(f"{server.base_url}/v1/forecast", resilience=resilience)
+            result = await run_calls(client, args.calls, args.concurrency)
+            requests = server.requests
+        stats = resilience.stats
+        print(
+            f"  {label:<10} ok={result['ok']:6.1%} p50={result['p50'] * 1000:7.1f}ms "
+            f"p99={result['p99'] * 1000:7.1f}ms upstream={requests:4} retries={stats['retries']:3} "
+            f"hedges={stats['hedges']:3} (won {stats['hedge_wins']}) throttled={stats['throttled']}"
+        )
+
+
+async def outage(args) -> None:
+    print("\noutage (cache expired, upstream down)")
+    for label, policy in policies(args).items():
+        resilience = Resilience(policy)
+        # Entries expire at the next 0.2s boundary, so the warm cache goes stale quickly
+        cache = ForecastCache(update_interval=0.2, publish_delay=0)
+        with StandInServer(delay=args.delay) as server:
+            client = OpenMeteoClient(
+                f"{server.base_url}/v1/forecast", cache=cache, resilience=resilience
+            )
+            await run_calls(client, len(LOCATIONS), args.concurrency)
+            await asyncio.sleep(0.3)
+            server.error_rate, server.delay = 1.0, args.outage_delay
+            before = server.requests
+            result = await run_calls(client, args.calls, args.concurrency)
+            during = server.requests - before
+
+            # Once the upstream is back, the breaker lets a probe through and closes
+            server.error_rate, server.delay = 0.0, args.delay
+            await asyncio.sleep(args.cooldown if policy.breaker_failures else 0)
+            await asyncio.sleep(0.3)
+            recovered = await run_calls(client, len(LOCATIONS), 1)
+        print(
+            f"  {label:<10} ok={result['ok']:6.1%} p50={result['p50'] * 1000:7.1f}ms "
+            f"p99={result['p99'] * 1000:7.1f}ms upstream={during:4} "
+            f"stale={cache.stats['stale_served']:4} short-circuited={resilience.stats['short_circuited']:4} "
+            f"after recovery ok={recovered['ok']:.0%} breaker={resilience.breaker.state}"
+        )
+
+
+async def main_async(args) -> None:
+    print(
+        f"{args.calls} forecast calls per run, {args.concurrency} concurrent, "
+        f"stand-in delay {args.delay * 1000:g}ms"
+    )
+    await scenario(
+        f"slow tail ({args.slow_rate:.0%} of responses +{args.slow_delay * 1000:g}ms)",
+        args,
+        {"slow_rate": args.slow_rate, "slow_delay": args.slow_delay},
+    )
+    await scenario(
+        f"errors ({args.error_rate:.0%} 503s)", args, {"error_rate": args.error_rate}
+    )
+    await scenario(
+        f"throttled ({args.error_rate:.0%} 429s, Retry-After {args.retry_after:g}s)",
+        args,
+        {"error_rate": args.error_rate, "status_on_error": 429, "retry_after": args.retry_after},
+    )
+    await outage(args)
+    await aclose_transport()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.01, help="normal stand-in latency")
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--outage-delay", type=float, default=0.2, help="latency of failing responses")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="breaker cooldown")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
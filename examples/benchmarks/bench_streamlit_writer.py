@@ -0,0 +1,76 @@
+"""
+Benchmark: feed a synthetic multi-thousand-token stream through StreamlitWriter
+and count placeholder renders, characters pushed to the browser and CPU time,
+for per-chunk rendering versus the throttled default.
+
+    python -m benchmarks.bench_streamlit_writer --tokens 5000
+"""
+
+import argparse
+import random
+import time
+
+from streamlit_writer import StreamlitWriter
+
+
+class FakePlaceholder:
+    """Stands in for `st.empty()`; encodes each render like the websocket payload would."""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes_sent = 0
+
+    def markdown(self, body: str) -> None:
+        self.calls += 1
+        self.bytes_sent += len(body.encode("utf-8"))
+
+
+def synthetic_stream(tokens: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    words = "the weather in London tomorrow looks mild with light rain after noon".split()
+    chunks = []
+    for i in range(tokens):
+        chunk = rnd.choice(words) + " "
+        if i % 40 == 39:
+            chunk += "\n\n"
+        chunks.append(chunk)
+    return chunks
+
+
+def run(chunks: list[str], token_delay: float, **writer_kwargs) -> tuple[FakePlaceholder, float, float]:
+    placeholder = FakePlaceholder()
+    writer = StreamlitWriter(placeholder, **writer_kwargs)
+    cpu, wall = time.process_time(), time.perf_counter()
+    for chunk in chunks:
+        writer(chunk)
+        if token_delay:
+            time.sleep(token_delay)
+    writer.flush()
+    return placeholder, time.process_time() - cpu, time.perf_counter() - wall
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0005,
+        help="seconds between chunks, to emulate model streaming speed",
+    )
+    args = parser.parse_args()
+
+    chunks = synthetic_stream(args.tokens)
+    modes = {
+        "every chunk": {"interval": 0, "min_chars": 0},
+        "throttled (50ms/200ch)": {},
+    }
+    print(f"{args.tokens} tokens, {sum(map(len, chunks)):,} chars")
+    for label, kwargs in modes.items():
+        placeholder, cpu, wall = run(chunks, args.token_delay, **kwargs)
+        print(
+            f"{label:<24} renders={placeholder.calls:>6} "
+            f"bytes_sent={placeholder.bytes_sent:>12,} cpu={cpu * 1000:8.1f}ms wall={wall * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+A local stand-in for the parts of the Google Calendar v3 API the agent uses:
+event insert/get/delete/list (with sync tokens) and the multipart batch endpoint.
+
+Point `GoogleCalendarService(credentials, api_endpoint=server.base_url)` at it
+with `google.auth.credentials.AnonymousCredentials()`.
+"""
+
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class CalendarStandIn:
+    def __init__(self):
+        self.events: dict[str, dict] = {}
+        # Change log used to serve incremental syncs: (sequence, event_id).
+        self.changes: list[tuple[int, str]] = []
+        self.sequence = 0
+        # Sync tokens older than this are rejected with 410 Gone, as after a server-side expiry.
+        self.oldest_sync_token = 0
+        self.time_zone = "UTC"
+        self.requests = 0
+        self.batch_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def cancel_all(self) -> None:
+        """Cancels every event, as a user clearing their calendar would."""
+        with self._lock:
+            for event_id, event in self.events.items():
+                if event.get("status") != "cancelled":
+                    event["status"] = "cancelled"
+                    self._record_change(event_id)
+
+    def expire_sync_tokens(self) -> None:
+        """Makes every sync token handed out so far invalid."""
+        with self._lock:
+            self.sequence += 1
+            self.oldest_sync_token = self.sequence
+
+    def handle(self, method: str, path: str, body: bytes) -> tuple[int, dict | None]:
+        """Dispatches one (possibly batched) API call and returns (status, json body)."""
+        url = urlparse(path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.removeprefix("/calendar/v3").strip("/").split("/")
+        with self._lock:
+            self.requests += 1
+            if parts[:3] != ["calendars", "primary", "events"]:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            if len(parts) == 3 and method == "POST":
+                event = json.loads(body or b"{}")
+                event.setdefault("id", f"evt{len(self.events)}")
+                event["status"] = "confirmed"
+                self.events[event["id"]] = event
+                self._record_change(event["id"])
+                return 200, event
+            if len(parts) == 3 and method == "GET":
+                token = int(query.get("syncToken", self.oldest_sync_token))
+                if token < self.oldest_sync_token:
+                    return 410, {"error": {"code": 410, "message": "Sync token is no longer valid."}}
+                return 200, self._list(query)
+            event_id = parts[3]
+            event = self.events.get(event_id)
+            if event is None or event.get("status") == "cancelled":
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            if method == "GET":
+                return 200, event
+            if method == "DELETE":
+                event["status"] = "cancelled"
+                self._record_change(event_id)
+                return 204, None
+        return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+    def _record_change(self, event_id: str) -> None:
+        self.sequence += 1
+        self.changes.append((self.sequence, event_id))
+
+    def _list(self, query: dict) -> dict:
+        page_size = int(query.get("maxResults", 250))
+        if "syncToken" in query:
+            since = int(query["syncToken"])
+            changed = dict.fromkeys(eid for seq, eid in self.changes if seq > since)
+            items = [self.events[eid] for eid in changed]
+        else:
+            items = [e for e in self.events.values() if e.get("status") != "cancelled"]
+        offset = int(query.get("pageToken", 0))
+        page = items[offset : offset + page_size]
+        result = {"kind": "calendar#events", "timeZone": self.time_zone, "items": page}
+        if offset + page_size < len(items):
+            result["nextPageToken"] = str(offset + page_size)
+        else:
+            result["nextSyncToken"] = str(self.sequence)
+        return result
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch()
+
+            def do_POST(self):
+                self._dispatch()
+
+            def do_DELETE(self):
+                self._dispatch()
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                if self.path.startswith("/batch/"):
+                    return self._batch(body)
+                status, payload = stand_in.handle(self.command, self.path, body)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _batch(self, body: bytes):
+                stand_in.batch_requests += 1
+                content_type = self.headers["Content-Type"]
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {content_type}\r\n\r\n".encode() + body
+                )
+                boundary = "batch_response_boundary"
+                out = []
+                for part in message.iter_parts():
+                    content_id = part["Content-ID"].strip("<>")
+                    raw = part.get_payload(decode=True)
+                    raw = raw.replace(b"\r\n", b"\n")
+                    head, _, inner_body = raw.partition(b"\n\n")
+                    method, path, _ = head.split(b"\n", 1)[0].decode().split(" ", 2)
+                    status, payload = stand_in.handle(method, path, inner_body)
+                    data = json.dumps(payload) if payload is not None else ""
+                    out.append(
+                        f"--{boundary}\r\nContent-Type: application/http\r\n"
+                        f"Content-ID: <response-{content_id}>\r\n\r\n"
+                        f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n\r\n{data}\r\n"
+                    )
+                out.append(f"--{boundary}--\r\n")
+                data = "".join(out).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
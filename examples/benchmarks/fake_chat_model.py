@@ -0,0 +1,107 @@
+"""
+A scripted chat model for offline benchmarks: replies (text or tool calls) come
+from a function of the conversation, and are streamed token by token with a
+configurable delay, so graph overhead can be measured without an LLM provider.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    `respond(messages)` returns the AIMessage to produce. Streaming waits
+    `first_token_delay` seconds, then emits each tool call and each word of the
+    text `token_delay` seconds apart; the last chunk carries usage metadata.
+    """
+
+    respond: Callable[[list[BaseMessage]], AIMessage]
+    token_delay: float = 0.0
+    first_token_delay: float = 0.0
+    model_name: str = "scripted"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        # The script decides which tools to call; binding is a no-op.
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        chunks = self._chunks(messages)
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for chunk in chunks[:-1]:
+            yield chunk
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        yield chunks[-1]
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = self._chunks(messages)
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+        for chunk in chunks[:-1]:
+            yield chunk
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+        yield chunks[-1]
+
+    def _chunks(self, messages) -> list[ChatGenerationChunk]:
+        """The scripted reply as stream chunks: tool calls, words, then usage."""
+        reply = self.respond(messages)
+        chunks = [
+            ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": index,
+                        }
+                    ],
+                )
+            )
+            for index, call in enumerate(reply.tool_calls)
+        ]
+        words = str(reply.content).split(" ") if reply.content else []
+        for i, word in enumerate(words):
+            chunks.append(
+                ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            )
+        tokens = len(chunks)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        chunks.append(
+            ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    usage_metadata={
+                        "input_tokens": prompt_tokens,
+                        "output_tokens": tokens,
+                        "total_tokens": prompt_tokens + tokens,
+                    },
+                )
+            )
+        )
+        return chunks
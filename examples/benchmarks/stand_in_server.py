@@ -0,0 +1,162 @@
+"""
+A tiny local stand-in for the Open-Meteo geocoding and forecast APIs.
+
+It speaks HTTP/1.1 with keep-alive so connection reuse in the service clients
+is observable, and it can inject latency and failures for resilience testing.
+"""
+
+import calendar
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOURLY_VARIABLES = (
+    "apparent_temperature",
+    "relativehumidity_2m",
+    "precipitation_probability",
+    "windspeed_10m",
+    "uv_index",
+)
+
+
+def fake_geocoding_result(name: str) -> dict:
+    # Deterministic pseudo-coordinates so repeated lookups are stable.
+    seed = sum(ord(c) for c in name.lower())
+    return {
+        "name": name.title(),
+        "latitude": round((seed % 140) - 70 + 0.1234, 4),
+        "longitude": round((seed * 7 % 340) - 170 + 0.5678, 4),
+        "timezone": "Europe/London",
+    }
+
+
+def fake_hourly_payload(latitude: float, longitude: float, variables, hours: int = 168,
+                        start: float | None = None, step_hours: int = 1) -> dict:
+    if start is None:
+        start = 1_760_000_000 - 1_760_000_000 % 86400
+    times = [
+        time.strftime("%Y-%m-%dT%H:%M", time.gmtime(start + 3600 * i))
+        for i in range(0, hours, step_hours)
+    ]
+    hours = len(times)
+    rnd = random.Random(f"{latitude:.2f},{longitude:.2f}")
+    hourly = {"time": times}
+    for var in variables:
+        hourly[var] = [round(rnd.uniform(0, 30), 1) for _ in range(hours)]
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "Europe/London",
+        "hourly_units": {var: "" for var in variables},
+        "hourly": hourly,
+    }
+
+
+class StandInServer:
+    """Runs the stand-in API on a background thread. Use as a context manager."""
+
+    def __init__(self, delay: float = 0.0, error_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_delay: float = 1.0, status_on_error: int = 503,
+                 retry_after: float | None = None):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.status_on_error = status_on_error
+        # Sent as a Retry-After header with injected errors (e.g. 429s), if set.
+        self.retry_after = retry_after
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Avoid Nagle/delayed-ACK stalls between the header and body writes.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                delay = server.delay
+                if server.slow_rate and random.random() < server.slow_rate:
+                    delay += server.slow_delay
+                if delay:
+                    time.sleep(delay)
+                if server.error_rate and random.random() < server.error_rate:
+                    headers = {}
+                    if server.retry_after is not None:
+                        headers["Retry-After"] = f"{server.retry_after:g}"
+                    return self._send(
+                        server.status_on_error, {"error": True, "reason": "injected"}, headers
+                    )
+
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.endswith("/search"):
+                    name = query.get("name", "")
+                    results = [] if name.lower().startswith("zz") else [fake_geocoding_result(name)]
+                    return self._send(200, {"results": results} if results else {})
+                if url.path.endswith("/forecast"):
+                    variables = query.get("hourly", ",".join(HOURLY_VARIABLES)).split(",")
+                    hours = int(query.get("forecast_hours", 168))
+                    start = None
+                    if "start_date" in query:
+                        start = calendar.timegm(time.strptime(query["start_date"], "%Y-%m-%d"))
+                        end = calendar.timegm(time.strptime(query["end_date"], "%Y-%m-%d"))
+                        hours = int((end - start) / 3600) + 24
+                    step = {"hourly_3": 3, "hourly_6": 6}.get(query.get("temporal_resolution"), 1)
+                    lats = [float(x) for x in query.get("latitude", "0").split(",")]
+                    lons = [float(x) for x in query.get("longitude", "0").split(",")]
+                    payloads = [
+                        fake_hourly_payload(la, lo, variables, hours, start, step)
+                        for la, lo in zip(lats, lons)
+                    ]
+                    return self._send(200, payloads[0] if len(payloads) == 1 else payloads)
+                return self._send(404, {"error": True, "reason": "not found"})
+
+            def _send(self, status: int, body, headers: dict | None = None) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                try:
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (e.g. a cancelled hedged request)
+                    self.close_connection = True
+
+        return Handler
@@ -7,14 +7,12 @@ import streamlit as st
 from dotenv import load_dotenv
 import supabase
 import uuid
-import asyncio
-import sys
-from langchain_core.messages import HumanMessage, AIMessage
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from langgraph.store.postgres import AsyncPostgresStore
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
 
-# Import our agent
-from agent_with_memory import build_graph
+# Import our agent runtime
+from agent_runtime import AgentRuntime
+from streamlit_writer import StreamlitWriter
 
 # Load environment variables
 load_dotenv()
@@ -113,6 +111,7 @@ def sign_out():
         st.session_state.user = None
         # Clear conversation history
         st.session_state.messages = []
+        st.session_state.pending_auth = False
         # Generate new thread ID for next session
         st.session_state.thread_id = str(uuid.uuid4())
         # Set a flag to trigger rerun on next render
@@ -134,92 +133,58 @@ if "user" not in st.session_state:
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
 
+# Set while a run is paused waiting for the user to authorize a tool
+if "pending_auth" not in st.session_state:
+    st.session_state.pending_auth = False
+
 # Check for logout flag and clear it after processing
 if st.session_state.get("logout_requested", False):
     st.session_state.logout_requested = False
     st.rerun()
 
 
-# Custom writer function for streaming
-class StreamlitWriter:
-    def __init__(self, placeholder):
-        self.placeholder = placeholder
-        self.content = ""
-
-    def __call__(self, text):
-        # Add proper formatting for authorization messages
-        if "🔐 Authorization required" in text:
-            # Add newlines around authorization messages
-            if not self.content.endswith("\n"):
-                self.content += "\n"
-            self.content += text
-            if not text.endswith("\n"):
-                self.content += "\n"
-        elif "Visit the following URL to authorize:" in text:
-            # Add newline before and after URL instruction
-            if not self.content.endswith("\n"):
-                self.content += "\n"
-            self.content += text + "\n"
-        elif "Waiting for authorization..." in text:
-            # Add newlines around waiting message
-            if not self.content.endswith("\n"):
-                self.content += "\n"
-            self.content += text + "\n\n"
-        elif text.startswith("You have the following emails") or text.startswith(
-            "From "
-        ):
-            # Add newline before email content
-            if not self.content.endswith("\n"):
-                self.content += "\n"
-            self.content += text
-        else:
-            self.content += text
-
-        self.placeholder.markdown(self.content)
-
-
-async def stream_agent_response(user_input: str, graph, config: dict, placeholder):
-    """Stream agent response with proper handling."""
-
-    # Build conversation history
-    messages = []
+@st.cache_resource(show_spinner=False)
+def get_agent_runtime() -> AgentRuntime:
+    """One background loop, connection pool and compiled graph shared by all sessions."""
+    return AgentRuntime(database_url)
 
-    # Add conversation history
-    for msg in st.session_state.messages:
-        if msg["role"] == "user":
-            messages.append(HumanMessage(content=msg["content"]))
-        elif msg["role"] == "assistant":
-            messages.append(AIMessage(content=msg["content"]))
 
-    # Add current user message
-    messages.append(HumanMessage(content=user_input))
-
-    # Prepare input
-    inputs = {"messages": messages}
+def stream_agent_response(inputs, runtime: AgentRuntime, config: dict, placeholder):
+    """
+    Stream agent response with proper handling. Returns the streamed text and
+    whether the run paused for tool authorization.
+    """
 
     writer = StreamlitWriter(placeholder)
-    full_response = ""
+    response_parts = []
+    interrupted = False
 
     try:
-        # Stream the response
-        async for chunk in graph.astream(inputs, config=config, stream_mode="custom"):
-            if isinstance(chunk, str):
+        # Stream the response; "updates" is only watched for authorization pauses
+        for mode, chunk in runtime.stream(
+            inputs, config=config, stream_mode=["custom", "updates"]
+        ):
+            if mode == "updates":
+                interrupted = interrupted or "__interrupt__" in chunk
+            elif isinstance(chunk, str):
                 writer(chunk)
-                full_response += chunk
+                response_parts.append(chunk)
             elif isinstance(chunk, bytes):
                 decoded = chunk.decode("utf-8")
                 writer(decoded)
-                full_response += decoded
+                response_parts.append(decoded)
 
-        return full_response
+        writer.flush()
+        return "".join(response_parts), interrupted
 
     except Exception as e:
         error_msg = f"Error processing request: {str(e)}"
         writer(error_msg)
-        return error_msg
+        writer.flush()
+        return error_msg, False
 
 
-async def run_agent_interaction(user_input: str, user_email: str, thread_id: str):
+def run_agent_interaction(inputs, user_email: str, thread_id: str) -> str:
     """Run the agent interaction with proper setup."""
 
     # Set up configuration
@@ -231,20 +196,33 @@ async def run_agent_interaction(user_input: str, user_email: str, thread_id: str
     # Create placeholder for streaming
     response_placeholder = st.empty()
 
-    # Use context managers for store and checkpointer
-    async with (
-        AsyncPostgresStore.from_conn_string(database_url) as store,
-        AsyncPostgresSaver.from_conn_string(database_url) as checkpointer,
-    ):
-        # Build the graph
-        graph = build_graph(checkpointer, store)
+    # Reuse the long-lived runtime (pool, store, checkpointer and compiled graph)
+    runtime = get_agent_runtime()
 
-        # Stream the response
-        response = await stream_agent_response(
-            user_input, graph, config, response_placeholder
-        )
+    # Stream the response
+    response, interrupted = stream_agent_response(
+        inputs, runtime, config, response_placeholder
+    )
+    st.session_state.pending_auth = interrupted
+    return response
 
-        return response
+
+def chat_turn(inputs, user_message: str | None = None) -> None:
+    """Runs one agent turn (or resumes a paused one) and records it in the chat history."""
+    with st.chat_message("assistant"):
+        try:
+            # Run the agent interaction on the shared runtime loop
+            response = run_agent_interaction(
+                inputs, st.session_state.user.email, st.session_state.thread_id
+            )
+        except Exception as e:
+            response = f"Error: {str(e)}"
+            st.error(response)
+
+    # Add both messages to chat history
+    if user_message is not None:
+        st.session_state.messages.append({"role": "user", "content": user_message})
+    st.session_state.messages.append({"role": "assistant", "content": response})
 
 
 # Sidebar for authentication
@@ -303,6 +281,7 @@ with st.sidebar:
             # Clear conversation button
             if st.button("🔄 New Conversation"):
                 st.session_state.messages = []
+                st.session_state.pending_auth = False
                 st.session_state.thread_id = str(uuid.uuid4())
                 st.rerun()
 
@@ -340,42 +319,34 @@ if st.session_state.authenticated and st.session_state.user:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-    # Chat input (naturally appears at bottom)
-    if prompt := st.chat_input("Ask me anything..."):
+    # A paused run continues once the user has authorized the tool, or is cancelled
+    if st.session_state.pending_auth:
+        continue_col, cancel_col = st.columns(2)
+        if continue_col.button("✅ I've authorized, continue"):
+            st.session_state.pending_auth = False
+            chat_turn(Command(resume=True))
+            st.rerun()
+        if cancel_col.button("✖️ Cancel"):
+            st.session_state.pending_auth = False
+            chat_turn(Command(resume=False))
+            st.rerun()
+
+    # Chat input (naturally appears at bottom). A new message while a run is paused
+    # would leave its tool calls unanswered and break the thread, so it waits.
+    if prompt := st.chat_input(
+        "Authorize or cancel above to continue..."
+        if st.session_state.pending_auth
+        else "Ask me anything...",
+        disabled=st.session_state.pending_auth,
+    ):
         # Display user message immediately
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Display assistant response
-        with st.chat_message("assistant"):
-            try:
-                # Handle Windows event loop
-                if sys.platform == "win32":
-                    asyncio.set_event_loop_policy(
-                        asyncio.WindowsSelectorEventLoopPolicy()
-                    )
-
-                # Run the async agent interaction
-                response = asyncio.run(
-                    run_agent_interaction(
-                        prompt, st.session_state.user.email, st.session_state.thread_id
-                    )
-                )
-
-                # Add both messages to chat history
-                st.session_state.messages.append({"role": "user", "content": prompt})
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": response}
-                )
-
-            except Exception as e:
-                error_msg = f"Error: {str(e)}"
-                st.error(error_msg)
-                # Still add the user message and error to history
-                st.session_state.messages.append({"role": "user", "content": prompt})
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": error_msg}
-                )
+        # Only send the new message; the checkpointer already holds the thread's history
+        chat_turn({"messages": [HumanMessage(content=prompt)]}, user_message=prompt)
+        if st.session_state.pending_auth:
+            st.rerun()
 else:
     # Welcome screen for non-authenticated users
     st.title("Welcome to Arcade AI Agent")
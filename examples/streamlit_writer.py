@@ -0,0 +1,90 @@
+"""
+Streaming writer that renders agent output into a Streamlit placeholder.
+"""
+
+import time
+
+
+# Custom writer function for streaming
+class StreamlitWriter:
+    """
+    Accumulates streamed text in a list of parts and re-renders the placeholder
+    at most every `interval` seconds or `min_chars` new characters, instead of on
+    every token. Call `flush()` when the stream ends so the final text is shown.
+    Set both thresholds to 0 to render on every chunk.
+    """
+
+    def __init__(self, placeholder, interval: float = 0.05, min_chars: int = 200):
+        self.placeholder = placeholder
+        self.interval = interval
+        self.min_chars = min_chars
+        self.render_calls = 0
+        self._parts: list[str] = []
+        self._last_char = ""
+        self._pending_chars = 0
+        self._last_render = 0.0
+
+    @property
+    def content(self) -> str:
+        return "".join(self._parts)
+
+    def __call__(self, text):
+        # Add proper formatting for authorization messages
+        if "🔐 Authorization required" in text:
+            # Add newlines around authorization messages
+            self._ensure_newline()
+            self._append(text)
+            if not text.endswith("\n"):
+                self._append("\n")
+        elif "Visit the following URL to authorize:" in text:
+            # Add newline before and after URL instruction
+            self._ensure_newline()
+            self._append(text + "\n")
+            # Show the link right away rather than waiting for the next interval
+            self.flush()
+            return
+        elif "Waiting for authorization..." in text:
+            # Add newlines around waiting message
+            self._ensure_newline()
+            self._append(text + "\n\n")
+            self.flush()
+            return
+        elif text.startswith("You have the following emails") or text.startswith(
+            "From "
+        ):
+            # Add newline before email content
+            self._ensure_newline()
+            self._append(text)
+        else:
+            self._append(text)
+
+        now = time.monotonic()
+        if (
+            self._pending_chars >= self.min_chars
+            or now - self._last_render >= self.interval
+        ):
+            self._render(now)
+
+    def flush(self) -> None:
+        """Renders any text buffered since the last render."""
+        if self._pending_chars or not self.render_calls:
+            self._render(time.monotonic())
+
+    def _append(self, text: str) -> None:
+        if text:
+            self._parts.append(text)
+            self._last_char = text[-1]
+            self._pending_chars += len(text)
+
+    def _ensure_newline(self) -> None:
+        if self._last_char != "\n":
+            self._append("\n")
+
+    def _render(self, now: float) -> None:
+        # Collapse the parts so the next join only touches text added since
+        content = "".join(self._parts)
+        self._parts = [content] if content else []
+        self.placeholder.markdown(content)
+        self.render_calls += 1
+        self._pending_chars = 0
+        self._last_render = now
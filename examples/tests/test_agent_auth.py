@@ -0,0 +1,91 @@
+import asyncio
+import os
+from functools import partial
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("ARCADE_API_KEY", "offline")
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command
+
+from agent_auth import AuthStatusCache
+from agent_with_memory import AgentState, await_authorization
+
+
+class FakeManager:
+    """Stands in for Arcade's ToolManager: `completed` is the set of finished authorizations."""
+
+    def __init__(self):
+        self.completed: set[str] = set()
+        self.checks = 0
+
+    def requires_auth(self, tool_name):
+        return True
+
+    def authorize(self, tool_name, user_id):
+        return SimpleNamespace(status="pending", url="https://auth.test", id=f"auth-{tool_name}")
+
+    def is_authorized(self, authorization_id):
+        self.checks += 1
+        return authorization_id in self.completed
+
+
+def build(auth: AuthStatusCache):
+    builder = StateGraph(AgentState)
+    builder.add_node("await_authorization", partial(await_authorization, auth=auth))
+    builder.add_edge(START, "await_authorization")
+    builder.add_edge("await_authorization", END)
+    return builder.compile(checkpointer=InMemorySaver())
+
+
+def run(graph, inputs, config):
+    return asyncio.run(graph.ainvoke(inputs, config))
+
+
+PENDING = [{"tool": "Gmail_ListEmails", "url": "https://auth.test", "id": "auth-Gmail_ListEmails"}]
+CALL = AIMessage(content="", tool_calls=[{"name": "Gmail_ListEmails", "args": {}, "id": "call_1"}])
+
+
+def test_completed_authorization_is_cached_until_ttl():
+    auth = AuthStatusCache(FakeManager(), ttl=60)
+    auth.mark_authorized("u", "Gmail_ListEmails")
+
+    assert auth.needs_authorization("u", ["Gmail_ListEmails"]) == []
+    auth.invalidate("u")
+    assert auth.needs_authorization("u", ["Gmail_ListEmails"]) == ["Gmail_ListEmails"]
+
+
+def test_resume_drops_the_cached_status_and_checks_again():
+    manager = FakeManager()
+    auth = AuthStatusCache(manager, ttl=60)
+    graph = build(auth)
+    config = {"configurable": {"thread_id": "t", "user_id": "u"}}
+
+    result = run(graph, {"messages": [CALL], "pending_auth": PENDING}, config)
+    assert result["__interrupt__"][0].value["type"] == "authorization"
+
+    # A status cached before the user finished must not survive the resume
+    auth.mark_authorized("u", "Gmail_ListEmails")
+    manager.completed.add("auth-Gmail_ListEmails")
+    result = run(graph, Command(resume=True), config)
+
+    assert result["pending_auth"] == []
+    assert manager.checks == 1
+    assert auth.is_authorized("u", "Gmail_ListEmails")
+
+
+def test_cancelled_authorization_answers_the_tool_calls():
+    auth = AuthStatusCache(FakeManager(), ttl=60)
+    auth.mark_authorized("u", "Gmail_ListEmails")
+    graph = build(auth)
+    config = {"configurable": {"thread_id": "t", "user_id": "u"}}
+
+    run(graph, {"messages": [CALL], "pending_auth": PENDING}, config)
+    result = run(graph, Command(resume=False), config)
+
+    assert result["messages"][-1].status == "error"
+    assert result["messages"][-1].tool_call_id == "call_1"
+    assert not auth.is_authorized("u", "Gmail_ListEmails")
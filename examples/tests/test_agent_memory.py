@@ -0,0 +1,74 @@
+import asyncio
+import math
+
+from langgraph.store.memory import InMemoryStore
+
+from agent_memory import MemoryCompactor, MemoryRetriever, remember, remember_later
+
+NAMESPACE = ("memories", "user")
+
+
+def unit(*components: float) -> list[float]:
+    norm = math.sqrt(sum(c * c for c in components))
+    return [c / norm for c in components]
+
+
+# "A" and the "D"s are near-identical; "C" is close to "A" but less so than the
+# "D"s are, so A's top-5 neighbours don't include C while C's include A.
+VECTORS = {
+    "A": unit(1, 0, 0, 0, 0, 0),
+    "C": unit(1, 0.33, 0, 0, 0, 0),
+    **{f"D{i}": unit(1, 0, *(0.1 if j == i else 0 for j in range(4))) for i in range(4)},
+}
+
+
+def make_store() -> InMemoryStore:
+    return InMemoryStore(
+        index={"dims": 6, "embed": lambda texts: [VECTORS[t] for t in texts], "fields": ["data"]}
+    )
+
+
+async def keys(store: InMemoryStore) -> set[str]:
+    return {item.key for item in await store.asearch(NAMESPACE, limit=100)}
+
+
+def test_near_duplicates_keep_only_the_newest_wording():
+    async def main():
+        store = make_store()
+        # Oldest first: "A" is the newest
+        for text in ["D0", "D1", "D2", "D3", "C", "A"]:
+            await store.aput(NAMESPACE, text, {"data": text})
+            await asyncio.sleep(0.001)
+        compactor = MemoryCompactor(retriever=MemoryRetriever(), threshold=0.92, max_items=100)
+        report = await compactor.compact(store, NAMESPACE)
+        return report, await keys(store)
+
+    report, remaining = asyncio.run(main())
+
+    assert remaining == {"A"}
+    assert report["after"] == 1
+
+
+def test_exact_repeats_share_one_key():
+    async def main():
+        store = InMemoryStore()
+        first = await remember(store, NAMESPACE, "Remember my dentist is on Monday")
+        second = await remember(store, NAMESPACE, "remember my  dentist is on monday")
+        item = await store.aget(NAMESPACE, first)
+        return first, second, item
+
+    first, second, item = asyncio.run(main())
+
+    assert first == second
+    assert item.value["mentions"] == 2
+
+
+def test_remember_later_stores_in_the_background():
+    async def main():
+        store = InMemoryStore()
+        task = remember_later(store, NAMESPACE, "Remember I like tea")
+        assert not task.done()
+        key = await task
+        return await store.aget(NAMESPACE, key)
+
+    assert asyncio.run(main()).value["data"] == "Remember I like tea"
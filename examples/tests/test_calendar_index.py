@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.errors import HttpError
+
+from benchmarks.calendar_stand_in import CalendarStandIn
+from src.models import ActivityWindow
+from src.services.calendar_index import BusyIntervalIndex
+from src.services.google_calendar import GoogleCalendarService
+
+PARIS = ZoneInfo("Europe/Paris")
+
+
+def at(hour: int, day: int = 18) -> datetime:
+    return datetime(2025, 10, day, hour, tzinfo=PARIS)
+
+
+def event(event_id: str, start: int, end: int, **extra) -> dict:
+    return {
+        "id": event_id,
+        "start": {"dateTime": at(start).isoformat()},
+        "end": {"dateTime": at(end).isoformat()},
+        **extra,
+    }
+
+
+def test_overlapping_events_merge_into_busy_intervals():
+    index = BusyIntervalIndex()
+    index.upsert(event("a", 9, 11))
+    index.upsert(event("b", 10, 12))
+    index.upsert(event("c", 15, 16))
+
+    assert not index.is_free(at(11), at(13))
+    assert index.is_free(at(12), at(15))
+    assert index.free_windows(at(8), at(18), timedelta(hours=1)) == [
+        (at(8), at(9)),
+        (at(12), at(15)),
+        (at(16), at(18)),
+    ]
+
+
+def test_cancelled_and_transparent_events_do_not_block():
+    index = BusyIntervalIndex()
+    index.upsert(event("a", 9, 11))
+    index.upsert(event("a", 9, 11, status="cancelled"))
+    index.upsert(event("b", 12, 13, transparency="transparent"))
+
+    assert len(index) == 0
+    assert index.is_free(at(8), at(14))
+
+
+def test_all_day_events_are_days_in_the_calendar_time_zone():
+    index = BusyIntervalIndex(timezone="Europe/Paris")
+    index.upsert({"id": "a", "start": {"date": "2025-10-18"}, "end": {"date": "2025-10-19"}})
+
+    # 23:30 UTC on the 17th is already the 18th in Paris
+    assert not index.is_free(
+        datetime(2025, 10, 17, 22, 30, tzinfo=timezone.utc),
+        datetime(2025, 10, 17, 23, 0, tzinfo=timezone.utc),
+    )
+    assert index.is_free(at(0, day=19), at(1, day=19))
+
+
+@pytest.fixture
+def stand_in():
+    with CalendarStandIn() as server:
+        server.time_zone = "Europe/Paris"
+        yield server
+
+
+@pytest.fixture
+def calendar(stand_in):
+    return GoogleCalendarService(AnonymousCredentials(), api_endpoint=stand_in.base_url)
+
+
+def window(start: int, end: int) -> ActivityWindow:
+    return ActivityWindow(start_time=at(start), end_time=at(end), summary="Sunny")
+
+
+def test_refresh_applies_only_changes_after_the_first_sync(stand_in, calendar):
+    calendar.create_event(window(9, 10), "run")
+    assert calendar.refresh() == 1
+    assert calendar.busy_index.timezone == "Europe/Paris"
+
+    stand_in.events["other"] = event("other", 14, 15, status="confirmed")
+    stand_in._record_change("other")
+
+    assert calendar.refresh() == 1
+    assert not calendar.is_free(window(14, 15))
+
+
+def test_expired_sync_token_falls_back_to_a_full_sync(stand_in, calendar):
+    calendar.create_event(window(9, 10), "run")
+    calendar.refresh()
+    stand_in.expire_sync_tokens()
+
+    assert calendar.refresh() == 1
+    assert not calendar.is_free(window(9, 10))
+    # The new token works again
+    assert calendar.refresh() == 0
+
+
+def test_failed_batch_items_do_not_change_the_index(stand_in, calendar):
+    [event_id] = calendar.create_events([(window(9, 10), "run")])
+
+    with pytest.raises(HttpError):
+        calendar.delete_events(["missing", event_id])
+
+    assert calendar.is_free(window(9, 10))
+    assert len(calendar.busy_index) == 0
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import TypedDict
+from zoneinfo import ZoneInfo
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command
+
+from src.models import ActivityWindow
+from src.services.google_calendar import GoogleCalendarService
+from src.tools.calendar_tool import build_calendar_tools
+
+PARIS = ZoneInfo("Europe/Paris")
+ARGS = {
+    "summary": "Bike ride in Paris",
+    "start_time": "2025-10-18T10:00:00",
+    "end_time": "2025-10-18T12:00:00",
+    "timezone": "Europe/Paris",
+}
+
+
+class StubCalendar:
+    """Records bookings instead of calling Google Calendar; `busy` windows are taken."""
+
+    def __init__(self, busy: list[tuple[datetime, datetime]] = ()):
+        self.busy = list(busy)
+        self.created: list[tuple[ActivityWindow, str, str]] = []
+        self.refreshes = 0
+
+    async def arefresh(self):
+        self.refreshes += 1
+
+    def is_free(self, window: ActivityWindow) -> bool:
+        return all(
+            window.end_time <= start or window.start_time >= end for start, end in self.busy
+        )
+
+    def free_windows(self, start: datetime, end: datetime, min_duration: timedelta):
+        return [(b_end, end) for _, b_end in self.busy if end - b_end >= min_duration]
+
+    async def acreate_event(self, window: ActivityWindow, activity: str, timezone: str) -> str:
+        self.created.append((window, activity, timezone))
+        return f"event{len(self.created)}"
+
+
+class State(TypedDict):
+    result: str
+
+
+def build(calendar) -> tuple:
+    """A one-node graph calling the tool, so its confirmation interrupt can pause and resume."""
+    [create] = build_calendar_tools(calendar)
+
+    async def book(state: State):
+        return {"result": await create.ainvoke(ARGS)}
+
+    builder = StateGraph(State)
+    builder.add_node("book", book)
+    builder.add_edge(START, "book")
+    builder.add_edge("book", END)
+    graph = builder.compile(checkpointer=InMemorySaver())
+    return graph, {"configurable": {"thread_id": "t"}}
+
+
+def test_booking_waits_for_confirmation():
+    calendar = StubCalendar()
+    graph, config = build(calendar)
+
+    paused = asyncio.run(graph.ainvoke({"result": ""}, config))
+    [pending] = paused["__interrupt__"]
+    assert pending.value["type"] == "confirmation"
+    assert pending.value["summary"] == "Bike ride in Paris"
+    assert calendar.created == []
+
+    result = asyncio.run(graph.ainvoke(Command(resume=True), config))
+
+    assert result["result"].startswith("Created event event1")
+    [(window, activity, timezone)] = calendar.created
+    assert activity == "Bike ride in Paris"
+    assert timezone == "Europe/Paris"
+    # Times without an offset are read in the event's zone
+    assert window.start_time == datetime(2025, 10, 18, 10, tzinfo=PARIS)
+    assert window.summary == "Planned by Kai"
+
+
+def test_declined_booking_creates_nothing():
+    calendar = StubCalendar()
+    graph, config = build(calendar)
+
+    asyncio.run(graph.ainvoke({"result": ""}, config))
+    result = asyncio.run(graph.ainvoke(Command(resume=False), config))
+
+    assert result["result"].startswith("Not created: the user did not confirm")
+    assert calendar.created == []
+
+
+def test_busy_slot_lists_free_slots_without_asking():
+    busy = (datetime(2025, 10, 18, 9, tzinfo=PARIS), datetime(2025, 10, 18, 11, tzinfo=PARIS))
+    calendar = StubCalendar(busy=[busy])
+    graph, config = build(calendar)
+
+    result = asyncio.run(graph.ainvoke({"result": ""}, config))
+
+    assert "__interrupt__" not in result
+    assert result["result"].startswith("Not created: the calendar is already busy")
+    assert "Free slots that day: 11:00" in result["result"]
+    assert calendar.created == []
+
+
+def test_event_body_carries_the_timezone():
+    window = ActivityWindow(
+        start_time=datetime(2025, 10, 18, 10, tzinfo=PARIS),
+        end_time=datetime(2025, 10, 18, 12, tzinfo=PARIS),
+        summary="Planned by Kai",
+    )
+
+    _, body = GoogleCalendarService._event_body(window, "bike ride", "Europe/Paris")
+
+    assert body["start"]["timeZone"] == body["end"]["timeZone"] == "Europe/Paris"
+    assert body["description"] == "Planned by Kai"
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services.forecast_cache import ForecastCache
+
+KEY = ("grid", "key")
+
+
+def test_keys_snap_to_the_grid_and_ignore_variable_order():
+    cache = ForecastCache(grid_degrees=0.1)
+    assert cache.make_key(48.83, 2.34, ("b", "a"), "Europe/Paris") == cache.make_key(
+        48.77, 2.26, ("a", "b"), "Europe/Paris"
+    )
+    assert cache.make_key(48.85, 2.35, ("a",), "UTC") != cache.make_key(48.95, 2.35, ("a",), "UTC")
+
+
+def test_entries_expire_at_the_next_update_boundary():
+    cache = ForecastCache(update_interval=3600, publish_delay=300)
+    assert cache.expires_at(7200 + 100) == 7200 + 300
+    assert cache.expires_at(7200 + 400) == 10800 + 300
+
+
+def test_concurrent_threads_share_one_fetch():
+    cache = ForecastCache()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"hourly": {}}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch(KEY, fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    # Let every thread reach the cache before the fetch returns
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"hourly": {}}] * 5
+
+
+def test_concurrent_awaiters_share_one_fetch():
+    cache = ForecastCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"hourly": {}}
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_fetch(KEY, fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == [{"hourly": {}}] * 5
+    assert len(calls) == 1
+    assert cache.stats["coalesced"] == 4
+
+
+def test_fetch_errors_reach_every_awaiter_and_are_not_cached():
+    cache = ForecastCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.aget_or_fetch(KEY, fail) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(main())
+    assert [str(e) for e in errors] == ["upstream down"] * 3
+    assert cache.get(KEY) is None
+
+
+def test_cancelled_leader_hands_the_fetch_to_a_waiter():
+    cache = ForecastCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"attempt": len(calls)}
+
+    async def main():
+        leader = asyncio.ensure_future(cache.aget_or_fetch(KEY, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.aget_or_fetch(KEY, fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == {"attempt": 2}
+    assert cache.get(KEY) == {"attempt": 2}
+
+
+def test_stale_payload_is_served_only_within_max_stale():
+    cache = ForecastCache(update_interval=0.01, publish_delay=0, max_stale=60)
+    cache.put(KEY, {"old": True})
+    assert cache.get_stale(KEY) == {"old": True}
+
+    cache.max_stale = 0
+    time.sleep(0.02)
+    assert cache.get(KEY) is None
+    assert cache.get_stale(KEY) is None
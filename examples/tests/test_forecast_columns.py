@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from src.services.forecast_columns import ColumnarForecast
+
+
+def forecast(hours: int, step: int = 1, **columns) -> ColumnarForecast:
+    times = [f"2025-10-18T{h:02d}:00" for h in range(0, hours, step)]
+    return ColumnarForecast.from_payload(
+        {
+            "timezone": "Europe/Paris",
+            "hourly": {"time": times, **columns},
+        }
+    )
+
+
+def test_best_window_avoids_rain():
+    rain = [80] * 10 + [0] * 4 + [80] * 10
+    f = forecast(
+        24,
+        apparent_temperature=[20] * 24,
+        precipitation_probability=rain,
+        windspeed_10m=[5] * 24,
+        uv_index=[2] * 24,
+        relativehumidity_2m=[50] * 24,
+    )
+
+    [best] = f.find_activity_windows(2, top_k=1)
+
+    window = best.to_activity_window()
+    assert window.start_time.hour in (10, 11, 12)
+    assert (window.end_time - window.start_time).total_seconds() == 2 * 3600
+    assert "rain chance up to 0%" in window.summary
+
+
+def test_missing_variables_are_neutral():
+    f = forecast(6, apparent_temperature=[25, 20, 20, 25, 25, 25])
+
+    [best] = f.find_activity_windows(2, top_k=1)
+
+    assert best.start == 1
+    assert best.to_activity_window().summary == "Feels like 20.0°C on average."
+
+
+def test_three_hourly_steps_set_window_length_and_timestamps():
+    f = forecast(24, step=3, apparent_temperature=[20] * 8, precipitation_probability=[0] * 8)
+
+    candidates = f.find_activity_windows(4, top_k=8)
+
+    assert all(c.steps == 2 for c in candidates)
+    window = candidates[0].to_activity_window()
+    assert (window.end_time - window.start_time).total_seconds() == 6 * 3600
+    assert f.timestamp(len(f)).hour == 0 and f.timestamp(len(f) - 1).hour == 21
+
+
+def test_windows_stay_within_start_and_end():
+    f = forecast(24, apparent_temperature=[20] * 24)
+
+    candidates = f.find_activity_windows(
+        2, top_k=24, start=datetime(2025, 10, 18, 9), end=datetime(2025, 10, 18, 13)
+    )
+
+    assert sorted(c.start for c in candidates) == [9, 11]
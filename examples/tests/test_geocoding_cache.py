@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.services.geocoding_cache import GeocodingCache
+from src.services.geocoding_client import GeocodingClient
+from src.services.resilience import Resilience, ResiliencePolicy
+
+PARIS = {"name": "Paris", "latitude": 48.85, "longitude": 2.35, "timezone": "Europe/Paris"}
+
+
+def make_client(cache: GeocodingCache, results: dict[str, list]) -> tuple[GeocodingClient, list]:
+    """A client answering from `results` (city -> API results) that records each request."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.params["name"])
+        return httpx.Response(200, json={"results": results.get(request.url.params["name"], [])})
+
+    client = GeocodingClient(
+        "http://geocoding.test/v1/search",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        cache=cache,
+        resilience=Resilience(ResiliencePolicy.disabled()),
+    )
+    return client, requests
+
+
+def test_normalize_key_folds_case_accents_and_whitespace():
+    assert GeocodingCache.normalize_key("São  Paulo") == GeocodingCache.normalize_key("sao paulo")
+    assert GeocodingCache.normalize_key(" ZÜRICH ") == "en:zurich"
+    assert GeocodingCache.normalize_key("Paris", "FR") == "fr:paris"
+
+
+def test_spelling_variants_share_one_request():
+    client, requests = make_client(GeocodingCache(), {"Paris": [PARIS]})
+
+    assert client.fetch_coordinates("Paris") == PARIS
+    assert client.fetch_coordinates("  PARIS ") == PARIS
+    assert requests == ["Paris"]
+
+
+def test_unknown_city_is_cached_as_negative_result():
+    cache = GeocodingCache()
+    client, requests = make_client(cache, {})
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Could not find coordinates"):
+            client.fetch_coordinates("Atlantis")
+    assert requests == ["Atlantis"]
+    assert cache.stats["negative_hits"] == 1
+
+
+def test_negative_entries_expire_after_negative_ttl():
+    cache = GeocodingCache(negative_ttl=0.01)
+    cache.put("Atlantis", "en", None)
+    assert cache.get("Atlantis") == (True, None)
+
+    time.sleep(0.02)
+    assert cache.get("Atlantis") == (False, None)
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    path = str(tmp_path / "geocode.sqlite")
+    first = GeocodingCache(path)
+    first.put("Paris", "en", PARIS)
+    first.close()
+
+    second = GeocodingCache(path)
+    assert second.get("paris") == (True, PARIS)
+    assert second.stats["disk_hits"] == 1
+    # Now promoted to the memory tier
+    assert second.get("paris") == (True, PARIS)
+    assert second.stats["memory_hits"] == 1
+    second.close()
+
+
+def test_async_lookup_reads_disk_tier(tmp_path):
+    path = str(tmp_path / "geocode.sqlite")
+    writer = GeocodingCache(path)
+    writer.put("Paris", "en", PARIS)
+    writer.close()
+    cache = GeocodingCache(path)
+
+    assert asyncio.run(cache.aget("PARIS")) == (True, PARIS)
+    assert cache.stats["disk_hits"] == 1
+    cache.close()
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from benchmarks.calendar_stand_in import CalendarStandIn
+from src.models import ActivityWindow
+from src.services.google_calendar import MAX_BATCH_SIZE, GoogleCalendarService
+
+START = datetime(2025, 10, 18, 10, tzinfo=timezone.utc)
+
+
+def windows(count: int) -> list[tuple[ActivityWindow, str]]:
+    return [
+        (
+            ActivityWindow(
+                start_time=START + timedelta(hours=2 * i),
+                end_time=START + timedelta(hours=2 * i + 1),
+                summary="Sunny",
+            ),
+            f"walk {i}",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def stand_in():
+    with CalendarStandIn() as server:
+        yield server
+
+
+@pytest.fixture
+def calendar(stand_in):
+    return GoogleCalendarService(AnonymousCredentials(), api_endpoint=stand_in.base_url)
+
+
+def test_create_events_splits_into_batches_of_fifty(stand_in, calendar):
+    event_ids = calendar.create_events(windows(MAX_BATCH_SIZE + 5))
+
+    assert stand_in.batch_requests == 2
+    assert len(event_ids) == MAX_BATCH_SIZE + 5
+    assert [stand_in.events[i]["summary"] for i in event_ids[:2]] == [
+        "🗓️ Recommended time for walk 0",
+        "🗓️ Recommended time for walk 1",
+    ]
+
+
+def test_delete_events_removes_every_event(stand_in, calendar):
+    event_ids = calendar.create_events(windows(3))
+
+    calendar.delete_events(event_ids)
+
+    assert stand_in.batch_requests == 2
+    assert all(stand_in.events[i]["status"] == "cancelled" for i in event_ids)
+
+
+def test_async_variants_run_off_the_event_loop(stand_in, calendar):
+    async def main():
+        event_id = await calendar.acreate_event(*windows(1)[0])
+        fetched = await calendar.aget_event(event_id)
+        await calendar.adelete_event(event_id)
+        return event_id, fetched
+
+    event_id, fetched = asyncio.run(main())
+
+    assert fetched["id"] == event_id
+    assert stand_in.events[event_id]["status"] == "cancelled"
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+
+from src.models import Location
+from src.services.forecast_cache import ForecastCache
+from src.services.open_meteo_client import OpenMeteoClient
+from src.services.resilience import Resilience, ResiliencePolicy
+
+LOCATIONS = [
+    Location(name=f"City {i}", latitude=40 + i, longitude=-3 + i, timezone="Europe/Madrid")
+    for i in range(5)
+]
+
+
+def payload(latitude: str, longitude: str) -> dict:
+    return {"latitude": float(latitude), "longitude": float(longitude), "hourly": {"time": []}}
+
+
+def make_client(requests: list, **kwargs) -> OpenMeteoClient:
+    """A client whose upstream echoes one payload per requested coordinate pair."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        latitudes = request.url.params["latitude"].split(",")
+        longitudes = request.url.params["longitude"].split(",")
+        requests.append(len(latitudes))
+        payloads = [payload(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+        return httpx.Response(200, json=payloads[0] if len(payloads) == 1 else payloads)
+
+    transport = httpx.MockTransport(handler)
+    return OpenMeteoClient(
+        "http://forecast.test/v1/forecast",
+        client=httpx.Client(transport=transport),
+        async_client=httpx.AsyncClient(transport=transport),
+        resilience=Resilience(ResiliencePolicy.disabled()),
+        **kwargs,
+    )
+
+
+def test_locations_are_packed_into_one_request_in_input_order():
+    requests = []
+    client = make_client(requests)
+
+    results = client.fetch_hourly_forecast_many(LOCATIONS)
+
+    assert requests == [5]
+    assert [r["latitude"] for r in results] == [loc.latitude for loc in LOCATIONS]
+
+
+def test_batches_split_at_the_location_limit():
+    requests = []
+    client = make_client(requests, max_locations_per_request=2)
+
+    results = client.fetch_hourly_forecast_many(LOCATIONS)
+
+    assert requests == [2, 2, 1]
+    assert [r["latitude"] for r in results] == [loc.latitude for loc in LOCATIONS]
+
+
+def test_batches_split_at_the_url_length_limit():
+    requests = []
+    client = make_client(requests, max_url_length=200)
+
+    client.fetch_hourly_forecast_many(LOCATIONS)
+
+    assert len(requests) > 1
+    assert sum(requests) == len(LOCATIONS)
+
+
+def test_cached_and_duplicate_locations_are_not_requested_again():
+    requests = []
+    client = make_client(requests, cache=ForecastCache())
+    client.fetch_hourly_forecast_many(LOCATIONS[:2])
+
+    results = client.fetch_hourly_forecast_many(LOCATIONS + LOCATIONS[:1])
+
+    assert requests == [2, 3]
+    assert len(results) == 6
+    assert results[0] is results[5]
+
+
+def test_async_batches_run_concurrently_and_keep_order():
+    requests = []
+    client = make_client(requests, max_locations_per_request=2)
+
+    results = asyncio.run(client.afetch_hourly_forecast_many(LOCATIONS))
+
+    assert sorted(requests) == [1, 2, 2]
+    assert [r["latitude"] for r in results] == [loc.latitude for loc in LOCATIONS]
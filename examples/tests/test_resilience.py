@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    Resilience,
+    ResiliencePolicy,
+)
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_cooldown():
+    breaker = CircuitBreaker(failures=2, cooldown=0.01)
+    for _ in range(2):
+        breaker.record(False, breaker.allow())
+    assert breaker.state == "open"
+    assert breaker.allow() is None
+
+    time.sleep(0.02)
+    probe = breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert breaker.allow() is None
+    breaker.record(True, probe)
+    assert breaker.state == "closed"
+
+
+def test_breaker_ignores_replies_sent_before_it_opened():
+    breaker = CircuitBreaker(failures=1, cooldown=0.01)
+    straggler = breaker.allow()
+    breaker.record(False, breaker.allow())
+    assert breaker.state == "open"
+
+    time.sleep(0.02)
+    probe = breaker.allow()
+    breaker.record(True, straggler)
+    assert breaker.state == "half_open"
+    breaker.record(False, probe)
+    assert breaker.state == "open"
+
+
+def test_released_probe_lets_the_next_caller_probe():
+    breaker = CircuitBreaker(failures=1, cooldown=0.01)
+    breaker.record(False, breaker.allow())
+    time.sleep(0.02)
+
+    breaker.release(breaker.allow())
+
+    assert breaker.allow() is not None
+
+
+def test_token_bucket_spaces_requests_past_the_burst():
+    limiter = RateLimiter(rate=100, burst=2)
+
+    assert limiter.reserve() == limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.01, abs=0.002)
+    limiter.release()
+    assert limiter.reserve() == pytest.approx(0.01, abs=0.002)
+
+
+def test_pause_delays_every_caller():
+    limiter = RateLimiter()
+    limiter.pause(0.5)
+
+    assert 0.4 < limiter.reserve() <= 0.5
+    assert 0.4 < limiter.reserve() <= 0.5
+
+
+def test_cancelled_wait_gives_the_slot_back():
+    limiter = RateLimiter(rate=10, burst=1)
+    limiter.reserve()
+
+    async def scenario():
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    # Only the first reservation is still outstanding
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def make_resilience(**policy) -> Resilience:
+    return Resilience(ResiliencePolicy(backoff_base=0.001, **policy))
+
+
+def test_429_is_retried_and_does_not_open_the_breaker():
+    resilience = make_resilience(breaker_failures=1, max_attempts=2)
+    responses = iter([httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200)])
+
+    async def send():
+        return next(responses)
+
+    response = asyncio.run(resilience.acall(send))
+
+    assert response.status_code == 200
+    assert resilience.breaker.state == "closed"
+    assert resilience.stats["throttled"] == resilience.stats["retries"] == 1
+
+
+def test_open_breaker_short_circuits():
+    resilience = make_resilience(breaker_failures=1, max_attempts=1)
+
+    async def send():
+        return httpx.Response(503)
+
+    asyncio.run(resilience.acall(send))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilience.acall(send))
+    assert resilience.stats["short_circuited"] == 1
+
+
+def test_unexpected_error_releases_the_probe():
+    resilience = make_resilience(breaker_failures=1, breaker_cooldown=0.01, max_attempts=1)
+
+    async def unavailable():
+        return httpx.Response(503)
+
+    async def broken():
+        raise RuntimeError("bad payload")
+
+    asyncio.run(resilience.acall(unavailable))
+    time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        asyncio.run(resilience.acall(broken))
+
+    # The failed probe never reported, yet the next call may probe straight away
+    async def healthy():
+        return httpx.Response(200)
+
+    assert asyncio.run(resilience.acall(healthy)).status_code == 200
+    assert resilience.breaker.state == "closed"
+
+
+def test_hedge_waits_for_the_rate_limiter():
+    resilience = make_resilience(hedge_min_samples=1, hedge_min_delay=0.01, rate_limit=5, rate_burst=1)
+    resilience._latencies.extend([0.001] * 5)
+    sent = []
+
+    async def send():
+        sent.append(time.monotonic())
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    response = asyncio.run(resilience.acall(send))
+
+    assert response.status_code == 200
+    assert resilience.stats["hedges"] == 1
+    # The first request used the only token and finished before the hedge's slot came up
+    assert len(sent) == 1
+    # ...and the cancelled hedge gave its slot back
+    assert resilience.limiter.reserve() < 0.25
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from langchain_core.messages import HumanMessage
+
+from src.services.forecast_request import shape_forecast_request
+from src.tools.weather_prefetch import WeatherPrefetcher, guess_requests
+from src.tools.weather_report_tool import build_weather_tools
+
+NOW = datetime(2025, 10, 16, 15, tzinfo=ZoneInfo("Europe/Paris"))
+CITIES = {
+    "London": {"name": "London", "latitude": 51.51, "longitude": -0.13, "timezone": "Europe/London"},
+    "Paris": {"name": "Paris", "latitude": 48.85, "longitude": 2.35, "timezone": "Europe/Paris"},
+}
+PAYLOAD = {"hourly": {"time": ["2025-10-17T12:00"], "apparent_temperature": [18]}}
+
+
+class StubGeocoding:
+    def __init__(self):
+        self.cities: list[str] = []
+
+    async def afetch_coordinates(self, city: str) -> dict:
+        self.cities.append(city)
+        return CITIES[city.strip().title()]
+
+
+class StubForecasts:
+    def __init__(self):
+        self.locations: list[str] = []
+
+    async def afetch_forecast(self, location, request) -> dict:
+        self.locations.append(location.name)
+        return PAYLOAD
+
+
+def make_prefetcher() -> tuple[WeatherPrefetcher, StubGeocoding, StubForecasts]:
+    geocoding, forecasts = StubGeocoding(), StubForecasts()
+    return WeatherPrefetcher(geocoding, forecasts, now=lambda: NOW), geocoding, forecasts
+
+
+def test_guesses_cities_time_range_and_activity():
+    messages = [HumanMessage("I want to have a city walk tonight."), HumanMessage("Shanghai")]
+
+    [guess] = guess_requests(messages)
+
+    assert (guess.city, guess.time_range, guess.activity) == ("Shanghai", "tonight", "walk")
+
+
+def test_claims_hit_on_the_normalized_city():
+    prefetcher, geocoding, forecasts = make_prefetcher()
+
+    async def scenario():
+        started = prefetcher.start([HumanMessage("Compare the weather in London and Paris tomorrow.")])
+        # Let the geocodes finish and the forecast fetches they schedule start
+        await asyncio.sleep(0.01)
+        location = await prefetcher.claim_location("  PARIS ")
+        request = shape_forecast_request("tomorrow", None, NOW, location["timezone"])
+        forecast = await prefetcher.claim_forecast("paris", request)
+        return started, location, forecast
+
+    started, location, forecast = asyncio.run(scenario())
+
+    assert started == 2
+    assert location == CITIES["Paris"]
+    assert forecast == PAYLOAD
+    assert sorted(forecasts.locations) == ["London", "Paris"]
+    assert prefetcher.stats["geocode_hits"] == prefetcher.stats["forecast_hits"] == 1
+    assert prefetcher.stats["ready_hits"] == 2
+
+
+def test_claims_miss_for_other_cities_and_slices():
+    prefetcher, _, _ = make_prefetcher()
+
+    async def scenario():
+        prefetcher.start([HumanMessage("What's the weather in Paris tomorrow?")])
+        await asyncio.sleep(0.01)
+        other_city = prefetcher.claim_location("London")
+        other_day = prefetcher.claim_forecast(
+            "Paris", shape_forecast_request("this weekend", None, NOW, "Europe/Paris")
+        )
+        return other_city, other_day
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert prefetcher.stats["geocode_misses"] == prefetcher.stats["forecast_misses"] == 1
+    assert prefetcher.hit_rate() == 0.0
+
+    prefetcher.flush()
+    # The Paris geocode and forecast were never claimed
+    assert prefetcher.stats["wasted"] == 2
+
+
+def test_weather_tool_reuses_the_prefetched_fetches():
+    prefetcher, geocoding, forecasts = make_prefetcher()
+    [get_weather_data, _] = build_weather_tools(
+        geocoding, forecasts, now=lambda: NOW, prefetcher=prefetcher
+    )
+
+    async def scenario():
+        prefetcher.start([HumanMessage("What's the weather like in Paris tomorrow?")])
+        return await get_weather_data.ainvoke({"city": "Paris", "time_range": "tomorrow"})
+
+    report = asyncio.run(scenario())
+
+    assert report.startswith("Paris:")
+    # Only the prefetch went upstream
+    assert geocoding.cities == ["Paris"]
+    assert forecasts.locations == ["Paris"]
+    assert prefetcher.hit_rate() == 1.0
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.services.forecast_request import ALL_VARIABLES
+from src.tools.weather_report_tool import build_weather_tools
+
+# A Thursday afternoon in Paris
+NOW = datetime(2025, 10, 16, 15, tzinfo=ZoneInfo("Europe/Paris"))
+PARIS = {"name": "Paris", "latitude": 48.85, "longitude": 2.35, "timezone": "Europe/Paris"}
+
+
+def hourly_payload(dry: set[datetime] = frozenset()) -> dict:
+    """Five days of mild, windless hours from Thursday, rainy except the `dry` ones."""
+    start = datetime(2025, 10, 16)
+    times = [start + timedelta(hours=h) for h in range(5 * 24)]
+    return {
+        "timezone": "Europe/Paris",
+        "hourly": {
+            "time": [t.strftime("%Y-%m-%dT%H:%M") for t in times],
+            "apparent_temperature": [20] * len(times),
+            "relativehumidity_2m": [50] * len(times),
+            "precipitation_probability": [0 if t in dry else 80 for t in times],
+            "windspeed_10m": [5] * len(times),
+            "uv_index": [2] * len(times),
+        },
+    }
+
+
+class StubGeocoding:
+    def __init__(self):
+        self.cities: list[str] = []
+
+    async def afetch_coordinates(self, city: str) -> dict:
+        self.cities.append(city)
+        return PARIS
+
+
+class StubForecasts:
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.requests = []
+
+    async def afetch_forecast(self, location, request) -> dict:
+        self.requests.append((location, request))
+        return self.payload
+
+
+def test_weather_report_fetches_only_the_activity_variables():
+    geocoding, forecasts = StubGeocoding(), StubForecasts(hourly_payload())
+    get_weather_data, _ = build_weather_tools(geocoding, forecasts, now=lambda: NOW)
+
+    report = asyncio.run(
+        get_weather_data.ainvoke({"city": "Paris", "time_range": "tomorrow", "activity": "city walk"})
+    )
+
+    [(location, request)] = forecasts.requests
+    assert geocoding.cities == ["Paris"]
+    assert location.timezone == "Europe/Paris"
+    assert set(request.variables) < set(ALL_VARIABLES)
+    assert request.start_date == request.end_date == NOW.date() + timedelta(days=1)
+    assert report.startswith("Paris:\ntime|")
+    assert "10-17 12|" in report
+
+
+def test_activity_window_ranks_the_dry_hours_of_the_requested_span():
+    dry = {datetime(2025, 10, 18, 10) + timedelta(hours=h) for h in range(3)}
+    # A dry spell on Thursday is outside "this weekend" and must not be offered
+    dry |= {datetime(2025, 10, 16, 16) + timedelta(hours=h) for h in range(3)}
+    forecasts = StubForecasts(hourly_payload(dry))
+    _, find_activity_window = build_weather_tools(StubGeocoding(), forecasts, now=lambda: NOW)
+
+    result = asyncio.run(
+        find_activity_window.ainvoke(
+            {"city": "Paris", "time_range": "this weekend", "activity": "bike ride", "duration_hours": 2}
+        )
+    )
+
+    [(_, request)] = forecasts.requests
+    assert request.variables == ALL_VARIABLES
+    lines = result.splitlines()
+    assert lines[0] == "Best times for bike ride in Paris:"
+    assert lines[1].startswith("- Sat 18 Oct 10:00-12:00 (2025-10-18T10:00:00+02:00")
+    assert "Thu 16 Oct" not in result